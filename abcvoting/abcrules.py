@@ -5,16 +5,13 @@
 from __future__ import print_function
 import sys
 import functools
-from itertools import combinations
-
-try:
-    from gmpy2 import mpq as Fraction
-except ImportError:
-    print("Warning: module gmpy2 not found, "
-          + "resorting to Python's fractions.Fraction")
-    from fractions import Fraction
+import multiprocessing
+from itertools import chain, combinations, islice
+import numpy as np
+
 from abcvoting import abcrules_gurobi
 from abcvoting import abcrules_cvxpy
+from abcvoting import abcrules_scipy
 from abcvoting.misc import sort_committees
 from abcvoting.misc import hamming
 from abcvoting.misc import check_enough_approved_candidates
@@ -22,6 +19,16 @@ from abcvoting.misc import str_committees_header
 from abcvoting.misc import str_candset, str_candsets
 from abcvoting.misc import header
 from abcvoting import scores
+from abcvoting import numeric
+from abcvoting.reduction import reduce_candidates
+from abcvoting.budget import Budget, BudgetExhausted
+
+
+# number of committees that are scored at once by the brute-force algorithms for (lex-)MAV
+MAV_CHUNKSIZE = 4096
+
+# seconds between two checks of the budget while waiting for worker processes
+BNB_POLL_INTERVAL = 0.1
 
 
 ########################################################################
@@ -39,6 +46,9 @@ def is_algorithm_supported(algo):
     if algo == "gurobi" and not abcrules_gurobi.available:
         return False
 
+    if algo == "highs" and not abcrules_scipy.available:
+        return False
+
     if algo in ("glpk_mi", "cbc", "scip", "cvxpy_gurobi"):
         if not abcrules_cvxpy.cvxpy_available or not abcrules_cvxpy.numpy_available:
             return False
@@ -90,14 +100,18 @@ def __init_rules():
          ("standard",), (True, False)),
         ("pav", "PAV", "Proportional Approval Voting (PAV)", compute_pav,
          # TODO sort by speed, requires testing I guess...
-         ("gurobi", "branch-and-bound", "glpk_mi", "cbc", "scip", "cvxpy_gurobi"), (True, False)),
+         ("gurobi", "branch-and-bound", "highs", "glpk_mi", "cbc", "scip", "cvxpy_gurobi"),
+         (True, False)),
         ("slav", "SLAV", "Sainte-Laguë Approval Voting (SLAV)", compute_slav,
-         ("gurobi", "branch-and-bound"), (True, False)),
+         ("gurobi", "branch-and-bound", "highs", "glpk_mi", "cbc", "scip", "cvxpy_gurobi"),
+         (True, False)),
         ("cc", "CC", "Approval Chamberlin-Courant (CC)", compute_cc,
-         ("gurobi", "branch-and-bound"), (True, False)),
+         ("gurobi", "branch-and-bound", "highs", "glpk_mi", "cbc", "scip", "cvxpy_gurobi"),
+         (True, False)),
         ("geom2", "2-Geometric", "2-Geometric Rule",
          functools.partial(compute_thiele_method, "geom2"),
-         ("gurobi", "branch-and-bound",), (True, False)),
+         ("gurobi", "branch-and-bound", "highs", "glpk_mi", "cbc", "scip", "cvxpy_gurobi"),
+         (True, False)),
         ("seqpav", "seq-PAV", "Sequential Proportional Approval Voting (seq-PAV)",
          compute_seqpav, ("standard",), (True, False)),
         ("revseqpav", "revseq-PAV",
@@ -111,13 +125,13 @@ def __init_rules():
         ("seqphrag", "seq-Phragmén", "Phragmén's Sequential Rule (seq-Phragmén)",
          compute_seqphragmen, ("standard", "exact-fractions"), (True, False)),
         ("optphrag", "opt-Phragmén", "Phragmén's Optimization Rule (opt-Phragmén)",
-         compute_optphragmen, ("gurobi",), (True, False)),
+         compute_optphragmen, ("gurobi", "highs"), (True, False)),
         ("monroe", "Monroe", "Monroe's Approval Rule (Monroe)",
-         compute_monroe, ("gurobi", "brute-force"), (True, False)),
+         compute_monroe, ("gurobi", "highs", "brute-force"), (True, False)),
         ("greedy-monroe", "Greedy Monroe", "Greedy Monroe",
          compute_greedy_monroe, ("standard",), (True,)),
         ("mav", "MAV", "Minimax Approval Voting (MAV)",
-         compute_mav, ("gurobi", "brute-force"), (True, False)),
+         compute_mav, ("gurobi", "highs", "brute-force"), (True, False)),
         ("lexmav", "lex-MAV", "Lexicographic Minimax Approval Voting (lex-MAV)",
          compute_lexmav, ("brute-force",), (True, False)),
         ("rule-x", "Rule X", "Rule X",
@@ -151,13 +165,33 @@ def compute(rule_id, profile, committeesize, **kwargs):
 # computes arbitrary Thiele methods via branch-and-bound
 def compute_thiele_method(scorefct_str, profile, committeesize,
                           algorithm="branch-and-bound",
-                          resolute=False, verbose=0):
+                          resolute=False, verbose=0, arithmetic="auto", workers=1,
+                          time_limit=None, max_nodes=None, cancellation_token=None):
     """Thiele methods
 
     Compute winning committees of the Thiele method specified
     by the score function (scorefct_str)
+
+    arithmetic (only used by branch-and-bound) is either "exact" (fractions), "float" or
+    "auto" (floats, but scores that are almost tied are compared exactly)
+
+    workers (only used by branch-and-bound) is the number of processes that search
+    the branch-and-bound tree in parallel
+
+    time_limit, max_nodes and cancellation_token (used by branch-and-bound, gurobi and highs)
+    limit the computation; if the computation is stopped, the best committees found so far
+    are returned as `budget.IncompleteResult`. The CVXPY solvers ('glpk_mi', 'cbc', 'scip',
+    'cvxpy_gurobi') do not support these limits.
     """
     check_enough_approved_candidates(profile, committeesize)
+    __check_arithmetic(arithmetic)
+    if int(workers) != workers or workers < 1:
+        raise ValueError("workers must be a positive integer")
+    budget = Budget(time_limit, max_nodes, cancellation_token)
+    if algorithm in ['glpk_mi', 'cbc', 'scip', 'cvxpy_gurobi'] and not budget.unlimited:
+        raise NotImplementedError(
+            "time_limit, max_nodes and cancellation_token are not supported by algorithm "
+            + str(algorithm))
     scorefct = scores.get_scorefct(scorefct_str, committeesize)
 
     # optional output
@@ -170,18 +204,33 @@ def compute_thiele_method(scorefct_str, profile, committeesize,
             print("Using the Gurobi ILP solver\n")
         if algorithm == "branch-and-bound":
             print("Using a branch-and-bound algorithm\n")
+        if algorithm == "highs":
+            print("Using the HiGHS MILP solver (via scipy)\n")
     # end of optional output
 
+    # voters with identical approval sets are merged, see Profile.compressed()
+    compressed = profile.compressed()
+    # clones and, if all marginal scores are positive and the profile is large enough for it
+    # to pay off, dominated candidates are removed
+    positive_scores = all(scorefct(i) > 0 for i in range(1, committeesize + 1))
+    reduction = reduce_candidates(
+        compressed, committeesize, remove_dominated="auto" if positive_scores else False)
+    compressed = reduction.profile.compressed()
+
     if algorithm == "gurobi":
         committees = abcrules_gurobi.__gurobi_thiele_methods(
-            profile, committeesize, scorefct, resolute)
+            compressed, committeesize, scorefct, resolute, budget=budget)
 
         committees = sort_committees(committees)
+    elif algorithm == "highs":
+        committees = abcrules_scipy.scipy_thiele_methods(
+            compressed, committeesize, scorefct, resolute, budget=budget)
     elif algorithm == "branch-and-bound":
         committees = __thiele_methods_branchandbound(
-            profile, committeesize, scorefct_str, resolute)
+            compressed, committeesize, scorefct_str, resolute, arithmetic, verbose=verbose,
+            workers=workers, budget=budget)
     elif algorithm in ['glpk_mi', 'cbc', 'scip', 'cvxpy_gurobi']:
-        committees = abcrules_cvxpy.cvxpy_thiele_methods(profile=profile,
+        committees = abcrules_cvxpy.cvxpy_thiele_methods(profile=compressed,
                                                          committeesize=committeesize,
                                                          scorefct_str=scorefct_str,
                                                          resolute=resolute,
@@ -190,9 +239,13 @@ def compute_thiele_method(scorefct_str, profile, committeesize,
         raise NotImplementedError(
             "Algorithm " + str(algorithm)
             + " not specified for compute_thiele_method")
+    committees = reduction.expand(reduction.original(committees), resolute)
 
     # optional output
-    if verbose >= 2:
+    if verbose and budget.reason is not None:
+        print("Computation stopped (" + budget.reason + "), the committees found so far "
+              "are not necessarily optimal\n")
+    if verbose >= 2 and committees:
         print("Optimal " + scorefct_str.upper() + "-score: "
               + str(scores.thiele_score(scorefct_str, profile, committees[0])))
         print()
@@ -201,88 +254,295 @@ def compute_thiele_method(scorefct_str, profile, committeesize,
         print(str_candsets(committees, cand_names=profile.cand_names))
     # end of optional output
 
-    return committees
+    return budget.result(committees)
 
 
 # computes arbitrary Thiele methods via branch-and-bound
 def __thiele_methods_branchandbound(profile, committeesize,
-                                    scorefct_str, resolute):
-    """Branch-and-bound algorithm to compute winning committees
-    for Thiele methods"""
+                                    scorefct_str, resolute, arithmetic="exact", verbose=0,
+                                    workers=1, budget=None):
+    """Depth-first branch-and-bound algorithm to compute winning committees
+    for Thiele methods
+
+    Candidates are added in order of decreasing marginal gain, hence the first committee
+    found is the one of the sequential Thiele method. The score, the marginal gains and the
+    satisfaction of voters are updated incrementally along the search path
+    (see `scores.MarginalGainTracker`). Since Thiele score functions are submodular, a partial
+    committee with t missing candidates that can only be completed by candidates in R is
+    pruned if one of the following upper bounds is smaller than the best score found so far:
+    - its score plus the t largest marginal gains of candidates in R,
+    - its score plus, for each voter, the marginal scores of min(t, number of approved
+      candidates in R) additional approved committee members.
+
+    If workers > 1, the search tree is split into subtrees (fixing the first committee
+    members), which are searched by a pool of worker processes. The best score found so far
+    is shared between all workers and used for pruning.
+
+    If the budget runs out, the search stops (budget.reason is set) and the best committees
+    found so far are returned. The budget is only checked after a first committee has been
+    found, i.e., the committee of the sequential Thiele method is always computed.
+    With workers > 1, the main process checks the time limit and the cancellation token
+    and terminates the workers; max_nodes also limits the search of each subtree.
+    """
     check_enough_approved_candidates(profile, committeesize)
-    scorefct = scores.get_scorefct(scorefct_str, committeesize)
-
-    best_committees = []
-    init_com = compute_seq_thiele_method(
-        profile, committeesize, scorefct_str, resolute=True)[0]
-    best_score = scores.thiele_score(scorefct_str, profile, init_com)
-    part_coms = [[]]
-    while part_coms:
-        part_com = part_coms.pop(0)
-        # potential committee, check if at least as good
-        # as previous best committee
-        if len(part_com) == committeesize:
-            score = scores.thiele_score(scorefct_str, profile, part_com)
-            if score == best_score:
-                best_committees.append(part_com)
-            elif score > best_score:
-                best_committees = [part_com]
-                best_score = score
-        else:
-            if len(part_com) > 0:
-                largest_cand = part_com[-1]
-            else:
-                largest_cand = -1
-            missing = committeesize - len(part_com)
-            marg_util_cand = scores.marginal_thiele_scores_add(
-                scorefct, profile, part_com)
-            upper_bound = (
-                sum(sorted(marg_util_cand[largest_cand + 1:])[-missing:])
-                + scores.thiele_score(scorefct_str, profile, part_com))
-            if upper_bound >= best_score:
-                for c in range(largest_cand + 1,
-                               profile.num_cand - missing + 1):
-                    part_coms.insert(0, part_com + [c])
-
+    if budget is None:
+        budget = Budget()
+    params = (profile, committeesize, scorefct_str, resolute, arithmetic)
+    tolerance = scores.float_tolerance(profile) if arithmetic == "auto" else 0
+
+    if workers <= 1:
+        best_committees, num_nodes, num_pruned = __thiele_bnb_search(
+            params, [], list(range(profile.num_cand)), budget=budget)
+    else:
+        tasks, init_com, init_score = __thiele_bnb_subtrees(params, 4 * workers)
+        incumbent = multiprocessing.RawValue("d", float(init_score))
+        lock = multiprocessing.Lock()
+        # workers might prune init_com, since it does not improve the incumbent
+        best_committees, num_nodes, num_pruned = [(tuple(sorted(init_com)), init_score)], 0, 0
+        with multiprocessing.Pool(workers, initializer=__thiele_bnb_worker_init,
+                                  initargs=(params, incumbent, lock,
+                                            budget.max_nodes)) as pool:
+            results = pool.imap_unordered(__thiele_bnb_worker, tasks)
+            pending = len(tasks)
+            while pending and not budget.exhausted(0):
+                try:
+                    result = results.next(timeout=BNB_POLL_INTERVAL)
+                except multiprocessing.TimeoutError:
+                    continue
+                pending -= 1
+                best_committees.extend(result[0])
+                num_nodes += result[1]
+                num_pruned += result[2]
+                budget.nodes += result[1]
+                if result[3] is not None:
+                    budget.stop(result[3])
+            # leaving the with-block terminates workers that are still running
+
+    best_score = max(score for _, score in best_committees)
+    best_committees = list(set(committee for committee, score in best_committees
+                               if score >= best_score - tolerance))
+    if arithmetic == "auto" and len(best_committees) > 1:
+        # compare (almost) tied committees exactly
+        exact_scores = scores.thiele_scores_batch(scorefct_str, profile, best_committees)
+        best_committees = [committee for committee, score in zip(best_committees, exact_scores)
+                           if score == max(exact_scores)]
     committees = sort_committees(best_committees)
     if resolute:
         committees = [committees[0]]
 
+    # optional output
+    if verbose >= 3:
+        print("Branch-and-bound: " + str(num_nodes) + " nodes visited, "
+              + str(num_pruned) + " subtrees pruned\n")
+        if budget.reason is not None:
+            print("Branch-and-bound stopped (" + budget.reason + ")\n")
+    # end of optional output
+
     return committees
 
 
+def __thiele_bnb_search(params, prefix, remaining, incumbent=None, lock=None, budget=None):
+    """Searches all committees that contain prefix and are completed by candidates in
+    remaining (see `__thiele_methods_branchandbound`).
+
+    incumbent (a shared multiprocessing.RawValue) contains a float that is not larger than
+    the best score found by any worker; it is read for pruning and updated (using lock).
+
+    Each visited node is charged to budget (if given); if it is exhausted, the search stops
+    as soon as a committee has been found.
+
+    Returns the list of best committees found together with their scores (fractions or
+    floats), the number of visited nodes and the number of pruned subtrees.
+    """
+    profile, committeesize, scorefct_str, _, arithmetic = params
+    scorefct = scores.get_scorefct(scorefct_str, committeesize)
+
+    # in "auto" mode, the search uses floats and keeps all committees that are within
+    # `tolerance` of the best score; these are compared exactly at the end
+    score_arithmetic = "exact" if arithmetic == "exact" else "float"
+    tolerance = scores.float_tolerance(profile) if arithmetic == "auto" else 0
+    # the shared incumbent is a float, it might slightly exceed the exact score
+    shared_tolerance = scores.float_tolerance(profile) if arithmetic != "float" else 0
+    tracker = scores.MarginalGainTracker(scorefct, profile, committee=prefix,
+                                         arithmetic=score_arithmetic)
+    # for each voter, the number of approved candidates that can still be added
+    available = [0] * len(profile)
+    for cand in remaining:
+        for voter in profile.approvers(cand):
+            available[voter] += 1
+
+    best_score = None
+    # pairs of committee and score (in the internal representation of tracker)
+    best_committees = []
+    stats = {"nodes": 0, "pruned": 0}
+    # (value of incumbent, corresponding threshold in the internal representation)
+    shared = [None, None]
+
+    def promising(bound):
+        threshold = None if best_score is None else best_score - tolerance
+        if incumbent is not None:
+            if incumbent.value != shared[0]:
+                shared[0] = incumbent.value
+                shared[1] = tracker.from_number(incumbent.value - shared_tolerance)
+            if threshold is None or shared[1] > threshold:
+                threshold = shared[1]
+        if threshold is None:
+            return True
+        # ties are kept also if resolute, since the lexicographically smallest optimal
+        # committee is returned
+        return bound >= threshold
+
+    def found(committee, score):
+        nonlocal best_score
+        if best_score is None or score > best_score:
+            best_score = score
+            if incumbent is not None:
+                value = float(tracker.to_number(score))
+                with lock:
+                    if value > incumbent.value:
+                        incumbent.value = value
+        if score >= best_score - tolerance:
+            best_committees.append((tuple(sorted(committee)), score))
+
+    def search(remaining):
+        stats["nodes"] += 1
+        if budget is not None and budget.exhausted() and best_committees:
+            raise BudgetExhausted(budget.reason)
+        gains = tracker.gains
+        missing = committeesize - len(tracker.committee)
+        if missing == 0:
+            found(tracker.committee, tracker.raw_score)
+            return
+        order = sorted(remaining, key=lambda cand: (-gains[cand], cand))
+        if missing == 1:
+            # complete committees are scored directly via their marginal gain
+            for i, cand in enumerate(order):
+                if not promising(tracker.raw_score + gains[cand]):
+                    stats["pruned"] += len(order) - i
+                    break
+                found(tracker.committee + [cand], tracker.raw_score + gains[cand])
+            return
+        # upper bounds of the subtrees of order[i] are sums of order[i:i + missing]
+        window = sum(gains[cand] for cand in order[:missing])
+        if (not promising(tracker.raw_score + window)
+                or not promising(tracker.raw_score
+                                 + tracker.satisfaction_bound(available, missing))):
+            stats["pruned"] += 1
+            return
+        removed = []
+        for i in range(len(order) - missing + 1):
+            if i > 0:
+                window += gains[order[i + missing - 1]] - gains[order[i - 1]]
+                if not promising(tracker.raw_score + window):
+                    stats["pruned"] += len(order) - missing + 1 - i
+                    break
+            cand = order[i]
+            removed.append(cand)
+            for voter in profile.approvers(cand):
+                available[voter] -= 1
+            tracker.add(cand)
+            search(order[i + 1:])
+            tracker.remove(cand)
+        for cand in removed:
+            for voter in profile.approvers(cand):
+                available[voter] += 1
+
+    if len(remaining) >= committeesize - len(prefix):
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(limit, committeesize + 100))
+        try:
+            search(remaining)
+        except BudgetExhausted:
+            pass
+        finally:
+            sys.setrecursionlimit(limit)
+
+    best_committees = [(committee, tracker.to_number(score))
+                       for committee, score in best_committees
+                       if score >= best_score - tolerance]
+    return best_committees, stats["nodes"], stats["pruned"]
+
+
+def __thiele_bnb_subtrees(params, num_subtrees):
+    """Splits the search tree of `__thiele_methods_branchandbound` into at least num_subtrees
+    subtrees (if possible), given as pairs (prefix, remaining).
+
+    Returns the subtrees, the committee of the sequential Thiele method and its score.
+    """
+    profile, committeesize, scorefct_str, resolute, arithmetic = params
+    scorefct = scores.get_scorefct(scorefct_str, committeesize)
+    score_arithmetic = "exact" if arithmetic == "exact" else "float"
+    tracker = scores.MarginalGainTracker(scorefct, profile, arithmetic=score_arithmetic)
+    subtrees = [([], list(range(profile.num_cand)))]
+    for depth in range(committeesize - 1):
+        if len(subtrees) >= num_subtrees:
+            break
+        children = []
+        for prefix, remaining in subtrees:
+            tracker.set_committee(prefix)
+            gains = tracker.gains
+            order = sorted(remaining, key=lambda cand: (-gains[cand], cand))
+            missing = committeesize - len(prefix)
+            children.extend((prefix + [cand], order[i + 1:])
+                            for i, cand in enumerate(order[:len(order) - missing + 1]))
+        subtrees = children
+    # the first subtree starts with the committee of the sequential Thiele method
+    tracker.set_committee(subtrees[0][0])
+    while len(tracker.committee) < committeesize:
+        gains = tracker.gains
+        tracker.add(min((cand for cand in subtrees[0][1] if cand not in tracker.committee),
+                        key=lambda cand: (-gains[cand], cand)))
+    return subtrees, tracker.committee, tracker.score
+
+
+def __thiele_bnb_worker_init(params, incumbent, lock, max_nodes):
+    global __thiele_bnb_worker_state
+    __thiele_bnb_worker_state = (params, incumbent, lock, max_nodes)
+
+
+def __thiele_bnb_worker(subtree):
+    """Searches a subtree, returns the result of `__thiele_bnb_search` and the reason why
+    the search was stopped (None if it was completed)."""
+    params, incumbent, lock, max_nodes = __thiele_bnb_worker_state
+    prefix, remaining = subtree
+    budget = Budget(max_nodes=max_nodes)
+    result = __thiele_bnb_search(params, prefix, remaining, incumbent=incumbent, lock=lock,
+                                 budget=budget)
+    return result + (budget.reason,)
+
+
 # Sequential PAV
 def compute_seqpav(profile, committeesize, algorithm="standard",
-                   resolute=True, verbose=0):
+                   resolute=True, verbose=0, arithmetic="auto"):
     """Sequential PAV (seq-PAV)"""
     return compute_seq_thiele_method(
         profile, committeesize, 'pav', algorithm=algorithm,
-        resolute=resolute, verbose=verbose)
+        resolute=resolute, verbose=verbose, arithmetic=arithmetic)
 
 
 def compute_seqslav(profile, committeesize, algorithm="standard",
-                    resolute=True, verbose=0):
+                    resolute=True, verbose=0, arithmetic="auto"):
     """Sequential Sainte-Lague Approval Voting (SLAV)"""
     return compute_seq_thiele_method(
         profile, committeesize, "slav", algorithm=algorithm,
-        resolute=resolute, verbose=verbose)
+        resolute=resolute, verbose=verbose, arithmetic=arithmetic)
 
 
 # Reverse Sequential PAV
 def compute_revseqpav(profile, committeesize, algorithm="standard",
-                      resolute=True, verbose=0):
+                      resolute=True, verbose=0, arithmetic="auto"):
     """Reverse sequential PAV (revseq-PAV)"""
     return compute_revseq_thiele_method(
         profile, committeesize, 'pav', algorithm=algorithm,
-        resolute=resolute, verbose=verbose)
+        resolute=resolute, verbose=verbose, arithmetic=arithmetic)
 
 
 def compute_seqcc(profile, committeesize, algorithm="standard",
-                  resolute=True, verbose=0):
+                  resolute=True, verbose=0, arithmetic="auto"):
     """Sequential Chamberlin-Courant (seq-CC)"""
     return compute_seq_thiele_method(
         profile, committeesize, 'cc', algorithm=algorithm,
-        resolute=resolute, verbose=verbose)
+        resolute=resolute, verbose=verbose, arithmetic=arithmetic)
 
 
 def compute_sav(profile, committeesize, algorithm="standard",
@@ -308,18 +568,20 @@ def compute_av(profile, committeesize, algorithm="standard",
 
 def __separable(rule_id, profile, committeesize, resolute, verbose):
     check_enough_approved_candidates(profile, committeesize)
-
-    appr_scores = [0] * profile.num_cand
-    for pref in profile:
-        for cand in pref:
-            if rule_id == "sav":
-                # Satisfaction Approval Voting
-                appr_scores[cand] += pref.weight / len(pref)
-            elif rule_id == "av":
-                # (Classic) Approval Voting
-                appr_scores[cand] += pref.weight
-            else:
-                raise UnknownRuleIDError(rule_id)
+    profile = profile.compressed()
+
+    weights = profile.weight_vector().tolist()
+    if rule_id == "sav":
+        # Satisfaction Approval Voting
+        _, indptr = profile.csr()
+        voter_scores = [weight / length if length > 0 else 0
+                        for weight, length in zip(weights, np.diff(indptr).tolist())]
+    elif rule_id == "av":
+        # (Classic) Approval Voting
+        voter_scores = weights
+    else:
+        raise UnknownRuleIDError(rule_id)
+    appr_scores = profile.sum_over_approvers(voter_scores)
 
     # smallest score to be in the committee
     cutoff = sorted(appr_scores)[-committeesize]
@@ -381,7 +643,7 @@ def __separable(rule_id, profile, committeesize, resolute, verbose):
     return committees
 
 
-def __seq_thiele_resolute(profile, committeesize, scorefct_str, verbose):
+def __seq_thiele_resolute(profile, committeesize, scorefct_str, verbose, arithmetic="exact"):
     """Compute a *resolute* reverse sequential Thiele method
 
     Tiebreaking between candidates in favor of candidate with smaller
@@ -400,11 +662,12 @@ def __seq_thiele_resolute(profile, committeesize, scorefct_str, verbose):
     # end of optional output
 
     # build a committee starting with the empty set
+    tracker = scores.MarginalGainTracker(scorefct, profile, arithmetic=arithmetic)
     for _ in range(committeesize):
-        additional_score_cand = scores.marginal_thiele_scores_add(
-            scorefct, profile, committee)
+        additional_score_cand = tracker.marginal_gains()
         next_cand = additional_score_cand.index(max(additional_score_cand))
         committee.append(next_cand)
+        tracker.add(next_cand)
         # optional output
         if verbose >= 2:
             output = "adding candidate number "
@@ -429,7 +692,7 @@ def __seq_thiele_resolute(profile, committeesize, scorefct_str, verbose):
     return [sorted(committee)]
 
 
-def __seq_thiele_irresolute(profile, committeesize, scorefct_str):
+def __seq_thiele_irresolute(profile, committeesize, scorefct_str, arithmetic="exact"):
     """Compute an *irresolute* reverse sequential Thiele method
 
     Consider all possible ways to break ties between candidates
@@ -437,28 +700,36 @@ def __seq_thiele_irresolute(profile, committeesize, scorefct_str):
     """
     scorefct = scores.get_scorefct(scorefct_str, committeesize)
 
-    comm_scores = {(): 0}
+    comm_trackers = {(): scores.MarginalGainTracker(scorefct, profile, arithmetic=arithmetic)}
     # build committees starting with the empty set
     for _ in range(committeesize):
-        comm_scores_next = {}
-        for committee, score in comm_scores.items():
+        comm_trackers_next = {}
+        for committee, tracker in comm_trackers.items():
             # marginal utility gained by adding candidate to the committee
-            additional_score_cand = scores.marginal_thiele_scores_add(
-                scorefct, profile, committee)
+            additional_score_cand = tracker.marginal_gains()
+            max_score = max(additional_score_cand)
             for c in range(profile.num_cand):
-                if additional_score_cand[c] >= max(additional_score_cand):
+                if additional_score_cand[c] >= max_score:
                     next_comm = tuple(sorted(committee + (c,)))
-                    comm_scores_next[next_comm] = (
-                        score + additional_score_cand[c])
-        comm_scores = comm_scores_next
-    return sort_committees(list(comm_scores.keys()))
+                    if next_comm not in comm_trackers_next:
+                        next_tracker = tracker.copy()
+                        next_tracker.add(c)
+                        comm_trackers_next[next_comm] = next_tracker
+        comm_trackers = comm_trackers_next
+    return sort_committees(list(comm_trackers.keys()))
 
 
 def compute_seq_thiele_method(profile, committeesize, scorefct_str,
-                              algorithm="standard", resolute=True, verbose=0):
-    """Sequential Thiele methods"""
+                              algorithm="standard", resolute=True, verbose=0,
+                              arithmetic="auto"):
+    """Sequential Thiele methods
+
+    arithmetic is either "exact" (fractions), "float" or "auto" (floats, but marginal scores
+    that are almost tied are compared exactly)
+    """
 
     check_enough_approved_candidates(profile, committeesize)
+    __check_arithmetic(arithmetic)
 
     if algorithm != "standard":
         raise NotImplementedError(
@@ -472,12 +743,15 @@ def compute_seq_thiele_method(profile, committeesize, scorefct_str,
             print("Computing only one winning committee (resolute=True)\n")
     # end of optional output
 
+    # voters with identical approval sets are merged, see Profile.compressed()
+    compressed = profile.compressed()
+
     if resolute:
         committees = __seq_thiele_resolute(
-            profile, committeesize, scorefct_str, verbose=verbose)
+            compressed, committeesize, scorefct_str, verbose=verbose, arithmetic=arithmetic)
     else:
         committees = __seq_thiele_irresolute(
-            profile, committeesize, scorefct_str)
+            compressed, committeesize, scorefct_str, arithmetic=arithmetic)
 
     # optional output
     if verbose:
@@ -488,15 +762,15 @@ def compute_seq_thiele_method(profile, committeesize, scorefct_str,
                   end="")
         else:
             print(scorefct_str.upper() + "-score of winning committees:")
-        for comm in committees:
-            print(" " + str(scores.thiele_score(scorefct_str, profile, comm)))
+        for score in scores.thiele_scores_batch(scorefct_str, profile, committees):
+            print(" " + str(score))
         print()
     # end of optional output
 
     return committees
 
 
-def __revseq_thiele_irresolute(profile, committeesize, scorefct_str):
+def __revseq_thiele_irresolute(profile, committeesize, scorefct_str, arithmetic="exact"):
     """Compute an *irresolute* sequential Thiele method
 
     Consider all possible ways to break ties between candidates
@@ -505,26 +779,26 @@ def __revseq_thiele_irresolute(profile, committeesize, scorefct_str):
     scorefct = scores.get_scorefct(scorefct_str, committeesize)
 
     allcandcomm = tuple(range(profile.num_cand))
-    comm_scores = {allcandcomm: scores.thiele_score(
-        scorefct_str, profile, allcandcomm)}
+    comm_trackers = {allcandcomm: scores.RemovalCostTracker(
+        scorefct, profile, arithmetic=arithmetic)}
 
     for _ in range(profile.num_cand - committeesize):
-        comm_scores_next = {}
-        for committee, score in comm_scores.items():
-            marg_util_cand = scores.marginal_thiele_scores_remove(
-                scorefct, profile, committee)
-            score_reduction = min(marg_util_cand)
-            # find smallest elements in marg_util_cand and return indices
-            cands_to_remove = [cand for cand in range(profile.num_cand)
-                               if marg_util_cand[cand] == min(marg_util_cand)]
+        comm_trackers_next = {}
+        for committee, tracker in comm_trackers.items():
+            # candidates with the smallest marginal loss
+            _, cands_to_remove = tracker.cheapest()
             for c in cands_to_remove:
-                next_comm = tuple(set(committee) - {c})
-                comm_scores_next[next_comm] = score - score_reduction
-            comm_scores = comm_scores_next
-    return sort_committees(list(comm_scores.keys()))
+                next_comm = tuple(cand for cand in committee if cand != c)
+                if next_comm not in comm_trackers_next:
+                    next_tracker = tracker.copy()
+                    next_tracker.remove(c)
+                    comm_trackers_next[next_comm] = next_tracker
+        comm_trackers = comm_trackers_next
+    return sort_committees(list(comm_trackers.keys()))
 
 
-def __revseq_thiele_resolute(profile, committeesize, scorefct_str, verbose):
+def __revseq_thiele_resolute(profile, committeesize, scorefct_str, verbose,
+                             arithmetic="exact"):
     """Compute a *resolute* reverse sequential Thiele method
 
     Tiebreaking between candidates in favor of candidate with smaller
@@ -543,14 +817,12 @@ def __revseq_thiele_resolute(profile, committeesize, scorefct_str, verbose):
         print(output + "\n")
     # end of optional output
 
+    tracker = scores.RemovalCostTracker(scorefct, profile, arithmetic=arithmetic)
     for _ in range(profile.num_cand - committeesize):
-        marg_util_cand = scores.marginal_thiele_scores_remove(
-            scorefct, profile, committee)
-        score_reduction = min(marg_util_cand)
-        # find smallest elements in marg_util_cand and return indices
-        cands_to_remove = [cand for cand in range(profile.num_cand)
-                           if marg_util_cand[cand] == min(marg_util_cand)]
+        # candidates with the smallest marginal loss
+        score_reduction, cands_to_remove = tracker.cheapest()
         committee.remove(cands_to_remove[-1])
+        tracker.remove(cands_to_remove[-1])
 
         # optional output
         if verbose >= 2:
@@ -574,9 +846,14 @@ def __revseq_thiele_resolute(profile, committeesize, scorefct_str, verbose):
 
 def compute_revseq_thiele_method(profile, committeesize,
                                  scorefct_str, algorithm="standard",
-                                 resolute=True, verbose=0):
-    """Reverse sequential Thiele methods"""
+                                 resolute=True, verbose=0, arithmetic="auto"):
+    """Reverse sequential Thiele methods
+
+    arithmetic is either "exact" (fractions), "float" or "auto" (floats, but marginal scores
+    that are almost tied are compared exactly)
+    """
     check_enough_approved_candidates(profile, committeesize)
+    __check_arithmetic(arithmetic)
 
     if algorithm != "standard":
         raise NotImplementedError(
@@ -590,12 +867,15 @@ def compute_revseq_thiele_method(profile, committeesize,
             print("Computing only one winning committee (resolute=True)\n")
     # end of optional output
 
+    # voters with identical approval sets are merged, see Profile.compressed()
+    compressed = profile.compressed()
+
     if resolute:
         committees = __revseq_thiele_resolute(
-            profile, committeesize, scorefct_str, verbose=verbose)
+            compressed, committeesize, scorefct_str, verbose=verbose, arithmetic=arithmetic)
     else:
         committees = __revseq_thiele_irresolute(
-            profile, committeesize, scorefct_str)
+            compressed, committeesize, scorefct_str, arithmetic=arithmetic)
 
     # optional output
     if verbose:
@@ -606,25 +886,64 @@ def compute_revseq_thiele_method(profile, committeesize,
             print("PAV-score of winning committee:", end="")
         else:
             print("PAV-score of winning committees:")
-        for comm in committees:
-            print(" " + str(scores.thiele_score(scorefct_str, profile, comm)))
+        for score in scores.thiele_scores_batch(scorefct_str, profile, committees):
+            print(" " + str(score))
         print()
     # end of optional output
 
     return committees
 
 
-def __minimaxav_bruteforce(profile, committeesize):
-    """Brute-force algorithm for computing Minimax AV (MAV)"""
+def __committee_chunks(committees, budget=None):
+    """Yields committees in chunks of at most MAV_CHUNKSIZE committees
+
+    Each yielded committee is charged to budget (if given). At least one committee is
+    yielded; afterwards, the enumeration stops if the budget is exhausted. The budget is
+    only marked as stopped if committees are left."""
+    committees = iter(committees)
+    first = True
+    while True:
+        chunksize = MAV_CHUNKSIZE
+        if budget is not None and budget.max_nodes is not None:
+            chunksize = max(1, min(chunksize, budget.remaining_nodes()))
+        chunk = list(islice(committees, chunksize))
+        if not chunk:
+            return
+        if budget is not None:
+            if not first:
+                if budget.remaining_nodes() == 0:
+                    budget.stop("max_nodes")
+                    return
+                if budget.exhausted(0):
+                    return
+            elif len(chunk) > 1 and budget.exhausted(0):
+                # only a single committee is scored
+                committees = chain(chunk[1:], committees)
+                chunk = chunk[:1]
+            budget.charge(len(chunk))
+        first = False
+        yield chunk
+
+
+def __minimaxav_bruteforce(profile, committeesize, cands=None, budget=None):
+    """Brute-force algorithm for computing Minimax AV (MAV),
+    only committees consisting of candidates in cands (default: all) are considered
+
+    Each scored committee is charged to budget (if given); if it is exhausted,
+    the best committees of the chunks scored so far are returned."""
     opt_committees = []
     opt_mavscore = profile.num_cand + 1
-    for comm in combinations(list(range(profile.num_cand)), committeesize):
-        score = scores.mavscore(profile, comm)
-        if score < opt_mavscore:
-            opt_committees = [comm]
-            opt_mavscore = score
-        elif scores.mavscore(profile, comm) == opt_mavscore:
-            opt_committees.append(comm)
+    if cands is None:
+        cands = range(profile.num_cand)
+    all_committees = combinations(list(cands), committeesize)
+    for chunk in __committee_chunks(all_committees, budget):
+        chunk_scores = scores.mavscores_batch(profile, chunk, cutoff=opt_mavscore)
+        for comm, score in zip(chunk, chunk_scores):
+            if score < opt_mavscore:
+                opt_committees = [comm]
+                opt_mavscore = score
+            elif score == opt_mavscore:
+                opt_committees.append(comm)
 
     committees = sort_committees(opt_committees)
 
@@ -633,9 +952,16 @@ def __minimaxav_bruteforce(profile, committeesize):
 
 # Minimax Approval Voting
 def compute_mav(profile, committeesize, algorithm="brute-force",
-                resolute=False, verbose=0):
-    """Minimax AV (MAV)"""
+                resolute=False, verbose=0,
+                time_limit=None, max_nodes=None, cancellation_token=None):
+    """Minimax AV (MAV)
+
+    time_limit, max_nodes (number of committees evaluated by brute-force) and
+    cancellation_token limit the computation; if the computation is stopped, the best
+    committees found so far are returned as `budget.IncompleteResult`
+    """
     check_enough_approved_candidates(profile, committeesize)
+    budget = Budget(time_limit, max_nodes, cancellation_token)
 
     # optional output
     if verbose:
@@ -647,24 +973,35 @@ def compute_mav(profile, committeesize, algorithm="brute-force",
             print("Using the Gurobi ILP solver\n")
         if algorithm == "brute-force":
             print("Using a brute-force algorithm\n")
+        if algorithm == "highs":
+            print("Using the HiGHS MILP solver (via scipy)\n")
     # end of optional output
 
     if algorithm == "gurobi":
         committees = abcrules_gurobi.__gurobi_minimaxav(
-            profile, committeesize, resolute)
+            profile, committeesize, resolute, budget=budget)
+        committees = sort_committees(committees)
+    elif algorithm == "highs":
+        committees = abcrules_scipy.scipy_minimaxav(
+            profile, committeesize, resolute, budget=budget)
         committees = sort_committees(committees)
     elif algorithm == "brute-force":
-        committees = __minimaxav_bruteforce(profile, committeesize)
-        if resolute:
-            committees = [committees[0]]
+        # clones are interchangeable, hence at most committeesize of them have to be considered
+        # (removing candidates from the profile would change Hamming distances)
+        reduction = reduce_candidates(profile, committeesize)
+        committees = __minimaxav_bruteforce(profile, committeesize, cands=reduction.cands,
+                                            budget=budget)
+        committees = reduction.expand(committees, resolute)
     else:
         raise NotImplementedError("Algorithm " + str(algorithm)
                                   + " not specified for compute_mav")
 
-    opt_mavscore = scores.mavscore(profile, committees[0])
-
     # optional output
-    if verbose:
+    if verbose and budget.reason is not None:
+        print("Computation stopped (" + budget.reason + "), the committees found so far "
+              "are not necessarily optimal\n")
+    if verbose and committees:
+        opt_mavscore = scores.mavscore(profile, committees[0])
         print("Minimum maximal distance: " + str(opt_mavscore))
 
         print(str_committees_header(committees, winning=True))
@@ -676,14 +1013,21 @@ def compute_mav(profile, committeesize, algorithm="brute-force",
         print()
     # end of optional output
 
-    return committees
+    return budget.result(committees)
 
 
 # Lexicographic Minimax Approval Voting
 def compute_lexmav(profile, committeesize, algorithm="brute-force",
-                   resolute=False, verbose=0):
-    """Lexicographic Minimax AV"""
+                   resolute=False, verbose=0,
+                   time_limit=None, max_nodes=None, cancellation_token=None):
+    """Lexicographic Minimax AV
+
+    time_limit, max_nodes (number of committees evaluated) and cancellation_token limit
+    the computation; if the computation is stopped, the best committees found so far are
+    returned as `budget.IncompleteResult`
+    """
     check_enough_approved_candidates(profile, committeesize)
+    budget = Budget(time_limit, max_nodes, cancellation_token)
 
     if not profile.has_unit_weights():
         raise ValueError(rules["lexmav"].shortname +
@@ -696,19 +1040,21 @@ def compute_lexmav(profile, committeesize, algorithm="brute-force",
 
     opt_committees = []
     opt_distances = [profile.num_cand + 1] * len(profile)
-    for comm in combinations(list(range(profile.num_cand)), committeesize):
-        distances = sorted([hamming(pref, comm)
-                            for pref in profile],
-                           reverse=True)
-        for i in range(len(distances)):
-            if opt_distances[i] < distances[i]:
-                break
-            if opt_distances[i] > distances[i]:
+    all_committees = combinations(list(range(profile.num_cand)), committeesize)
+    for chunk in __committee_chunks(all_committees, budget):
+        # only committees with an optimal MAV score (so far) can be lexicographically optimal
+        opt_mavscore = opt_distances[0]
+        chunk_scores = scores.mavscores_batch(profile, chunk, cutoff=opt_mavscore)
+        chunk = [comm for comm, score in zip(chunk, chunk_scores) if score <= opt_mavscore]
+        if not chunk:
+            continue
+        for comm, distances in zip(chunk, scores.hamming_distances_batch(profile, chunk)):
+            distances = sorted(distances.tolist(), reverse=True)
+            if distances < opt_distances:
                 opt_distances = distances
                 opt_committees = [comm]
-                break
-        else:
-            opt_committees.append(comm)
+            elif distances == opt_distances:
+                opt_committees.append(comm)
 
     committees = sort_committees(opt_committees)
     if resolute:
@@ -719,6 +1065,9 @@ def compute_lexmav(profile, committeesize, algorithm="brute-force",
         print(header(rules["lexmav"].longname))
         if resolute:
             print("Computing only one winning committee (resolute=True)\n")
+        if budget.reason is not None:
+            print("Computation stopped (" + budget.reason + "), the committees found so "
+                  "far are not necessarily optimal\n")
 
         print("Minimum maximal distance: " + str(max(opt_distances)))
 
@@ -731,40 +1080,56 @@ def compute_lexmav(profile, committeesize, algorithm="brute-force",
         print()
     # end of optional output
 
-    return committees
+    return budget.result(committees)
 
 
 # Proportional Approval Voting
 def compute_pav(profile, committeesize, algorithm="branch-and-bound",
-                resolute=False, verbose=0):
+                resolute=False, verbose=0, arithmetic="auto", workers=1,
+                time_limit=None, max_nodes=None, cancellation_token=None):
     """Proportional Approval Voting (PAV)"""
     return compute_thiele_method(
         'pav', profile, committeesize, algorithm=algorithm,
-        resolute=resolute, verbose=verbose)
+        resolute=resolute, verbose=verbose, arithmetic=arithmetic,
+        workers=workers, time_limit=time_limit, max_nodes=max_nodes,
+        cancellation_token=cancellation_token)
 
 
 # Sainte-Lague Approval Voting
 def compute_slav(profile, committeesize, algorithm="branch-and-bound",
-                 resolute=False, verbose=0):
+                 resolute=False, verbose=0, arithmetic="auto", workers=1,
+                 time_limit=None, max_nodes=None, cancellation_token=None):
     """Sainte-Lague Approval Voting (SLAV)"""
     return compute_thiele_method(
         'slav', profile, committeesize, algorithm=algorithm,
-        resolute=resolute, verbose=verbose)
+        resolute=resolute, verbose=verbose, arithmetic=arithmetic,
+        workers=workers, time_limit=time_limit, max_nodes=max_nodes,
+        cancellation_token=cancellation_token)
 
 
 # Chamberlin-Courant
 def compute_cc(profile, committeesize, algorithm="branch-and-bound",
-               resolute=False, verbose=0):
+               resolute=False, verbose=0, arithmetic="auto", workers=1,
+               time_limit=None, max_nodes=None, cancellation_token=None):
     """Approval Chamberlin-Courant (CC)"""
     return compute_thiele_method(
         'cc', profile, committeesize, algorithm=algorithm,
-        resolute=resolute, verbose=verbose)
+        resolute=resolute, verbose=verbose, arithmetic=arithmetic,
+        workers=workers, time_limit=time_limit, max_nodes=max_nodes,
+        cancellation_token=cancellation_token)
 
 
 def compute_monroe(profile, committeesize, algorithm="brute-force",
-                   resolute=False, verbose=0):
-    """Monroe's rule"""
+                   resolute=False, verbose=0,
+                   time_limit=None, max_nodes=None, cancellation_token=None):
+    """Monroe's rule
+
+    time_limit, max_nodes (number of committees evaluated by brute-force) and
+    cancellation_token limit the computation; if the computation is stopped, the best
+    committees found so far are returned as `budget.IncompleteResult`
+    """
     check_enough_approved_candidates(profile, committeesize)
+    budget = Budget(time_limit, max_nodes, cancellation_token)
 
     # optional output
     if verbose:
@@ -776,26 +1141,38 @@ def compute_monroe(profile, committeesize, algorithm="brute-force",
             print("Using the Gurobi ILP solver\n")
         if algorithm == "brute-force":
             print("Using a brute-force algorithm\n")
+        if algorithm == "highs":
+            print("Using the HiGHS MILP solver (via scipy)\n")
     # end of optional output
 
     if not profile.has_unit_weights():
         raise ValueError(rules["monroe"].shortname +
                          " is only defined for unit weights (weight=1)")
 
+    # clones are interchangeable, hence at most committeesize of them have to be considered
+    reduction = reduce_candidates(profile, committeesize)
+
     if algorithm == "gurobi":
         committees = abcrules_gurobi.__gurobi_monroe(
-            profile, committeesize, resolute)
+            reduction.profile, committeesize, resolute, budget=budget)
         committees = sort_committees(committees)
+    elif algorithm == "highs":
+        committees = abcrules_scipy.scipy_monroe(
+            reduction.profile, committeesize, resolute, budget=budget)
     elif algorithm == "brute-force":
         committees = __monroe_bruteforce(
-            profile, committeesize, resolute)
+            reduction.profile, committeesize, resolute, budget=budget)
     else:
         raise NotImplementedError(
             "Algorithm " + str(algorithm)
             + " not specified for compute_monroe")
+    committees = reduction.expand(reduction.original(committees), resolute)
 
     # optional output
-    if verbose:
+    if verbose and budget.reason is not None:
+        print("Computation stopped (" + budget.reason + "), the committees found so far "
+              "are not necessarily optimal\n")
+    if verbose and committees:
         print("Optimal Monroe score: "
               + str(scores.monroescore(profile, committees[0])) + "\n")
 
@@ -803,20 +1180,27 @@ def compute_monroe(profile, committeesize, algorithm="brute-force",
         print(str_candsets(committees, cand_names=profile.cand_names))
     # end of optional output
 
-    return committees
+    return budget.result(committees)
 
 
 # Monroe's rule, computed via (brute-force) matching
-def __monroe_bruteforce(profile, committeesize, resolute):
-    """Brute-force computation of Monroe's rule"""
+def __monroe_bruteforce(profile, committeesize, resolute, budget=None):
+    """Brute-force computation of Monroe's rule
+
+    Each scored committee is charged to budget (if given); if it is exhausted,
+    the best committees scored so far are returned."""
     opt_committees = []
     opt_monroescore = -1
+    # consecutive committees differ in few members, the engine starts from the last assignment
+    engine = scores.MonroeScoreEngine(profile.compressed())
     for comm in combinations(list(range(profile.num_cand)), committeesize):
-        score = scores.monroescore(profile, comm)
+        if budget is not None and budget.exhausted() and opt_committees:
+            break
+        score = engine.score(comm)
         if score > opt_monroescore:
             opt_committees = [comm]
             opt_monroescore = score
-        elif scores.monroescore(profile, comm) == opt_monroescore:
+        elif score == opt_monroescore:
             opt_committees.append(comm)
 
     committees = sort_committees(opt_committees)
@@ -854,9 +1238,10 @@ def compute_greedy_monroe(profile, committeesize,
     for t in range(committeesize):
         maxapprovals = -1
         selected = None
+        remaining = set(remaining_voters)
         for c in remaining_cands:
-            approvals = len([i for i in remaining_voters
-                             if c in profile[i]])
+            approvals = len([i for i in profile.approvers(c)
+                             if i in remaining])
             if approvals > maxapprovals:
                 maxapprovals = approvals
                 selected = c
@@ -869,13 +1254,14 @@ def compute_greedy_monroe(profile, committeesize,
 
         # only voters that approve the chosen candidate
         # are removed
-        to_remove = [i for i in remaining_voters
-                     if selected in profile[i]]
+        to_remove = [i for i in profile.approvers(selected)
+                     if i in remaining]
         if len(to_remove) > num_remove:
             to_remove = to_remove[:num_remove]
         assignment.append((selected, to_remove))
+        remaining.difference_update(to_remove)
         remaining_voters = [i for i in remaining_voters
-                            if i not in to_remove]
+                            if i in remaining]
         committee.append(selected)
         remaining_cands.remove(selected)
 
@@ -933,28 +1319,52 @@ def compute_greedy_monroe(profile, committeesize,
     return committees
 
 
-def __seqphragmen_resolute(profile, committeesize, division, verbose=0, start_load=None, partial_committee=None):
+def __check_arithmetic(arithmetic):
+    if arithmetic not in scores.ARITHMETICS:
+        raise ValueError("arithmetic must be one of " + str(scores.ARITHMETICS))
+
+
+def __str_loads(profile, load):
+    """Format the loads of all voters, loads of merged voters in a compressed profile are
+    repeated for each original voter"""
+    if profile.original_voters is None:
+        voter_loads = [load[v] for v, _ in enumerate(profile)]
+    else:
+        voter_loads = [None] * sum(len(voters) for voters in profile.original_voters)
+        for v, voters in enumerate(profile.original_voters):
+            for orig_v in voters:
+                voter_loads[orig_v] = load[v]
+    return "(" + ", ".join(str(x) for x in voter_loads) + ")"
+
+
+def __numeric_backend(algorithm, function_name):
+    """numeric backend for the algorithms "standard" (floats) and "exact-fractions" """
+    if algorithm == "standard":
+        return numeric.get_backend("float")
+    elif algorithm == "exact-fractions":
+        return numeric.get_backend("exact")
+    raise NotImplementedError("Algorithm " + str(algorithm) + " not specified for " + function_name)
+
+
+def __seqphragmen_resolute(profile, committeesize, backend, verbose=0, start_load=None, partial_committee=None):
     """Algorithm for computing resolute seq-Phragmen  (1 winning committee)"""
 
-    approvers_weight = {}
-    for c in range(profile.num_cand):
-        approvers_weight[c] = sum(pref.weight for pref in profile if c in pref)
+    weights = profile.weight_vector().tolist()
+    approvers_weight = [profile.approvers_weight(c) for c in range(profile.num_cand)]
 
-    load = start_load
-    if load is None:
-        load = {v: 0 for v, _ in enumerate(profile)}
+    if start_load is None:
+        load = [0] * len(profile)
+    else:
+        load = list(start_load)
 
     committee = partial_committee
     if partial_committee is None:
         committee = []  # build committees starting with the empty set
 
     for _ in range(len(committee), committeesize):
-        approvers_load = {}
-        for c in range(profile.num_cand):
-            approvers_load[c] = sum(pref.weight * load[v]
-                                    for v, pref in enumerate(profile)
-                                    if c in pref)
-        new_maxload = [division(approvers_load[c] + 1, approvers_weight[c])
+        approvers_load = profile.sum_over_approvers(
+            [weight * voter_load for weight, voter_load in zip(weights, load)])
+        new_maxload = [backend.div(approvers_load[c] + 1, approvers_weight[c])
                        if approvers_weight[c] > 0 else committeesize + 1
                        for c in range(profile.num_cand)]
         # exclude committees already in the committee
@@ -966,11 +1376,8 @@ def __seqphragmen_resolute(profile, committeesize, division, verbose=0, start_lo
         opt = min(new_maxload)
         next_cand = new_maxload.index(opt)
         # compute new loads and add new candidate
-        for v, pref in enumerate(profile):
-            if next_cand in pref:
-                load[v] = new_maxload[next_cand]
-            else:
-                load[v] = load[v]
+        for v in profile.approvers(next_cand):
+            load[v] = new_maxload[next_cand]
         committee = sorted(committee + [next_cand])
 
         # optional output
@@ -982,10 +1389,7 @@ def __seqphragmen_resolute(profile, committeesize, division, verbose=0, start_lo
             output += str(opt)
             print(output)
             print(" load distribution:")
-            output = "  ("
-            for v, _ in enumerate(profile):
-                output += str(load[v]) + ", "
-            print(output[:-2] + ")")
+            print("  " + __str_loads(profile, load))
             tied_cands = [c for c in range(profile.num_cand)
                           if (c > next_cand and
                               (new_maxload[c] == new_maxload))]
@@ -1003,16 +1407,16 @@ def __seqphragmen_resolute(profile, committeesize, division, verbose=0, start_lo
 
 
 def __seqphragmen_irresolute(profile, committeesize,
-                             division, start_load=None, partial_committee=None):
+                             backend, start_load=None, partial_committee=None):
     """Algorithm for computing irresolute seq-Phragmen (>=1 winning committees)
     """
-    approvers_weight = {}
-    for c in range(profile.num_cand):
-        approvers_weight[c] = sum(pref.weight for pref in profile if c in pref)
+    weights = profile.weight_vector().tolist()
+    approvers_weight = [profile.approvers_weight(c) for c in range(profile.num_cand)]
 
-    load = start_load
-    if load is None:
-        load = {v: 0 for v, _ in enumerate(profile)}
+    if start_load is None:
+        load = [0] * len(profile)
+    else:
+        load = list(start_load)
 
     if partial_committee is None:
         partial_committee = []  # build committees starting with the empty set
@@ -1021,13 +1425,10 @@ def __seqphragmen_irresolute(profile, committeesize,
     for _ in range(len(partial_committee), committeesize):
         comm_loads_next = {}
         for committee, load in comm_loads.items():
-            approvers_load = {}
-            for c in range(profile.num_cand):
-                approvers_load[c] = sum(pref.weight * load[v]
-                                        for v, pref in enumerate(profile)
-                                        if c in pref)
+            approvers_load = profile.sum_over_approvers(
+                [weight * voter_load for weight, voter_load in zip(weights, load)])
             new_maxload = [
-                division(approvers_load[c] + 1, approvers_weight[c])
+                backend.div(approvers_load[c] + 1, approvers_weight[c])
                 if approvers_weight[c] > 0 else committeesize + 1
                 for c in range(profile.num_cand)]
             # exclude committees already in the committee
@@ -1038,12 +1439,9 @@ def __seqphragmen_irresolute(profile, committeesize,
             # and add new committees
             for c in range(profile.num_cand):
                 if new_maxload[c] <= min(new_maxload):
-                    new_load = {}
-                    for v, pref in enumerate(profile):
-                        if c in pref:
-                            new_load[v] = new_maxload[c]
-                        else:
-                            new_load[v] = load[v]
+                    new_load = list(load)
+                    for v in profile.approvers(c):
+                        new_load[v] = new_maxload[c]
                     new_comm = tuple(sorted(committee + (c,)))
                     comm_loads_next[new_comm] = new_load
         comm_loads = comm_loads_next
@@ -1057,12 +1455,7 @@ def compute_seqphragmen(profile, committeesize, algorithm="standard",
     """Phragmen's sequential rule (seq-Phragmen)"""
     check_enough_approved_candidates(profile, committeesize)
 
-    if algorithm == "standard":
-        division = lambda x, y: x / y  # standard float division
-    elif algorithm == "exact-fractions":
-        division = Fraction  # using exact fractions
-    else:
-        raise NotImplementedError("Algorithm " + str(algorithm) + " not specified for compute_seqphragmen")
+    backend = __numeric_backend(algorithm, "compute_seqphragmen")
 
     # optional output
     if verbose:
@@ -1071,10 +1464,14 @@ def compute_seqphragmen(profile, committeesize, algorithm="standard",
             print("Computing only one winning committee (resolute=True)\n")
     # end of optional output
 
+    # voters with identical approval sets are merged (see Profile.compressed()),
+    # their loads are always identical
+    compressed = profile.compressed()
+
     if resolute:
-        committees, comm_loads = __seqphragmen_resolute(profile, committeesize, division, verbose=verbose)
+        committees, comm_loads = __seqphragmen_resolute(compressed, committeesize, backend, verbose=verbose)
     else:
-        committees, comm_loads = __seqphragmen_irresolute(profile, committeesize, division)
+        committees, comm_loads = __seqphragmen_irresolute(compressed, committeesize, backend)
 
     # optional output
     if verbose:
@@ -1086,23 +1483,19 @@ def compute_seqphragmen(profile, committeesize, algorithm="standard",
         else:
             print("corresponding load distributions:")
         for comm in committees:
-            output = "("
-            for v, _ in enumerate(profile):
-                output += str(comm_loads[tuple(comm)][v]) + ", "
-            print(output[:-2] + ")")
+            print(__str_loads(compressed, comm_loads[tuple(comm)]))
     # end of optional output
 
     return committees
 
 
-def __rule_x_get_min_q(profile, budget, cand, division):
-    rich = set([v for v, pref in enumerate(profile)
-                if cand in pref])
+def __rule_x_get_min_q(profile, budget, cand, backend):
+    rich = set(profile.approvers(cand))
     poor = set()
 
     while len(rich) > 0:
         poor_budget = sum(budget[v] for v in poor)
-        q = division(1 - poor_budget, len(rich))
+        q = backend.div(1 - poor_budget, len(rich))
         new_poor = set([v for v in rich
                         if budget[v] < q])
         if len(new_poor) == 0:
@@ -1128,12 +1521,7 @@ def compute_rule_x(profile, committeesize, algorithm="standard",
         raise ValueError(rules["rule-x"].shortname +
                          " is only defined for unit weights (weight=1)")
 
-    if algorithm == "standard":
-        division = lambda x, y: x / y  # standard float division
-    elif algorithm == "exact-fractions":
-        division = Fraction  # using exact fractions
-    else:
-        raise NotImplementedError("Algorithm " + str(algorithm) + " not specified for compute_rule_x")
+    backend = __numeric_backend(algorithm, "compute_rule_x")
 
     # optional output
     if verbose:
@@ -1142,7 +1530,7 @@ def compute_rule_x(profile, committeesize, algorithm="standard",
             print("Computing only one winning committee (resolute=True)\n")
     # end of optional output
 
-    start_budget = {v: division(committeesize, len(profile))
+    start_budget = {v: backend.div(committeesize, len(profile))
                     for v, _ in enumerate(profile)}
     cands = range(profile.num_cand)
     commbugdets = [(set(), start_budget)]
@@ -1165,7 +1553,7 @@ def compute_rule_x(profile, committeesize, algorithm="standard",
             curr_cands = set(cands) - committee
             min_q = {}
             for c in curr_cands:
-                q = __rule_x_get_min_q(profile, budget, c, division)
+                q = __rule_x_get_min_q(profile, budget, c, backend)
                 if q is not None:
                     min_q[c] = q
 
@@ -1174,9 +1562,8 @@ def compute_rule_x(profile, committeesize, algorithm="standard",
                               if min_q[c] == min(min_q.values())]
                 for next_cand in next_cands:
                     new_budget = dict(budget)
-                    for v, pref in enumerate(profile):
-                        if next_cand in pref:
-                            new_budget[v] -= min(budget[v], min_q[next_cand])
+                    for v in profile.approvers(next_cand):
+                        new_budget[v] -= min(budget[v], min_q[next_cand])
                     new_comm = set(committee)
                     new_comm.add(next_cand)
                     next_commbudgets.append((new_comm, new_budget))
@@ -1218,11 +1605,9 @@ def compute_rule_x(profile, committeesize, algorithm="standard",
                         print("Phase 2 (seq-Phragmén):\n")
                     # end of optional output
 
-                    start_load = {}
                     # translate budget to loads
-                    for v in range(len(profile)):
-                        start_load[v] = (division(committeesize, len(profile))
-                                         - budget[v])
+                    start_load = [backend.div(committeesize, len(profile)) - budget[v]
+                                  for v in range(len(profile))]
 
                     # optional output
                     if resolute and verbose >= 2:
@@ -1235,12 +1620,12 @@ def compute_rule_x(profile, committeesize, algorithm="standard",
 
                     if resolute:
                         committees, _ = __seqphragmen_resolute(
-                            profile, committeesize, division, verbose=verbose,
+                            profile, committeesize, backend, verbose=verbose,
                             partial_committee=list(committee),
                             start_load=start_load)
                     else:
                         committees, _ = __seqphragmen_irresolute(
-                            profile, committeesize, division,
+                            profile, committeesize, backend,
                             partial_committee=list(committee),
                             start_load=start_load)
                     final_committees.update([tuple(comm) for comm in committees])
@@ -1273,7 +1658,8 @@ def compute_rule_x_without_2nd_phase(
 
 
 def compute_optphragmen(profile, committeesize,
-                        algorithm="gurobi", resolute=False, verbose=0):
+                        algorithm="gurobi", resolute=False, verbose=0,
+                        time_limit=None, max_nodes=None, cancellation_token=None):
     """opt-Phragmen
 
     Warning: does not include the lexicographic optimization as specified
@@ -1283,8 +1669,13 @@ def compute_optphragmen(profile, committeesize,
 
     Instead: minimizes the maximum load (without consideration of the
              second-, third-, ...-largest load
+
+    time_limit, max_nodes (Gurobi's branch-and-bound nodes) and cancellation_token limit
+    the computation; if the computation is stopped, the best committees found so far are
+    returned as `budget.IncompleteResult`
     """
     check_enough_approved_candidates(profile, committeesize)
+    budget = Budget(time_limit, max_nodes, cancellation_token)
 
     # optional output
     if verbose:
@@ -1294,23 +1685,33 @@ def compute_optphragmen(profile, committeesize,
     if verbose >= 3:
         if algorithm == "gurobi":
             print("Using the Gurobi ILP solver")
+        if algorithm == "highs":
+            print("Using the HiGHS MILP solver (via scipy)")
     # end of optional output
 
-    if algorithm != "gurobi":
+    # voters with identical approval sets are merged, see Profile.compressed()
+    if algorithm == "gurobi":
+        committees = abcrules_gurobi.__gurobi_optphragmen(
+            profile.compressed(), committeesize, resolute=resolute, verbose=verbose,
+            budget=budget)
+    elif algorithm == "highs":
+        committees = abcrules_scipy.scipy_optphragmen(
+            profile.compressed(), committeesize, resolute=resolute, budget=budget)
+    else:
         raise NotImplementedError("Algorithm " + str(algorithm)
                                   + " not specified for compute_optphragmen")
-
-    committees = abcrules_gurobi.__gurobi_optphragmen(
-        profile, committeesize, resolute=resolute, verbose=verbose)
     committees = sort_committees(committees)
 
     # optional output
     if verbose:
+        if budget.reason is not None:
+            print("Computation stopped (" + budget.reason + "), the committees found so "
+                  "far are not necessarily optimal\n")
         print(str_committees_header(committees, winning=True))
         print(str_candsets(committees, cand_names=profile.cand_names))
     # end of optional output
 
-    return committees
+    return budget.result(committees)
 
 
 def compute_phragmen_enestroem(profile, committeesize, algorithm="standard",
@@ -1327,17 +1728,12 @@ def compute_phragmen_enestroem(profile, committeesize, algorithm="standard",
         raise ValueError(rules["phrag-enestr"].shortname +
                          " is only defined for unit weights (weight=1)")
 
-    if algorithm == "standard":
-        division = lambda x, y: x / y  # standard float division
-    elif algorithm == "exact-fractions":
-        division = Fraction  # using exact fractions
-    else:
-        raise NotImplementedError("Algorithm " + str(algorithm) + " not specified for compute_phragmen_enestroem")
+    backend = __numeric_backend(algorithm, "compute_phragmen_enestroem")
 
     num_voters = len(profile)
 
     start_budget = {i: profile[i].weight for i in range(num_voters)}
-    price = division(sum(start_budget.values()), committeesize)
+    price = backend.div(sum(start_budget.values()), committeesize)
 
     cands = range(profile.num_cand)
 
@@ -1366,7 +1762,7 @@ def compute_phragmen_enestroem(profile, committeesize, algorithm="standard",
                 b = dict(budget)  # copy of budget
                 if max_support > price:  # supporters can afford it
                     # (voting_power - price) / voting_power
-                    multiplier = division(max_support - price, max_support)
+                    multiplier = backend.div(max_support - price, max_support)
                 else:  # set supporters to 0
                     multiplier = 0
                 for nr, pref in enumerate(profile):
@@ -1404,12 +1800,7 @@ def compute_consensus_rule(profile, committeesize, algorithm="standard",
     """
     check_enough_approved_candidates(profile, committeesize)
 
-    if algorithm == "standard":
-        division = lambda x, y: x / y  # standard float division
-    elif algorithm == "exact-fractions":
-        division = Fraction  # using exact fractions
-    else:
-        raise NotImplementedError("Algorithm " + str(algorithm) + " not specified for compute_consensus_rule")
+    backend = __numeric_backend(algorithm, "compute_consensus_rule")
 
 
     num_voters = len(profile)
@@ -1439,7 +1830,7 @@ def compute_consensus_rule(profile, committeesize, algorithm="standard",
             for cand in winners:
                 b = dict(budget)  # copy of budget
                 for i in supporters[cand]:
-                    b[i] -= division(num_voters, len(supporters[cand]))
+                    b[i] -= backend.div(num_voters, len(supporters[cand]))
                 c = comm.union([cand])  # new committee with candidate
                 next_committees.append((b, c))
 
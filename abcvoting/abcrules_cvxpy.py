@@ -17,15 +17,34 @@ try:
 except ImportError:
     numpy_available = False
 
+try:
+    from scipy import sparse
+except ImportError:
+    # scipy is a dependency of cvxpy
+    cvxpy_available = False
+
+
+from abcvoting import scores
+
 
 CVXPY_ACCURACY = 1e-7
 
+# initial number of rows of the parameter that holds the no-good cuts (excluding committees
+# that have already been found); the problem is rebuilt with twice as many rows if necessary
+CVXPY_NUM_CUTS = 16
+
 
 def cvxpy_thiele_methods(profile, committeesize, scorefct_str, resolute, algorithm):
     """Compute thiele method using CVXPY. This is similar to `__gurobi_thiele_methods()`,
     where `gurobipy` is used as interface to Gurobi. This method supports Gurobi too, but also
     other solvers.
 
+    The constraints are expressed via the sparse approval matrix of the profile (voters x
+    candidates). The problem is built only once: committees that have already been found
+    are excluded by no-good cuts, which are stored in a parameter (a matrix whose rows are
+    incidence vectors of committees, unused rows are zero). Hence, the problem is
+    canonicalized only once (or whenever the parameter has to be enlarged).
+
     Parameters
     ----------
     profile : abcvoting.preferences.Profile
@@ -33,7 +52,8 @@ def cvxpy_thiele_methods(profile, committeesize, scorefct_str, resolute, algorit
     committeesize : int
         number of chosen alternatives
     scorefct_str : str
-        must be one of: 'pav'
+        a score function supported by `scores.get_scorefct()` with monotonic decreasing
+        marginal scores, e.g., 'pav', 'slav', 'cc' or 'geom2'
     resolute : bool
         return only one result
     algorithm : str
@@ -56,61 +76,38 @@ def cvxpy_thiele_methods(profile, committeesize, scorefct_str, resolute, algorit
     else:
         raise ValueError(f"Unknown algorithm for usage with CVXPY: {algorithm}")
 
-    committees = []
-    maxscore = None
-
-    # TODO should we use functions for abcvoting.scores? Does it make it slower?
-    if scorefct_str == 'pav':
-        scorefct_value = np.tile(
-            1 / np.arange(1, committeesize + 1),
-            (len(profile), 1)
-        )
-    elif scorefct_str == 'av':
-        raise ValueError("scorefct must be monotonic decreasing")
-    else:
+    try:
+        scorefct = scores.get_scorefct(scorefct_str, committeesize)
+    except Exception:
         raise NotImplementedError(f"invalid scorefct_str: {scorefct_str}")
+    score_values = scorefct.marginal[1:committeesize + 1]
+    if not all(first > second or first == second == 0
+               for first, second in zip(score_values, score_values[1:])):
+        raise ValueError("scorefct must be monotonic decreasing")
 
-    # TODO does this make things slower in case of weights == 1 to multiply weights? We could
-    #  skip it then of course...
-    weights1d = np.array([pref.weight for pref in profile])
-    # for some reason CVXPY doesn't like the broadcasting, so we need a 2d array
-    weights = np.tile(weights1d[np.newaxis].T, (1, committeesize))
-
-    while True:
-        in_committee = cp.Variable(profile.num_cand, boolean=True)
-
-        # utility[i, j] indicates whether voter i approves at least j candidates in the
-        # committee, i.e. in row i the first l values are true if i approves l candidates in the
-        # committee and all other values are false.
-        # explicitly setting boolean=True is not necessary, can be skipped and is then implicit
-        # also true as done in abcrules_gurobi.__gurobi_thiele_methods()
-        utility = cp.Variable((len(profile), committeesize), boolean=True)
-
-        # left-hand-side and right-hand-side of the equality constraints:
-        lhs = cp.sum(utility, axis=1)
-        rhs = cp.hstack([cp.sum([in_committee[c] for c in pref]) for pref in profile])
-
-        constraints = [cp.sum(in_committee) == committeesize,
-                       lhs == rhs]
-
-        if algorithm == 'glpk_mi':
-            # weird workaround necessary... :(
-            # see https://github.com/cvxgrp/cvxpy/issues/1112#issuecomment-730360543
-            constraints = [cp.sum(in_committee) <= committeesize,
-                           cp.sum(in_committee) >= committeesize,
-                           lhs <= rhs,
-                           lhs >= rhs]
-
-        # find a new committee that has not been found yet by excluding previously found committees
-        for committee in committees:
-            constraints.append(cp.sum(in_committee[committee]) <= committeesize - 1)
+    # coefficients[i, j]: weight of voter i times the marginal score of the (j+1)-th
+    # approved candidate in the committee
+    weights = np.array([float(weight) for weight in profile.weight_vector().tolist()])
+    coefficients = np.outer(weights, scorefct.marginal_float[1:committeesize + 1])
 
-        # I don't really understand why, but the * does not seem to be supported here...
-        score = cp.sum(cp.multiply(cp.multiply(scorefct_value, weights), utility))
+    # approval[i, c] == 1 if voter i approves candidate c
+    indices, indptr = profile.csr()
+    approval = sparse.csr_matrix((np.ones(len(indices)), indices, indptr),
+                                 shape=(len(profile), profile.num_cand))
 
-        objective = cp.Maximize(score)
+    committees = []
+    maxscore = None
+    problem = None
 
-        problem = cp.Problem(objective, constraints)
+    while True:
+        if problem is None or len(committees) == excluded.shape[0]:
+            num_cuts = CVXPY_NUM_CUTS if problem is None else 2 * excluded.shape[0]
+            problem, in_committee, excluded = __cvxpy_thiele_problem(
+                coefficients, approval, committeesize, num_cuts, algorithm)
+        excluded_value = np.zeros(excluded.shape)
+        for i, committee in enumerate(committees):
+            excluded_value[i, committee] = 1
+        excluded.value = excluded_value
 
         cvxpy_workaround_infisible = False
         try:
@@ -138,7 +135,7 @@ def cvxpy_thiele_methods(profile, committeesize, scorefct_str, resolute, algorit
             # no longer optimal
             break
 
-        committee = np.arange(profile.num_cand)[in_committee.value.astype(np.bool)]
+        committee = np.arange(profile.num_cand)[in_committee.value > 0.5]
 
         committees.append(committee.tolist())
 
@@ -146,3 +143,42 @@ def cvxpy_thiele_methods(profile, committeesize, scorefct_str, resolute, algorit
             break
 
     return committees
+
+
+def __cvxpy_thiele_problem(coefficients, approval, committeesize, num_cuts, algorithm):
+    """Returns the ILP of `cvxpy_thiele_methods` with a parameter for num_cuts no-good cuts,
+    together with the variable in_committee and this parameter."""
+    num_voters, num_cand = approval.shape
+    in_committee = cp.Variable(num_cand, boolean=True)
+
+    # utility[i, j] indicates whether voter i approves at least j+1 candidates in the
+    # committee, i.e. in row i the first l values are true if i approves l candidates in the
+    # committee and all other values are false.
+    # explicitly setting boolean=True is not necessary, can be skipped and is then implicit
+    # also true as done in abcrules_gurobi.__gurobi_thiele_methods()
+    utility = cp.Variable((num_voters, committeesize), boolean=True)
+
+    # left-hand-side and right-hand-side of the equality constraints:
+    lhs = cp.sum(utility, axis=1)
+    rhs = approval @ in_committee
+
+    constraints = [cp.sum(in_committee) == committeesize,
+                   lhs == rhs]
+
+    if algorithm == 'glpk_mi':
+        # weird workaround necessary... :(
+        # see https://github.com/cvxgrp/cvxpy/issues/1112#issuecomment-730360543
+        constraints = [cp.sum(in_committee) <= committeesize,
+                       cp.sum(in_committee) >= committeesize,
+                       lhs <= rhs,
+                       lhs >= rhs]
+
+    # find a new committee that has not been found yet by excluding previously found
+    # committees (rows of zeros do not exclude anything)
+    excluded = cp.Parameter((num_cuts, num_cand))
+    constraints.append(excluded @ in_committee <= committeesize - 1)
+
+    score = cp.sum(cp.multiply(coefficients, utility))
+
+    problem = cp.Problem(cp.Maximize(score), constraints)
+    return problem, in_committee, excluded
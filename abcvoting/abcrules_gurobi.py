@@ -12,16 +12,31 @@ except ImportError:
 
 GUROBI_ACCURACY = 1e-9
 
+# Gurobi status codes that indicate that the optimization was stopped by a budget
+GUROBI_STOPPED = {8: "max_nodes", 9: "time_limit", 11: "cancelled"}
+
+# How all optimal committees are enumerated (if resolute=False):
+# "pool": one model is optimized repeatedly; in each round, all optimal committees in Gurobi's
+#     solution pool are collected and excluded via no-good cuts (usually, all optimal
+#     committees are found by the first optimization and the second one only confirms this)
+# "incremental": one model, in each round one optimal committee is found and excluded
+# "rebuild": a new model is built in each round (slow, for comparison)
+GUROBI_ENUMERATION = "pool"
+
+# maximum number of solutions kept in Gurobi's solution pool
+GUROBI_POOL_SOLUTIONS = 1000
+
 
 def _optimize_rule_gurobi(set_opt_model_func, profile, committeesize, scorefct,
-                          resolute, verbose=False):
+                          resolute, verbose=False, budget=None):
     """Compute rules, which are given in the form of an optimization problem, using Gurobi.
 
     Parameters
     ----------
     set_opt_model_func : callable
         sets constraints and objective and adds additional variables, see examples below for its
-        signature
+        signature; committees that have already been found are excluded by
+        `_optimize_rule_gurobi` (see GUROBI_ENUMERATION)
     profile : abcvoting.preferences.Profile
         approval sets of voters
     committeesize : int
@@ -29,6 +44,10 @@ def _optimize_rule_gurobi(set_opt_model_func, profile, committeesize, scorefct,
     scorefct : callable
     resolute : bool
     verbose : bool
+    budget : abcvoting.budget.Budget, optional
+        limits the computation: the remaining time and nodes are passed to Gurobi as
+        TimeLimit and NodeLimit, and the cancellation token is checked in a callback; if the
+        budget is exhausted, the committees found so far are returned and budget.reason is set
 
     Returns
     -------
@@ -37,14 +56,20 @@ def _optimize_rule_gurobi(set_opt_model_func, profile, committeesize, scorefct,
         `0` to `num_cand`, profile.cand_names is ignored
 
     """
+    if GUROBI_ENUMERATION not in ("pool", "incremental", "rebuild"):
+        raise ValueError("Unknown value of GUROBI_ENUMERATION: " + str(GUROBI_ENUMERATION))
+    use_pool = GUROBI_ENUMERATION == "pool" and not resolute
 
     cands = list(range(profile.num_cand))
     maxscore = None
     committees = []
 
-    # TODO add a max iterations parameter with fancy default value which works in almost all
-    #  cases to avoid endless hanging computations, e.g. when CI runs the tests
-    while True:
+    def callback(model, where):
+        # cooperative cancellation
+        if where == gb.GRB.Callback.MIP and budget.cancellation_token.cancelled:
+            model.terminate()
+
+    def build_model():
         m = gb.Model()
 
         # a binary variable indicating whether c is in the committee
@@ -52,15 +77,55 @@ def _optimize_rule_gurobi(set_opt_model_func, profile, committeesize, scorefct,
                                  vtype=gb.GRB.BINARY,
                                  name="in_committee")
 
-        set_opt_model_func(m, profile, in_committee, committeesize, committees, cands, scorefct)
+        set_opt_model_func(m, profile, in_committee, committeesize, cands, scorefct)
 
         m.setParam('OutputFlag', False)
         m.setParam('FeasibilityTol', GUROBI_ACCURACY)
-        m.setParam('PoolSearchMode', 0)
-
-        m.optimize()
+        if use_pool:
+            # search for all optimal solutions
+            m.setParam('PoolSearchMode', 2)
+            m.setParam('PoolGap', 0)
+            m.setParam('PoolSolutions', GUROBI_POOL_SOLUTIONS)
+        else:
+            m.setParam('PoolSearchMode', 0)
+        return m, in_committee
+
+    def exclude(m, in_committee, committee):
+        # no-good cut: find a new committee that has not been found yet
+        m.addConstr(
+            gb.quicksum(in_committee[c] for c in committee) <= committeesize - 1)
+
+    m = None
+    while True:
+        if budget is not None and budget.exhausted(0) and committees:
+            break
 
-        if m.Status not in [2, 3, 4]:
+        if m is None or GUROBI_ENUMERATION == "rebuild":
+            m, in_committee = build_model()
+            for committee in committees:
+                exclude(m, in_committee, committee)
+        if budget is not None:
+            if budget.deadline is not None:
+                m.setParam('TimeLimit', budget.remaining_time())
+            if budget.max_nodes is not None:
+                m.setParam('NodeLimit', budget.remaining_nodes())
+
+        if budget is not None and budget.cancellation_token is not None:
+            m.optimize(callback)
+        else:
+            m.optimize()
+        if budget is not None:
+            budget.exhausted(int(m.NodeCount))
+
+        if m.Status in GUROBI_STOPPED:
+            budget.stop(GUROBI_STOPPED[m.Status])
+            if not committees and m.SolCount > 0:
+                # the best committee found so far (not necessarily optimal)
+                maxscore = m.objVal
+                committees.append([c for c in cands
+                                   if in_committee[c].X >= 1 - GUROBI_ACCURACY])
+            break
+        elif m.Status not in [2, 3, 4]:
             # m.Status == 2 implies solution found
             # m.Status in [3, 4] implies infeasible --> no more solutions
             # otherwise ...
@@ -82,12 +147,24 @@ def _optimize_rule_gurobi(set_opt_model_func, profile, committeesize, scorefct,
             # no longer optimal
             break
 
-        committee = [c for c in cands if in_committee[c].Xn >= 1-GUROBI_ACCURACY]
-        assert len(committee) == committeesize
-        committees.append(committee)
+        # solutions in the pool are sorted by decreasing objective value
+        new_committees = []
+        for i in range(m.SolCount if use_pool else 1):
+            m.setParam('SolutionNumber', i)
+            if m.PoolObjVal < maxscore - GUROBI_ACCURACY:
+                break
+            committee = [c for c in cands if in_committee[c].Xn >= 1 - GUROBI_ACCURACY]
+            assert len(committee) == committeesize
+            # different solutions may correspond to the same committee
+            if committee not in committees and committee not in new_committees:
+                new_committees.append(committee)
+        committees.extend(new_committees)
 
         if resolute:
             break
+        if GUROBI_ENUMERATION != "rebuild":
+            for committee in new_committees:
+                exclude(m, in_committee, committee)
 
     # optional output
     if verbose:
@@ -98,57 +175,55 @@ def _optimize_rule_gurobi(set_opt_model_func, profile, committeesize, scorefct,
     return committees
 
 
-def __gurobi_thiele_methods(profile, committeesize, scorefct, resolute):
-    def set_opt_model_func(m, profile, in_committee, committeesize, committees, cands, scorefct):
-        # utility[(pref, l)] contains (intended binary) variables counting the number of approved
-        # candidates in the selected committee by pref. This utility[(pref, l)] is true for
-        # exactly the number of candidates in the committee approved by pref for all
+def __gurobi_thiele_methods(profile, committeesize, scorefct, resolute, budget=None):
+    def set_opt_model_func(m, profile, in_committee, committeesize, cands, scorefct):
+        # utility[(v, l)] contains (intended binary) variables counting the number of approved
+        # candidates in the selected committee by voter v. This utility[(v, l)] is true for
+        # exactly the number of candidates in the committee approved by voter v for all
         # l = 1...committeesize.
+        # Variables are keyed by voter index, approval sets may be created on the fly
+        # (storage mode "csr").
         #
         # If scorefct(l) > 0 for l >= 1, we assume that scorefct is monotonic decreasing and
         # therefore in combination with the objective function the following interpreation is
         # valid:
-        # utility[(pref, l)] indicates whether pref approves at least l candidates in the
+        # utility[(v, l)] indicates whether voter v approves at least l candidates in the
         # committee (this is the case for scorefct "pav", "slav" or "geom").
         utility = {}
 
-        for pref in profile:
+        for v in range(len(profile)):
             for l in range(1, committeesize + 1):
                 # TODO Should we use vtype=gb.GRB.BINARY? Does it make it faster to use ub=1.0?
-                utility[(pref, l)] = m.addVar(ub=1.0)
+                utility[(v, l)] = m.addVar(ub=1.0)
 
         # constraint: the committee has the required size
         m.addConstr(gb.quicksum(in_committee) == committeesize)
 
         # constraint: utilities are consistent with actual committee
-        for pref in profile:
-            m.addConstr(gb.quicksum(utility[pref, l]
+        for v, pref in enumerate(profile):
+            m.addConstr(gb.quicksum(utility[v, l]
                                     for l in range(1, committeesize + 1)) ==
                         gb.quicksum(in_committee[c] for c in pref))
 
-        # find a new committee that has not been found yet by excluding previously found committees
-        for comm in committees:
-            m.addConstr(
-                gb.quicksum(in_committee[c] for c in cands if c in comm) <= committeesize - 1)
-
         # objective: the PAV score of the committee
         m.setObjective(
-            gb.quicksum(float(scorefct(l)) * pref.weight * utility[(pref, l)]
-                        for pref in profile
+            gb.quicksum(scorefct.marginal_float[l] * pref.weight * utility[(v, l)]
+                        for v, pref in enumerate(profile)
                         for l in range(1, committeesize + 1)),
             gb.GRB.MAXIMIZE)
 
-    score_values = [scorefct(l) for l in range(1, committeesize + 1)]
+    score_values = scorefct.marginal[1:committeesize + 1]
     if not all(first > second or first == second == 0
                for first, second in zip(score_values, score_values[1:])):
         raise ValueError("scorefct must be monotonic decreasing")
 
-    return _optimize_rule_gurobi(set_opt_model_func, profile, committeesize, scorefct, resolute)
+    return _optimize_rule_gurobi(set_opt_model_func, profile, committeesize, scorefct, resolute,
+                                 budget=budget)
 
 
-def __gurobi_monroe(profile, committeesize, resolute):
+def __gurobi_monroe(profile, committeesize, resolute, budget=None):
     def set_opt_model_func(
-            m, profile, in_committee, committeesize, committees, cands, scorefct):
+            m, profile, in_committee, committeesize, cands, scorefct):
         num_voters = len(profile)
 
         # optimization goal: variable "satisfaction"
@@ -191,18 +266,13 @@ def __gurobi_monroe(profile, committeesize, resolute):
                                 for c in cands)
                     >= satisfaction)
 
-        # find a new committee that has not been found before
-        for comm in committees:
-            m.addConstr(
-                gb.quicksum(in_committee[c] for c in cands if c in comm) <= committeesize - 1)
-
         # optimization objective
         m.setObjective(satisfaction, gb.GRB.MAXIMIZE)
     return _optimize_rule_gurobi(set_opt_model_func, profile, committeesize, scorefct=None,
-                                 resolute=resolute)
+                                 resolute=resolute, budget=budget)
 
 
-def __gurobi_optphragmen(profile, committeesize, resolute, verbose):
+def __gurobi_optphragmen(profile, committeesize, resolute, verbose, budget=None):
     """opt-Phragmen
 
     Warning: does not include the lexicographic optimization as specified
@@ -214,34 +284,29 @@ def __gurobi_optphragmen(profile, committeesize, resolute, verbose):
              second-, third-, ...-largest load
     """
     def set_opt_model_func(
-            m, profile, in_committee, committeesize, committees, cands, scorefct):
+            m, profile, in_committee, committeesize, cands, scorefct):
         load = {}
         for c in cands:
-            for pref in profile:
-                load[(pref, c)] = m.addVar(ub=1.0, lb=0.0)
+            for v in range(len(profile)):
+                load[(v, c)] = m.addVar(ub=1.0, lb=0.0)
 
         # constraint: the committee has the required size
         m.addConstr(gb.quicksum(in_committee[c] for c in cands) == committeesize)
 
         for c in cands:
-            for pref in profile:
+            for v, pref in enumerate(profile):
                 if c not in pref:
-                    m.addConstr(load[(pref, c)] == 0)
+                    m.addConstr(load[(v, c)] == 0)
 
         # a candidate's load is distributed among his approvers
         for c in cands:
-            m.addConstr(gb.quicksum(pref.weight * load[(pref, c)]
-                                    for pref in profile if c in cands)
+            m.addConstr(gb.quicksum(pref.weight * load[(v, c)]
+                                    for v, pref in enumerate(profile) if c in cands)
                         == in_committee[c])
 
-        # find a new committee that has not been found before
-        for comm in committees:
-            m.addConstr(
-                gb.quicksum(in_committee[c] for c in cands if c in comm) <= committeesize - 1)
-
         loadbound = m.addVar(name="loadbound")
-        for pref in profile:
-            m.addConstr(gb.quicksum(load[(pref, c)]
+        for v, pref in enumerate(profile):
+            m.addConstr(gb.quicksum(load[(v, c)]
                                     for c in pref)
                         <= loadbound)
 
@@ -249,12 +314,12 @@ def __gurobi_optphragmen(profile, committeesize, resolute, verbose):
         m.setObjective(-loadbound, gb.GRB.MAXIMIZE)
 
     return _optimize_rule_gurobi(set_opt_model_func, profile, committeesize, scorefct=None,
-                                 resolute=resolute, verbose=verbose)
+                                 resolute=resolute, verbose=verbose, budget=budget)
 
 
-def __gurobi_minimaxav(profile, committeesize, resolute):
+def __gurobi_minimaxav(profile, committeesize, resolute, budget=None):
     def set_opt_model_func(
-            m, profile, in_committee, committeesize, committees, cands, scorefct):
+            m, profile, in_committee, committeesize, cands, scorefct):
         num_voters = len(profile)
         # optimization goal: variable "sum_difference"
         max_hamdistance = m.addVar(vtype=gb.GRB.INTEGER, name="max_hamdistance")
@@ -282,13 +347,8 @@ def __gurobi_minimaxav(profile, committeesize, resolute):
                                                        )
                         )
 
-        # find a new committee that has not been found before
-        for comm in committees:
-            m.addConstr(
-                gb.quicksum(in_committee[c] for c in cands if c in comm) <= committeesize - 1)
-
         # maximizing the negative distance makes code more similar to the other methods here
         m.setObjective(-max_hamdistance, gb.GRB.MAXIMIZE)
 
     return _optimize_rule_gurobi(set_opt_model_func, profile, committeesize, scorefct=None,
-                                 resolute=resolute)
+                                 resolute=resolute, budget=budget)
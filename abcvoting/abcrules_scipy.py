@@ -0,0 +1,359 @@
+"""
+Approval-based committee (ABC) rules implemented as a integer linear
+programs (ILPs) with scipy.optimize.milp, i.e., the MILP solver HiGHS (https://highs.dev/)
+
+The formulations are the same as in abcrules_gurobi.py, but constraints are given as sparse
+matrices. Variables are ordered as follows: first the binary variables in_committee (one per
+candidate), then additional variables of the respective formulation.
+"""
+
+import numpy as np
+
+try:
+    from scipy import sparse
+    from scipy.optimize import milp, LinearConstraint, Bounds
+    available = True
+except ImportError:
+    available = False
+
+SCIPY_ACCURACY = 1e-7
+
+# status codes of scipy.optimize.milp
+MILP_OPTIMAL = 0
+MILP_LIMIT_REACHED = 1
+MILP_INFEASIBLE = 2
+
+
+class _MILP:
+    """A maximization problem: objective c, integrality, bounds and linear constraints
+    lb <= A x <= ub (A is a sparse matrix)."""
+
+    def __init__(self, c, integrality, lower, upper, A, lb, ub):
+        self.c = np.asarray(c, dtype=float)
+        self.integrality = np.asarray(integrality)
+        self.bounds = Bounds(lower, upper)
+        self.A = sparse.csr_matrix(A, dtype=float)
+        self.lb = np.asarray(lb, dtype=float)
+        self.ub = np.asarray(ub, dtype=float)
+
+
+def _optimize_rule_scipy(milp_model, profile, committeesize, resolute, budget=None):
+    """Compute rules, which are given in the form of a MILP (see `_MILP`), using HiGHS.
+
+    All optimal committees are enumerated by adding no-good cuts (excluding committees that
+    have already been found) and solving again, until the optimal value decreases.
+
+    Parameters
+    ----------
+    milp_model : _MILP
+        the first profile.num_cand variables indicate which candidates are in the committee
+    profile : abcvoting.preferences.Profile
+        approval sets of voters
+    committeesize : int
+        number of chosen alternatives
+    resolute : bool
+        return only the lexicographically smallest optimal committee
+        (see `_smallest_optimal_committee()`)
+    budget : abcvoting.budget.Budget, optional
+        limits the computation: the remaining time and nodes are passed to HiGHS as
+        time_limit and node_limit, the cancellation token is checked between two solves; if
+        the budget is exhausted, the committees found so far are returned and budget.reason
+        is set
+
+    Returns
+    -------
+    committees : list of lists
+        a list of chosen committees, each of them represented as list with candidates named from
+        `0` to `num_cand`, profile.cand_names is ignored
+
+    """
+    num_cand = profile.num_cand
+    num_vars = len(milp_model.c)
+    maxscore = None
+    committees = []
+
+    while True:
+        if budget is not None and budget.exhausted(0) and committees:
+            break
+
+        # no-good cuts: find a new committee that has not been found yet
+        cuts = sparse.lil_matrix((len(committees), num_vars))
+        for i, committee in enumerate(committees):
+            cuts[i, committee] = 1
+        constraints = [LinearConstraint(milp_model.A, milp_model.lb, milp_model.ub)]
+        if committees:
+            constraints.append(LinearConstraint(cuts.tocsr(), -np.inf, committeesize - 1))
+
+        options = _milp_options(budget)
+        limited = len(options) > 1
+
+        # milp minimizes the objective
+        result = milp(-milp_model.c, integrality=milp_model.integrality,
+                      bounds=milp_model.bounds, constraints=constraints, options=dict(options))
+        if budget is not None:
+            budget.exhausted(int(getattr(result, "mip_node_count", 0) or 0))
+
+        # HiGHS might report a reached node limit as "solution limit reached" (status 4)
+        if result.status == MILP_LIMIT_REACHED or (
+                limited and result.status not in (MILP_OPTIMAL, MILP_INFEASIBLE)):
+            if budget.max_nodes is not None and budget.remaining_nodes() == 0:
+                budget.stop("max_nodes")
+            else:
+                budget.stop("time_limit")
+            if not committees and result.x is not None:
+                # the best committee found so far (not necessarily optimal)
+                committees.append(
+                    [c for c in range(num_cand) if result.x[c] >= 1 - SCIPY_ACCURACY])
+            break
+        elif result.status == MILP_INFEASIBLE:
+            if len(committees) == 0:
+                raise RuntimeError("HiGHS found no solution")
+            break
+        elif result.status != MILP_OPTIMAL:
+            raise RuntimeError(f"HiGHS returned an unexpected status code: {result.status} "
+                               f"({result.message})")
+
+        score = -result.fun
+        if maxscore is None:
+            maxscore = score
+        elif score > maxscore + SCIPY_ACCURACY:
+            raise RuntimeError("HiGHS found a solution better than a previous optimum. This "
+                               f"should not happen (previous optimal score: {maxscore}, "
+                               f"new optimal score: {score}).")
+        elif score < maxscore - SCIPY_ACCURACY:
+            # no longer optimal
+            break
+
+        committee = [c for c in range(num_cand) if result.x[c] >= 1 - SCIPY_ACCURACY]
+        assert len(committee) == committeesize
+        if resolute:
+            committee = _smallest_optimal_committee(milp_model, num_cand, committee, maxscore,
+                                                    budget=budget)
+        committees.append(committee)
+
+        if resolute:
+            break
+
+    return committees
+
+
+def _milp_options(budget):
+    """Options for scipy.optimize.milp, including the remaining time and nodes of budget."""
+    # scores are compared exactly (up to SCIPY_ACCURACY), hence the relative MIP gap is 0
+    options = {"mip_rel_gap": 0}
+    if budget is not None:
+        if budget.deadline is not None:
+            options["time_limit"] = budget.remaining_time()
+        if budget.max_nodes is not None:
+            options["node_limit"] = budget.remaining_nodes()
+    return options
+
+
+def _smallest_optimal_committee(milp_model, num_cand, committee, maxscore, budget=None):
+    """Returns the lexicographically smallest optimal committee (as branch-and-bound and
+    brute-force algorithms do), given an optimal committee with score maxscore.
+
+    If no other committee is optimal, this requires a single solve. Otherwise, candidates
+    are fixed greedily in increasing order: a candidate is fixed to be in the committee if
+    this is possible without decreasing the score. If the budget is exhausted in between,
+    the best committee found so far (an optimal one) is returned."""
+    lower = np.broadcast_to(milp_model.bounds.lb, milp_model.c.shape).astype(float)
+    upper = np.broadcast_to(milp_model.bounds.ub, milp_model.c.shape).astype(float)
+    optimal = [LinearConstraint(milp_model.A, milp_model.lb, milp_model.ub),
+               LinearConstraint(milp_model.c, maxscore - SCIPY_ACCURACY, np.inf)]
+
+    def solve(constraints):
+        if budget is not None and budget.exhausted(0):
+            return None
+        result = milp(-milp_model.c, integrality=milp_model.integrality,
+                      bounds=Bounds(lower, upper), constraints=constraints,
+                      options=_milp_options(budget))
+        if budget is not None:
+            budget.exhausted(int(getattr(result, "mip_node_count", 0) or 0))
+        if result.status == MILP_OPTIMAL:
+            return [c for c in range(num_cand) if result.x[c] >= 1 - SCIPY_ACCURACY]
+        if result.status == MILP_INFEASIBLE:
+            return None
+        if budget is None or budget.unlimited:
+            raise RuntimeError(f"HiGHS returned an unexpected status code: {result.status} "
+                               f"({result.message})")
+        if budget.max_nodes is not None and budget.remaining_nodes() == 0:
+            budget.stop("max_nodes")
+        else:
+            budget.stop("time_limit")
+        return None
+
+    # is there another optimal committee?
+    cut = np.zeros(len(milp_model.c))
+    cut[committee] = 1
+    if solve(optimal + [LinearConstraint(cut, -np.inf, len(committee) - 1)]) is None:
+        return committee
+    for cand in range(num_cand):
+        if cand not in committee:
+            if budget is not None and budget.reason is not None:
+                break
+            lower[cand] = 1
+            other = solve(optimal)
+            if other is None:
+                lower[cand] = upper[cand] = 0
+                continue
+            committee = other
+        lower[cand] = upper[cand] = 1
+    return committee
+
+
+def _approval_matrix(profile):
+    """Sparse matrix (voters x candidates) with entry 1 if the voter approves the candidate."""
+    indices, indptr = profile.csr()
+    return sparse.csr_matrix((np.ones(len(indices)), indices, indptr),
+                             shape=(len(profile), profile.num_cand))
+
+
+def _float_weights(profile):
+    return np.array([float(weight) for weight in profile.weight_vector().tolist()])
+
+
+def scipy_thiele_methods(profile, committeesize, scorefct, resolute, budget=None):
+    """Thiele methods, see `abcrules_gurobi.__gurobi_thiele_methods()`
+
+    Variables: in_committee (num_cand), utility (num_voters x committeesize, in [0, 1]);
+    utility[v, l] indicates whether voter v approves at least l+1 committee members.
+    """
+    score_values = scorefct.marginal[1:committeesize + 1]
+    if not all(first > second or first == second == 0
+               for first, second in zip(score_values, score_values[1:])):
+        raise ValueError("scorefct must be monotonic decreasing")
+
+    num_cand, num_voters = profile.num_cand, len(profile)
+    approval = _approval_matrix(profile)
+
+    # objective: the Thiele score of the committee
+    c = np.concatenate((np.zeros(num_cand),
+                        np.outer(_float_weights(profile),
+                                 scorefct.marginal_float[1:committeesize + 1]).ravel()))
+    integrality = np.concatenate((np.ones(num_cand), np.zeros(num_voters * committeesize)))
+
+    A = sparse.vstack([
+        # the committee has the required size
+        sparse.hstack([np.ones((1, num_cand)),
+                       sparse.csr_matrix((1, num_voters * committeesize))]),
+        # utilities are consistent with the actual committee
+        sparse.hstack([-approval,
+                       sparse.kron(sparse.identity(num_voters), np.ones((1, committeesize)))]),
+    ])
+    lb = ub = np.concatenate(([committeesize], np.zeros(num_voters)))
+
+    milp_model = _MILP(c, integrality, 0, 1, A, lb, ub)
+    return _optimize_rule_scipy(milp_model, profile, committeesize, resolute, budget=budget)
+
+
+def scipy_monroe(profile, committeesize, resolute, budget=None):
+    """Monroe's rule, see `abcrules_gurobi.__gurobi_monroe()`
+
+    Variables: in_committee (num_cand), partition (num_cand x num_voters, integers);
+    partition[c, v] is the weight of voter v that is assigned to candidate c. The
+    objective (the Monroe score) is the weight of voters assigned to an approved candidate.
+    """
+    num_cand, num_voters = profile.num_cand, len(profile)
+    approval = _approval_matrix(profile)
+    lower_size = num_voters // committeesize
+    upper_size = num_voters // committeesize + bool(num_voters % committeesize)
+
+    c = np.concatenate((np.zeros(num_cand), approval.T.toarray().ravel()))
+    integrality = np.ones(num_cand + num_cand * num_voters)
+    upper = np.concatenate((np.ones(num_cand),
+                            np.tile(_float_weights(profile), num_cand)))
+
+    # sum_v partition[c, v] for each candidate c
+    assigned = sparse.kron(sparse.identity(num_cand), np.ones((1, num_voters)))
+    in_committee = sparse.identity(num_cand)
+    A = sparse.vstack([
+        # the committee has the required size
+        sparse.hstack([np.ones((1, num_cand)), sparse.csr_matrix((1, num_cand * num_voters))]),
+        # every voter is assigned to committee members
+        sparse.hstack([sparse.csr_matrix((num_voters, num_cand)),
+                       sparse.kron(np.ones((1, num_cand)), sparse.identity(num_voters))]),
+        # a committee member is assigned at least lower_size voters,
+        # a candidate not in the committee is not assigned any voters
+        sparse.hstack([-num_voters * in_committee, assigned]),
+        # a committee member is assigned at most upper_size voters
+        sparse.hstack([num_voters * in_committee, assigned]),
+    ])
+    lb = np.concatenate(([committeesize], _float_weights(profile),
+                         np.full(num_cand, lower_size - num_voters),
+                         np.full(num_cand, -np.inf)))
+    ub = np.concatenate(([committeesize], _float_weights(profile),
+                         np.zeros(num_cand),
+                         np.full(num_cand, upper_size + num_voters)))
+
+    milp_model = _MILP(c, integrality, 0, upper, A, lb, ub)
+    return _optimize_rule_scipy(milp_model, profile, committeesize, resolute, budget=budget)
+
+
+def scipy_optphragmen(profile, committeesize, resolute, budget=None):
+    """opt-Phragmen, see `abcrules_gurobi.__gurobi_optphragmen()`
+
+    Variables: in_committee (num_cand), load (one variable for each pair of a voter and an
+    approved candidate, in the order of profile.csr()), loadbound.
+    """
+    num_cand, num_voters = profile.num_cand, len(profile)
+    indices, indptr = profile.csr()
+    num_loads = len(indices)
+    voter_of_load = np.repeat(np.arange(num_voters), np.diff(indptr))
+
+    # maximizing the negative distance makes code more similar to the other methods here
+    c = np.concatenate((np.zeros(num_cand), np.zeros(num_loads), [-1]))
+    integrality = np.concatenate((np.ones(num_cand), np.zeros(num_loads + 1)))
+    upper = np.concatenate((np.ones(num_cand + num_loads), [np.inf]))
+
+    A = sparse.vstack([
+        # the committee has the required size
+        sparse.hstack([np.ones((1, num_cand)), sparse.csr_matrix((1, num_loads + 1))]),
+        # a candidate's load is distributed among its approvers
+        sparse.hstack([-sparse.identity(num_cand),
+                       sparse.csr_matrix((_float_weights(profile)[voter_of_load],
+                                          (indices, np.arange(num_loads))),
+                                         shape=(num_cand, num_loads)),
+                       sparse.csr_matrix((num_cand, 1))]),
+        # the load of each voter is at most loadbound
+        sparse.hstack([sparse.csr_matrix((num_voters, num_cand)),
+                       sparse.csr_matrix((np.ones(num_loads), np.arange(num_loads), indptr),
+                                         shape=(num_voters, num_loads)),
+                       sparse.csr_matrix(-np.ones((num_voters, 1)))]),
+    ])
+    lb = np.concatenate(([committeesize], np.zeros(num_cand), np.full(num_voters, -np.inf)))
+    ub = np.concatenate(([committeesize], np.zeros(num_cand), np.zeros(num_voters)))
+
+    milp_model = _MILP(c, integrality, 0, upper, A, lb, ub)
+    return _optimize_rule_scipy(milp_model, profile, committeesize, resolute, budget=budget)
+
+
+def scipy_minimaxav(profile, committeesize, resolute, budget=None):
+    """Minimax AV, see `abcrules_gurobi.__gurobi_minimaxav()`
+
+    Variables: in_committee (num_cand), max_hamdistance (integer). The Hamming distance
+    between the committee and the approval set A of a voter is
+    |A| + sum of in_committee[c] for c not in A - sum of in_committee[c] for c in A,
+    i.e., |A| + committeesize - 2 * (sum of in_committee[c] for c in A). The latter form is
+    used, hence the constraint matrix has the same sparsity as the approval matrix.
+    """
+    num_cand, num_voters = profile.num_cand, len(profile)
+    approval = _approval_matrix(profile)
+    _, indptr = profile.csr()
+
+    # maximizing the negative distance makes code more similar to the other methods here
+    c = np.concatenate((np.zeros(num_cand), [-1]))
+    integrality = np.ones(num_cand + 1)
+    upper = np.concatenate((np.ones(num_cand), [num_cand]))
+
+    A = sparse.vstack([
+        # the committee has the required size
+        sparse.hstack([np.ones((1, num_cand)), sparse.csr_matrix((1, 1))]),
+        # maximum hamming distance is greater or equal than any individual one
+        sparse.hstack([-2 * approval, sparse.csr_matrix(-np.ones((num_voters, 1)))]),
+    ])
+    lb = np.concatenate(([committeesize], np.full(num_voters, -np.inf)))
+    ub = np.concatenate(([committeesize], -np.diff(indptr) - committeesize))
+
+    milp_model = _MILP(c, integrality, 0, upper, A, lb, ub)
+    return _optimize_rule_scipy(milp_model, profile, committeesize, resolute, budget=budget)
@@ -0,0 +1,131 @@
+"""
+Time budgets, node limits and cancellation for exact (exponential-time) algorithms
+
+Exact algorithms accept the parameters `time_limit` (in seconds), `max_nodes` (the number
+of search nodes, e.g., branch-and-bound nodes or committees evaluated by brute-force
+algorithms) and `cancellation_token` (a `CancellationToken`). If the budget runs out or the
+computation is cancelled, the algorithm stops and returns an `IncompleteResult` containing
+the best committees found so far; otherwise, a list of committees is returned as usual.
+"""
+
+import threading
+import time
+
+
+class CancellationToken:
+    """
+    Allows cancelling a computation from another thread.
+
+    The computation checks the token regularly and stops (returning an `IncompleteResult`)
+    after `cancel()` has been called.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+
+class IncompleteResult(list):
+    """
+    List of the best committees found before the budget ran out (or the computation was
+    cancelled). These committees are not necessarily winning committees.
+
+    Attributes
+    ----------
+    complete : bool
+        Always False (to distinguish it from complete results via
+        `getattr(committees, "complete", True)`).
+    reason : str
+        "time_limit", "max_nodes" or "cancelled".
+    """
+
+    complete = False
+
+    def __init__(self, committees, reason):
+        super(IncompleteResult, self).__init__(committees)
+        self.reason = reason
+
+    def __repr__(self):
+        return ("IncompleteResult(" + super(IncompleteResult, self).__repr__()
+                + ", reason=" + repr(self.reason) + ")")
+
+
+class BudgetExhausted(Exception):
+    """Raised by algorithms to stop a search, see `Budget.check()`."""
+
+
+class Budget:
+    """
+    Keeps track of the time and the number of nodes used by a computation.
+
+    A budget with time_limit, max_nodes and cancellation_token all being None is unlimited.
+    """
+
+    def __init__(self, time_limit=None, max_nodes=None, cancellation_token=None):
+        if time_limit is not None and time_limit < 0:
+            raise ValueError("time_limit must be non-negative")
+        if max_nodes is not None and (int(max_nodes) != max_nodes or max_nodes < 0):
+            raise ValueError("max_nodes must be a non-negative integer")
+        self.time_limit = time_limit
+        self.max_nodes = max_nodes
+        self.cancellation_token = cancellation_token
+        self.deadline = None if time_limit is None else time.monotonic() + time_limit
+        self.nodes = 0
+        # reason why the computation was stopped (None if it is not stopped)
+        self.reason = None
+
+    @property
+    def unlimited(self):
+        return self.time_limit is None and self.max_nodes is None \
+            and self.cancellation_token is None
+
+    def exhausted(self, nodes=1):
+        """Adds nodes to the number of used nodes and returns True if the budget is exhausted
+        (the reason is stored in `reason`)."""
+        self.nodes += nodes
+        if self.reason is None:
+            if self.max_nodes is not None and self.nodes > self.max_nodes:
+                self.reason = "max_nodes"
+            elif self.cancellation_token is not None and self.cancellation_token.cancelled:
+                self.reason = "cancelled"
+            elif self.deadline is not None and time.monotonic() > self.deadline:
+                self.reason = "time_limit"
+        return self.reason is not None
+
+    def charge(self, nodes):
+        """Adds nodes to the number of used nodes without checking the budget."""
+        self.nodes += nodes
+
+    def check(self, nodes=1):
+        """Same as `exhausted()`, but raises BudgetExhausted instead of returning True."""
+        if self.exhausted(nodes):
+            raise BudgetExhausted(self.reason)
+
+    def stop(self, reason):
+        """Marks the computation as stopped (if it is not stopped yet)."""
+        if self.reason is None:
+            self.reason = reason
+
+    def remaining_time(self):
+        """Returns the remaining time in seconds (None if there is no time limit)."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def remaining_nodes(self):
+        """Returns the number of remaining nodes (None if there is no node limit)."""
+        if self.max_nodes is None:
+            return None
+        return max(0, self.max_nodes - self.nodes)
+
+    def result(self, committees):
+        """Returns committees, as IncompleteResult if the computation was stopped."""
+        if self.reason is None:
+            return committees
+        return IncompleteResult(committees, self.reason)
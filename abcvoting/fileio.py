@@ -1,14 +1,26 @@
 """
 Read preflib files (soi, toi, soc or toc)
+and read/write profiles in a binary, memory-mappable format
 """
 
 
 from __future__ import print_function
 import os
-from abcvoting.preferences import Profile, ApprovalSet
+import json
+import struct
+import numpy as np
+from abcvoting.preferences import Profile
 from math import ceil
 
 
+# binary profile format: magic bytes, header length (uint64, little endian), JSON header,
+# followed by the arrays indices, indptr and weights (each aligned to BINARY_ALIGNMENT bytes,
+# offsets in the header are relative to the first aligned position after the header)
+BINARY_MAGIC = b"ABCPROF\x00"
+BINARY_VERSION = 1
+BINARY_ALIGNMENT = 64
+
+
 class PreflibException(Exception):
     pass
 
@@ -188,16 +200,20 @@ def read_preflib_file(filename, setsize=1, appr_percent=None, use_weights=False)
         cand_names.append(candidate_map[c])
         normalize_map[c] = len(cand_names) - 1
 
-    profile = Profile(num_cand, cand_names=cand_names)
-
+    norm_appr_sets = []
+    weights = []
     for count, appr_set in appr_sets:
-        norm_appr_set = []
-        for c in appr_set:
-            norm_appr_set.append(normalize_map[c])
+        norm_appr_set = [normalize_map[c] for c in appr_set]
         if use_weights:
-            profile.add_voter(ApprovalSet(norm_appr_set, weight=count))
+            norm_appr_sets.append(norm_appr_set)
+            weights.append(count)
         else:
-            profile.add_voters([norm_appr_set] * count)
+            norm_appr_sets.extend([norm_appr_set] * count)
+            weights.extend([1] * count)
+
+    # all approval sets are validated at once
+    profile = Profile.from_approval_sets(num_cand, norm_appr_sets, weights=weights,
+                                         cand_names=cand_names)
     if use_weights:
         if len(profile) != unique_orders:
             raise PreflibException("Number of voters wrongly specified in preflib file.")
@@ -234,3 +250,107 @@ def write_profile_to_preflib_toi_file(profile, filename):
         for appr_set in profile:
             appr_set_string = ", ".join(str(cand + 1) for cand in appr_set)
             f.write(f"{appr_set.weight}, {{{appr_set_string}}}\n")
+
+
+def write_profile_to_binary_file(profile, filename):
+    """ Writes profile in a binary file that can be memory-mapped by `read_binary_profile_file`
+
+    The file contains the approval sets in CSR format (see `Profile.csr()`), the weights and
+    the names of candidates. Only int and float weights are supported.
+
+    Parameters:
+
+        profile: Profile
+            Profile to be written in binary file.
+
+        filename: str
+            File name of the binary file to be written.
+
+    Returns:
+        None
+    """
+    indices, indptr = profile.csr()
+    weights = profile.weight_vector()
+    if weights.dtype.kind not in "iuf":
+        raise ValueError("Only int and float weights can be written to binary files.")
+    arrays = {"indices": indices, "indptr": indptr, "weights": weights}
+
+    header = {
+        "version": BINARY_VERSION,
+        "num_cand": profile.num_cand,
+        "num_voters": len(profile),
+        "cand_names": profile.cand_names,
+        "arrays": {},
+    }
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        arrays[name] = array
+        header["arrays"][name] = {
+            "dtype": array.dtype.newbyteorder("<").str,
+            "offset": offset,
+            "length": len(array),
+        }
+        offset = _align(offset + array.nbytes)
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = _align(len(BINARY_MAGIC) + 8 + len(header_bytes))
+
+    with open(filename, "wb") as f:
+        f.write(BINARY_MAGIC)
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(data_start + header["arrays"][name]["offset"])
+            f.write(array.astype(header["arrays"][name]["dtype"], copy=False).tobytes())
+        f.truncate(data_start + offset)
+
+
+def read_binary_profile_file(filename, storage="csr"):
+    """Opens a binary profile file (written by `write_profile_to_binary_file`).
+
+    The approval sets and weights are memory-mapped read-only and not copied into memory,
+    hence opening is fast even for very large profiles and several processes can share
+    the same file.
+
+    Parameters:
+
+        filename: str
+            Name of the binary file.
+
+        storage: str
+            Storage mode of the profile (see `Profile`). With the default "csr", the profile
+            works directly on the memory-mapped arrays; with "sets", ApprovalSet objects are
+            created when needed.
+
+    Returns:
+        profile: Profile
+            Profile with memory-mapped approval sets and weights.
+    """
+    with open(filename, "rb") as f:
+        if f.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+            raise ValueError(f"{filename} is not a binary profile file.")
+        header_size, = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_size).decode("utf-8"))
+    data_start = _align(len(BINARY_MAGIC) + 8 + header_size)
+    if header["version"] != BINARY_VERSION:
+        raise ValueError(f"Unsupported version of binary profile file: {header['version']}")
+
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        if spec["length"] == 0:
+            # empty files/regions cannot be memory-mapped
+            arrays[name] = np.zeros(0, dtype=spec["dtype"])
+            arrays[name].flags.writeable = False
+        else:
+            arrays[name] = np.memmap(filename, dtype=spec["dtype"], mode="r",
+                                     offset=data_start + spec["offset"], shape=(spec["length"],))
+    if len(arrays["indptr"]) != header["num_voters"] + 1:
+        raise ValueError(f"{filename} is corrupted (wrong number of voters).")
+
+    return Profile.from_csr(header["num_cand"], arrays["indices"], arrays["indptr"],
+                            weights=arrays["weights"], cand_names=header["cand_names"],
+                            storage=storage, validate=False)
+
+
+def _align(offset):
+    return -(-offset // BINARY_ALIGNMENT) * BINARY_ALIGNMENT
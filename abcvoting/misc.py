@@ -4,6 +4,7 @@ Miscellaneous functions for committees (i.e., subsets of candidates)
 
 
 from __future__ import print_function
+import numpy as np
 
 
 def sort_committees(committees):
@@ -18,10 +19,9 @@ def check_enough_approved_candidates(profile, committeesize):
     """
     verifies whether a sufficient number of approved candidates exists
     """
-    appr = set()
-    for pref in profile:
-        appr.update(pref)
-    if len(appr) < committeesize:
+    indices, _ = profile.csr()
+    num_approved = len(np.unique(indices))
+    if num_approved < committeesize:
         raise ValueError("committeesize = " + str(committeesize)
                          + " is larger than number of approved candidates")
 
@@ -71,6 +71,33 @@ def str_committees_header(committees, winning=False):
     return output
 
 
+def bitmask(candset):
+    """Bitmask representation of a set of candidates.
+
+    The bitmask is an int where the c-th bit is set if and only if candidate c is contained in
+    `candset`. Intersections, symmetric differences and sizes of sets then correspond to
+    `&`, `^` and `popcount()`.
+
+    Parameters
+    ----------
+    candset : iterable of int
+        A set of candidates (e.g., a committee or an approval set)."""
+    mask = 0
+    for cand in candset:
+        mask |= 1 << cand
+    return mask
+
+
+def popcount(mask):
+    """Number of bits set in a non-negative int, i.e., the size of the set encoded by `mask`."""
+    return bin(mask).count("1")
+
+
+if hasattr(int, "bit_count"):
+    # Python 3.10+ provides a much faster native popcount
+    popcount = int.bit_count  # noqa: F811
+
+
 def hamming(a, b):
     """Hamming distance between sets `a` and `b`.
 
@@ -81,9 +108,7 @@ def hamming(a, b):
     ----------
     a, b : iterable of int
         The two sets, for which the Hamming distance is computed."""
-    diffs = ([x for x in a if x not in b] +
-             [x for x in b if x not in a])
-    return len(diffs)
+    return popcount(bitmask(a) ^ bitmask(b))
 
 
 def header(text, symbol="-"):
@@ -0,0 +1,125 @@
+"""
+Numeric backends, i.e., number types used by rules and score functions
+
+Available backends:
+    "float": Python floats (fast, but subject to rounding errors)
+    "fraction": fractions.Fraction (exact)
+    "gmpy2": gmpy2.mpq (exact, much faster than fractions.Fraction; requires gmpy2)
+    "exact": "gmpy2" if available, otherwise "fraction"
+"""
+
+import fractions
+import math
+
+try:
+    import gmpy2
+    gmpy2_available = True
+except ImportError:
+    gmpy2_available = False
+
+if gmpy2_available:
+    Fraction = gmpy2.mpq
+else:
+    Fraction = fractions.Fraction
+
+
+BACKENDS = ("float", "fraction", "gmpy2", "exact")
+
+
+class NumericBackend:
+    """
+    Base class of numeric backends.
+
+    Numbers of a backend support +, - and comparisons with numbers of the same backend;
+    division and conversions are provided by the backend.
+    """
+
+    name = None
+    exact = True
+
+    def number(self, value):
+        """Converts an int, float or fraction into a number of this backend."""
+        raise NotImplementedError()
+
+    def div(self, x, y):
+        """Returns x / y (x and y are ints, fractions or numbers of this backend)."""
+        raise NotImplementedError()
+
+    def to_fraction(self, x):
+        return Fraction(x)
+
+    def to_float(self, x):
+        return float(x)
+
+    def __repr__(self):
+        return self.__class__.__name__ + "()"
+
+
+class FloatBackend(NumericBackend):
+    name = "float"
+    exact = False
+
+    def number(self, value):
+        return float(value)
+
+    def div(self, x, y):
+        return x / y
+
+
+class FractionBackend(NumericBackend):
+    name = "fraction"
+
+    def number(self, value):
+        return fractions.Fraction(value)
+
+    def div(self, x, y):
+        return fractions.Fraction(x, y)
+
+    def to_fraction(self, x):
+        return x
+
+
+class Gmpy2Backend(NumericBackend):
+    name = "gmpy2"
+
+    def __init__(self):
+        if not gmpy2_available:
+            raise ImportError("Numeric backend 'gmpy2' requires the module gmpy2")
+
+    def number(self, value):
+        return gmpy2.mpq(value)
+
+    def div(self, x, y):
+        return gmpy2.mpq(x, y)
+
+    def to_fraction(self, x):
+        return x
+
+
+def common_denominator(values):
+    """
+    Returns the least common multiple of the denominators of values (ints and fractions),
+    or None if values contains a float (that is not an integer).
+    """
+    denominator = 1
+    for value in values:
+        if isinstance(value, float):
+            if not value.is_integer():
+                return None
+            continue
+        denominator = denominator * value.denominator // math.gcd(denominator, value.denominator)
+    return int(denominator)
+
+
+def get_backend(name):
+    """Returns the numeric backend with the given name (see `BACKENDS`)."""
+    if name == "float":
+        return FloatBackend()
+    if name == "fraction":
+        return FractionBackend()
+    if name == "gmpy2":
+        return Gmpy2Backend()
+    if name == "exact":
+        return Gmpy2Backend() if gmpy2_available else FractionBackend()
+    raise ValueError("Unknown numeric backend " + str(name) + ", must be one of "
+                     + str(BACKENDS))
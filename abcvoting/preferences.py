@@ -7,8 +7,16 @@ Preference profiles and approval sets
 """
 
 
-from abcvoting.misc import str_candset
+import operator
+import sys
+from abcvoting.misc import str_candset, bitmask
 from collections import OrderedDict
+import numpy as np
+
+
+# "sets": approval sets are stored as list of ApprovalSet objects
+# "csr": approval sets are stored only as arrays in compressed sparse row format
+STORAGE_MODES = ("sets", "csr")
 
 
 class Profile(object):
@@ -24,14 +32,33 @@ class Profile(object):
     approval_sets : list of ApprovalSet
         approved candidates for each voter, use `Profile.add_voter()` or `Profile.add_voters()`
         to add approval sets
+    storage : str
+        storage mode, "sets" (default) or "csr"
+
+    The approval sets are additionally available as a voters x candidates matrix (see
+    `Profile.approval_matrix()`), in compressed sparse row format (see `Profile.csr()`) together
+    with a vector of weights (see `Profile.weight_vector()`). These are built lazily and cached
+    until the profile is modified.
+
+    Large profiles should be created with one of the bulk constructors
+    `Profile.from_approval_sets()`, `Profile.from_approval_matrix()` or `Profile.from_csr()`.
+    They validate all approval sets at once and create `ApprovalSet` objects only when
+    `Profile.approval_sets` is accessed (e.g., when iterating over the profile).
+
+    Very large and sparse profiles can use the storage mode "csr" (parameter `storage`). Then
+    approval sets are only stored in CSR format (see `Profile.csr()`) and `ApprovalSet` objects
+    are created on the fly when iterating over the profile or accessing a voter. Use
+    `Profile.memory_usage()` to compare the memory footprint of both storage modes.
 
     """
-    def __init__(self, num_cand, cand_names=None):
+    def __init__(self, num_cand, cand_names=None, storage="sets"):
         if num_cand <= 0:
             raise ValueError(str(num_cand) +
                              " is not a valid number of candidates")
+        if storage not in STORAGE_MODES:
+            raise ValueError("storage must be one of " + str(STORAGE_MODES))
         self.num_cand = num_cand
-        self._approval_sets = []  # entries correspond to voters
+        self.storage = storage
         self.cand_names = [str(c) for c in range(num_cand)]
         if cand_names:
             if len(cand_names) < num_cand:
@@ -39,12 +66,161 @@ class Profile(object):
                                  + str(len(cand_names)) + " < num_cand ("
                                  + str(num_cand) + ")")
             self.cand_names = [str(cand_names[i]) for i in range(num_cand)]
+        self._approval_matrix = None
+        self._compressed = None
+        self._approvers = None
+        self._approvers_weight = None
+        self._party_partition = None
+        # incremented whenever the profile is modified, allows to detect outdated derived data
+        self.version = 0
+        # only set for profiles returned by `Profile.compressed()`
+        self.original_voters = None
+        if storage == "sets":
+            self._approval_sets = []  # entries correspond to voters
+            self._csr = None
+            self._weight_vector = None
+        else:
+            # the CSR arrays are the only storage, voters added via `add_voter()` are collected
+            # in self._pending and appended to the arrays in one go when needed
+            self._approval_sets = None
+            self._csr = (np.zeros(0, dtype=_index_dtype(num_cand)), np.zeros(1, dtype=np.int64))
+            self._weight_vector = np.zeros(0, dtype=int)
+            self._pending = []
+
+    @classmethod
+    def from_approval_sets(cls, num_cand, approval_sets, weights=None, cand_names=None,
+                           storage="sets"):
+        """
+        Bulk constructor: creates a profile from a list of approval sets.
+
+        Parameters
+        ----------
+        num_cand : int
+        approval_sets : iterable of iterables of int
+            approved candidates for each voter (or ApprovalSets, whose weights are used)
+        weights : array_like, optional
+            weights of voters, defaults to 1 for each voter (or the weight of the
+            ApprovalSet); must not be given if approval_sets contains weighted ApprovalSets
+        cand_names : iterable of str, optional
+        storage : str, optional
+            storage mode, see `Profile`
+
+        Returns
+        -------
+        profile : Profile
+
+        """
+        approval_sets = list(approval_sets)
+        set_weights = [apprset.weight if isinstance(apprset, ApprovalSet) else 1
+                       for apprset in approval_sets]
+        if any(weight != 1 for weight in set_weights):
+            if weights is not None:
+                raise ValueError("weights must not be given if approval_sets contains "
+                                 "ApprovalSets with weights other than 1")
+            weights = set_weights
+        approval_sets = [list(apprset) for apprset in approval_sets]
+        indptr = np.zeros(len(approval_sets) + 1, dtype=np.int64)
+        np.cumsum([len(apprset) for apprset in approval_sets], out=indptr[1:])
+        indices = np.array([cand for apprset in approval_sets for cand in apprset])
+        return cls.from_csr(num_cand, indices, indptr, weights=weights, cand_names=cand_names,
+                            storage=storage)
+
+    @classmethod
+    def from_approval_matrix(cls, matrix, weights=None, cand_names=None, storage="sets"):
+        """
+        Bulk constructor: creates a profile from a voters x candidates matrix.
+
+        Parameters
+        ----------
+        matrix : array_like, shape (num_voters, num_cand)
+            `matrix[i, c]` is True (or 1) if voter i approves candidate c,
+            the number of columns is the number of candidates
+        weights : array_like, optional
+            weights of voters, defaults to 1 for each voter
+        cand_names : iterable of str, optional
+        storage : str, optional
+            storage mode, see `Profile`
+
+        Returns
+        -------
+        profile : Profile
+
+        """
+        matrix = np.asarray(matrix)
+        if matrix.ndim != 2:
+            raise ValueError("approval matrix must be two-dimensional")
+        if matrix.dtype != bool:
+            if not np.isin(matrix, (0, 1)).all():
+                raise ValueError("approval matrix must contain only 0/1 or boolean entries")
+            matrix = matrix.astype(bool)
+        indptr = np.zeros(matrix.shape[0] + 1, dtype=np.int64)
+        np.cumsum(matrix.sum(axis=1), out=indptr[1:])
+        indices = matrix.nonzero()[1]
+        return cls.from_csr(matrix.shape[1], indices, indptr,
+                            weights=weights, cand_names=cand_names, storage=storage)
+
+    @classmethod
+    def from_csr(cls, num_cand, indices, indptr, weights=None, cand_names=None, storage="sets",
+                 validate=True):
+        """
+        Bulk constructor: creates a profile from approval sets in compressed sparse row format.
+
+        The approval set of voter i consists of the candidates `indices[indptr[i]:indptr[i+1]]`
+        (this is the same format as used by `scipy.sparse.csr_matrix`).
+
+        Parameters
+        ----------
+        num_cand : int
+        indices : array_like of int
+            approved candidates of all voters, concatenated
+        indptr : array_like of int, shape (num_voters + 1,)
+            offsets of the approval sets in `indices`
+        weights : array_like, optional
+            weights of voters, defaults to 1 for each voter
+        cand_names : iterable of str, optional
+        storage : str, optional
+            storage mode, see `Profile`
+        validate : bool, optional
+            If False, the arrays are used as they are, without validating or copying them.
+            Only use this for arrays that are known to be valid (e.g., memory-mapped arrays
+            of a file written by `fileio.write_profile_to_binary_file()`): indices must be
+            sorted within each approval set, weights must be given and all arrays should be
+            read-only.
+
+        Returns
+        -------
+        profile : Profile
+
+        """
+        profile = cls(num_cand, cand_names=cand_names, storage=storage)
+        if validate:
+            indices, indptr, weights = _validate_csr(num_cand, indices, indptr, weights)
+        elif weights is None:
+            raise ValueError("weights must be given if validate=False")
+        # in storage mode "sets", approval sets are created from the CSR arrays when needed
+        profile._approval_sets = None
+        profile._csr = (indices, indptr)
+        profile._weight_vector = weights
+        return profile
 
     def __len__(self):
-        return len(self.approval_sets)
+        if self.storage == "csr":
+            return len(self._csr[1]) - 1 + len(self._pending)
+        if self._approval_sets is None:
+            return len(self._csr[1]) - 1
+        return len(self._approval_sets)
 
     @property
     def approval_sets(self):
+        if self.storage == "csr":
+            # approval sets are not stored but created on the fly
+            return list(self)
+        if self._approval_sets is None:
+            indices, indptr = self._csr
+            self._approval_sets = [
+                ApprovalSet(indices[start:end].tolist(), weight)
+                for start, end, weight
+                in zip(indptr[:-1].tolist(), indptr[1:].tolist(), self._weight_vector.tolist())]
         return self._approval_sets
 
     def add_voter(self, pref):
@@ -56,9 +232,6 @@ class Profile(object):
         pref : ApprovalSet or iterable of int
 
         """
-        # note that we trust that each set in self._approval_sets is a unique object even if pref
-        # might not be unique, because it is used as dict key (see e.g. the variable utility in
-        # abcrules_gurobi or propositionA3.py)
         if isinstance(pref, ApprovalSet):
             appr_set = pref
         else:
@@ -66,7 +239,81 @@ class Profile(object):
 
         # this check is a bit redundant, but needed to check for consistency with self.num_cand
         appr_set.check_valid(self.num_cand)
-        self._approval_sets.append(appr_set)
+        if self.storage == "csr":
+            self._pending.append(appr_set)
+        else:
+            self.approval_sets.append(appr_set)
+        self._invalidate_cache()
+
+    def remove_voter(self, i):
+        """
+        Removes voter `i` from the preference profile (voters after `i` move up by one).
+
+        Parameters
+        ----------
+        i : int
+
+        """
+        i = self._voter_index(i)
+        if self.storage == "csr":
+            self._flush_pending()
+            self._splice_csr(i, i + 1, [])
+        else:
+            del self.approval_sets[i]
+        self._invalidate_cache()
+
+    def replace_voter(self, i, pref):
+        """
+        Replaces the approval set of voter `i`.
+
+        Parameters
+        ----------
+        i : int
+        pref : ApprovalSet or iterable of int
+
+        """
+        i = self._voter_index(i)
+        if isinstance(pref, ApprovalSet):
+            appr_set = pref
+        else:
+            appr_set = ApprovalSet(pref)
+        appr_set.check_valid(self.num_cand)
+        if self.storage == "csr":
+            self._flush_pending()
+            self._splice_csr(i, i + 1, [appr_set])
+        else:
+            self.approval_sets[i] = appr_set
+        self._invalidate_cache()
+
+    def add_candidate(self, cand_name=None):
+        """
+        Adds a new candidate (not approved by any voter) to the preference profile.
+
+        Parameters
+        ----------
+        cand_name : str, optional
+            defaults to the number of the new candidate
+
+        Returns
+        -------
+        cand : int
+            the new candidate
+
+        """
+        cand = self.num_cand
+        self.num_cand += 1
+        self.cand_names.append(str(cand) if cand_name is None else str(cand_name))
+        if self._csr is not None and self._csr[0].dtype != _index_dtype(self.num_cand):
+            indices = self._csr[0].astype(_index_dtype(self.num_cand))
+            indices.flags.writeable = False
+            self._csr = (indices, self._csr[1])
+        self._invalidate_cache()
+        return cand
+
+    def _voter_index(self, i):
+        if not -len(self) <= i < len(self):
+            raise IndexError("voter index " + str(i) + " out of range")
+        return i % len(self)
 
     def add_voters(self, prefs):
         """
@@ -82,19 +329,307 @@ class Profile(object):
         for p in prefs:
             self.add_voter(p)
 
+    def _invalidate_cache(self):
+        """
+        Drop all data derived from the approval sets. Has to be called whenever the profile is
+        modified.
+        """
+        self.version += 1
+        self._approval_matrix = None
+        self._compressed = None
+        self._approvers = None
+        self._approvers_weight = None
+        self._party_partition = None
+        if self._approval_sets is not None:
+            # CSR arrays and weights have been derived from the approval sets
+            self._weight_vector = None
+            self._csr = None
+
+    def _flush_pending(self):
+        """
+        Append voters added via `add_voter()` to the CSR arrays (only for storage mode "csr").
+        """
+        if not self._pending:
+            return
+        num_voters = len(self._csr[1]) - 1
+        self._splice_csr(num_voters, num_voters, self._pending)
+        self._pending = []
+
+    def _splice_csr(self, start, end, appr_sets):
+        """
+        Replace voters `start, ..., end - 1` by `appr_sets` in the CSR arrays (only for storage
+        mode "csr").
+        """
+        indices, indptr = self._csr
+        old_weights = self._weight_vector
+        lengths = [len(pref) for pref in appr_sets]
+        new_indices = np.fromiter((cand for pref in appr_sets
+                                   for cand in sorted(pref.approved)),
+                                  dtype=indices.dtype, count=sum(lengths))
+        first, last = int(indptr[start]), int(indptr[end])
+        new_indptr = first + np.cumsum(lengths, dtype=np.int64)
+        shift = first + sum(lengths) - last
+        indices = np.concatenate((indices[:first], new_indices, indices[last:]))
+        indptr = np.concatenate((indptr[:start + 1], new_indptr, indptr[end + 1:] + shift))
+        if appr_sets:
+            new_weights = [pref.weight for pref in appr_sets]
+            weights = np.concatenate(
+                (old_weights[:start], np.array(new_weights), old_weights[end:]))
+            if weights.dtype.kind not in "iuf":
+                weights = np.array(old_weights[:start].tolist() + new_weights
+                                   + old_weights[end:].tolist())
+        else:
+            weights = np.concatenate((old_weights[:start], old_weights[end:]))
+        for array in (indices, indptr, weights):
+            array.flags.writeable = False
+        self._csr = (indices, indptr)
+        self._weight_vector = weights
+
+    def csr(self):
+        """
+        Returns the approval sets in compressed sparse row (CSR) format.
+
+        The approval set of voter i consists of the candidates `indices[indptr[i]:indptr[i+1]]`,
+        sorted in increasing order. Both arrays are read-only and cached until the profile is
+        modified.
+
+        Returns
+        -------
+        indices : numpy.ndarray of int
+            approved candidates of all voters, concatenated
+        indptr : numpy.ndarray of int, shape (len(profile) + 1,)
+            offsets of the approval sets in `indices`
+
+        """
+        if self.storage == "csr":
+            self._flush_pending()
+        elif self._csr is None:
+            lengths = [len(pref) for pref in self._approval_sets]
+            indptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=indptr[1:])
+            indices = np.fromiter((cand for pref in self._approval_sets
+                                   for cand in sorted(pref.approved)),
+                                  dtype=_index_dtype(self.num_cand), count=indptr[-1])
+            indices.flags.writeable = False
+            indptr.flags.writeable = False
+            self._csr = (indices, indptr)
+        return self._csr
+
+    def approval_matrix(self):
+        """
+        Returns the approval sets as a voters x candidates matrix.
+
+        Entry `[i, c]` is True if and only if voter `i` approves candidate `c`. The matrix is
+        built on first access and cached until the profile is modified. It is read-only, copy it
+        if you need to modify it.
+
+        Note that the matrix requires `len(profile) * num_cand` bytes, which might be too much
+        for large profiles. Consider using `Profile.csr()` instead.
+
+        Returns
+        -------
+        matrix : numpy.ndarray of bool, shape (len(profile), num_cand)
+
+        """
+        if self._approval_matrix is None:
+            indices, indptr = self.csr()
+            rows = np.repeat(np.arange(len(self)), np.diff(indptr))
+            matrix = np.zeros((len(self), self.num_cand), dtype=bool)
+            matrix[rows, indices] = True
+            matrix.flags.writeable = False
+            self._approval_matrix = matrix
+        return self._approval_matrix
+
+    def weight_vector(self):
+        """
+        Returns the weights of all voters as vector (in the same order as the rows of
+        `Profile.approval_matrix()`).
+
+        The dtype is chosen by numpy, i.e., it is an integer or float dtype for int or float
+        weights and `object` for other numbers such as fractions. The vector is read-only.
+
+        Returns
+        -------
+        weights : numpy.ndarray, shape (len(profile),)
+
+        """
+        if self.storage == "csr":
+            self._flush_pending()
+        elif self._weight_vector is None:
+            weights = np.array([pref.weight for pref in self._approval_sets])
+            if len(weights) == 0:
+                weights = weights.astype(int)
+            weights.flags.writeable = False
+            self._weight_vector = weights
+        return self._weight_vector
+
+    def sum_over_approvers(self, voter_values):
+        """
+        For each candidate, the sum of `voter_values[v]` over all voters v approving it.
+
+        The sums are computed directly on the CSR representation (see `Profile.csr()`) and
+        voters are summed up in increasing order. Python numbers (e.g. fractions) are summed
+        exactly as they would be in a Python loop.
+
+        Parameters
+        ----------
+        voter_values : sequence of numbers
+            one value per voter, e.g., the weights of voters
+
+        Returns
+        -------
+        sums : list of length num_cand
+
+        """
+        indices, indptr = self.csr()
+        values = np.asarray(voter_values)
+        if values.dtype.kind not in "iuf":
+            values = np.array(list(voter_values), dtype=object)
+        sums = np.zeros(self.num_cand, dtype=values.dtype)
+        np.add.at(sums, indices, np.repeat(values, np.diff(indptr)))
+        return sums.tolist()
+
+    def approvers(self, cand):
+        """
+        Returns the voters approving candidate `cand` (in increasing order).
+
+        The inverted index (candidate -> approvers) is built for all candidates on first access
+        and cached until the profile is modified. It allows iterating only over the actual
+        approvers of a candidate instead of scanning all voters.
+
+        Parameters
+        ----------
+        cand : int
+
+        Returns
+        -------
+        voters : tuple of int
+
+        """
+        if self._approvers is None:
+            indices, indptr = self.csr()
+            voters = np.repeat(np.arange(len(self)), np.diff(indptr))
+            # stable sort keeps voters in increasing order
+            voters = voters[np.argsort(indices, kind="stable")].tolist()
+            counts = np.bincount(indices, minlength=self.num_cand).tolist()
+            self._approvers = []
+            start = 0
+            for count in counts:
+                self._approvers.append(tuple(voters[start:start + count]))
+                start += count
+        return self._approvers[cand]
+
+    def approvers_weight(self, cand):
+        """
+        Returns the total weight of all voters approving candidate `cand`.
+
+        Cached until the profile is modified (see `Profile.approvers()`).
+
+        Parameters
+        ----------
+        cand : int
+
+        Returns
+        -------
+        weight : int or float or fractions.Fraction
+
+        """
+        if self._approvers_weight is None:
+            self._approvers_weight = self.sum_over_approvers(self.weight_vector())
+        return self._approvers_weight[cand]
+
+    def memory_usage(self):
+        """
+        Approximate memory footprint of the profile in bytes.
+
+        Includes the stored approval sets (ApprovalSet objects or CSR arrays, depending on the
+        storage mode) as well as all cached data such as the approval matrix.
+
+        Returns
+        -------
+        nbytes : int
+
+        """
+        nbytes = 0
+        if self._approval_sets is not None:
+            nbytes += sys.getsizeof(self._approval_sets)
+            nbytes += sum(pref.memory_usage() for pref in self._approval_sets)
+        if self.storage == "csr":
+            nbytes += sys.getsizeof(self._pending)
+            nbytes += sum(pref.memory_usage() for pref in self._pending)
+        for array in (self._csr or ()) + (self._weight_vector, self._approval_matrix):
+            if array is not None:
+                nbytes += array.nbytes
+        return nbytes
+
+    def compressed(self):
+        """
+        Returns an equivalent profile where voters with identical approval sets are merged.
+
+        Each approval set occurs only once in the returned profile; its weight is the sum of the
+        weights of the merged voters. All weight-aware rules yield the same winning committees
+        for both profiles, but computations on the compressed profile scale with the number of
+        distinct approval sets instead of the number of voters. The result is cached until the
+        profile is modified and uses the same storage mode as this profile.
+
+        With float arithmetic, merging voters changes the order in which weights are summed.
+        Hence, rounding errors differ and scores that are (almost) tied can be resolved
+        differently than on the original profile; results with exact arithmetic are unchanged.
+
+        The returned profile has the attribute `original_voters`: `original_voters[i]` is the
+        list of voters (i.e., indices in this profile) that have been merged into voter `i`.
+
+        Returns
+        -------
+        compressed : Profile
+
+        """
+        if self._compressed is None:
+            indices, indptr = self.csr()
+            indices_list = indices.tolist()
+            groups = OrderedDict()
+            for v, (start, end) in enumerate(zip(indptr[:-1].tolist(), indptr[1:].tolist())):
+                groups.setdefault(tuple(indices_list[start:end]), []).append(v)
+            weights = self.weight_vector().tolist()
+            compressed = Profile.from_approval_sets(
+                self.num_cand, groups.keys(),
+                weights=[sum(weights[v] for v in voters) for voters in groups.values()],
+                cand_names=self.cand_names, storage=self.storage)
+            compressed.original_voters = list(groups.values())
+            self._compressed = compressed
+        return self._compressed
+
     def totalweight(self):
-        return sum(pref.weight for pref in self.approval_sets)
+        return sum(self.weight_vector().tolist())
 
     def has_unit_weights(self):
-        for p in self.approval_sets:
-            if p.weight != 1:
-                return False
-        return True
+        return bool((self.weight_vector() == 1).all())
 
     def __iter__(self):
+        if self.storage == "csr":
+            return self._iter_csr()
         return iter(self.approval_sets)
 
+    def _iter_csr(self):
+        indices, indptr = self.csr()
+        weights = self._weight_vector
+        weights = weights.tolist()
+        for v in range(len(indptr) - 1):
+            yield ApprovalSet(indices[indptr[v]:indptr[v + 1]].tolist(), weights[v])
+
     def __getitem__(self, i):
+        if self.storage == "csr":
+            if isinstance(i, slice):
+                # same as slicing the list of approval sets in storage mode "sets"
+                return [self[j] for j in range(*i.indices(len(self)))]
+            i = operator.index(i)
+            if i < 0:
+                i += len(self)
+            if not 0 <= i < len(self):
+                raise IndexError("profile index out of range")
+            indices, indptr = self.csr()
+            weight = _python_number(self._weight_vector[i])
+            return ApprovalSet(indices[indptr[i]:indptr[i + 1]].tolist(), weight)
         return self.approval_sets[i]
 
     def __str__(self):
@@ -116,13 +651,50 @@ class Profile(object):
         Is this party a party-list profile?
         In a party-list profile all approval sets are either
         disjoint or equal (see https://arxiv.org/abs/1704.02453).
+
+        Runs in time linear in the total size of all approval sets, the result is cached until
+        the profile is modified.
+        """
+        return self.party_partition() is not None
+
+    def party_partition(self):
         """
-        for pref1 in self.approval_sets:
-            for pref2 in self.approval_sets:
-                if ((len(pref1.approved & pref2.approved)
-                     not in [0, len(pref1.approved)])):
-                    return False
-        return True
+        Returns the parties of a party-list profile.
+
+        Each (non-empty) approval set in a party-list profile corresponds to a party, i.e.,
+        parties are disjoint sets of candidates. Candidates that are not approved by any voter
+        do not belong to a party. The result is cached until the profile is modified.
+
+        Returns
+        -------
+        parties : list of tuple of int or None
+            the parties (sorted tuples of candidates) in order of first occurrence in the
+            profile, or None if this is not a party-list profile
+
+        """
+        if self._party_partition is None:
+            indices, indptr = self.csr()
+            indices_list = indices.tolist()
+            party_ids = {}
+            cand_party = [None] * self.num_cand
+            is_party_list = True
+            for start, end in zip(indptr[:-1].tolist(), indptr[1:].tolist()):
+                if start == end:
+                    continue
+                party = tuple(indices_list[start:end])
+                if party in party_ids:
+                    continue
+                party_ids[party] = len(party_ids)
+                # every candidate may only belong to one party
+                for cand in party:
+                    if cand_party[cand] is not None:
+                        is_party_list = False
+                        break
+                    cand_party[cand] = party_ids[party]
+                if not is_party_list:
+                    break
+            self._party_partition = (list(party_ids) if is_party_list else None,)
+        return self._party_partition[0]
 
     def str_compact(self):
         compact = OrderedDict()
@@ -151,26 +723,135 @@ class Profile(object):
         return [list(pref.approved) for pref in self.approval_sets]
 
 
+def _index_dtype(num_cand):
+    """Smallest integer dtype used for storing candidates in CSR arrays."""
+    if num_cand <= np.iinfo(np.int32).max:
+        return np.int32
+    return np.int64
+
+
+def _python_number(value):
+    """Convert numpy scalars to the corresponding Python number."""
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _validate_csr(num_cand, indices, indptr, weights):
+    """
+    Validate approval sets given in CSR format (see `Profile.from_csr()`) in one vectorized pass.
+
+    Returns read-only copies of indices, indptr and weights, where the candidates of each
+    approval set are sorted in increasing order.
+    """
+    indices = np.array(indices)
+    if indices.size == 0:
+        indices = indices.astype(np.int64)
+    if indices.ndim != 1:
+        raise ValueError("indices must be a one-dimensional array")
+    if indices.dtype.kind not in "iu":
+        raise TypeError("Objects of type " + str(indices.dtype) + " not suitable as candidates")
+    indptr = np.array(indptr, dtype=np.int64)
+    if indptr.ndim != 1 or len(indptr) == 0 or indptr[0] != 0 or indptr[-1] != len(indices):
+        raise ValueError("indptr must start with 0 and end with len(indices)")
+    lengths = np.diff(indptr)
+    if (lengths < 0).any():
+        raise ValueError("indptr must be non-decreasing")
+    num_voters = len(lengths)
+
+    if indices.size > 0:
+        if indices.min() < 0 or indices.max() >= num_cand:
+            raise ValueError("approval sets not valid for num_cand = " + str(num_cand))
+        # sort candidates within each approval set and check for double entries
+        rows = np.repeat(np.arange(num_voters), lengths)
+        indices = indices[np.lexsort((indices, rows))]
+        doubles = (indices[1:] == indices[:-1]) & (rows[1:] == rows[:-1])
+        if doubles.any():
+            voter = rows[1:][doubles][0]
+            raise ValueError("double entries found in list of approved candidates of voter "
+                             + str(voter) + ": "
+                             + str(indices[indptr[voter]:indptr[voter + 1]].tolist()))
+    indices = indices.astype(_index_dtype(num_cand))
+
+    if weights is None:
+        weights = np.ones(num_voters, dtype=int)
+    else:
+        weights = np.array(weights)
+        if weights.shape != (num_voters,):
+            raise ValueError("weights must contain exactly one entry per voter")
+
+    for array in (indices, indptr, weights):
+        array.flags.writeable = False
+    return indices, indptr, weights
+
+
 class ApprovalSet:
     """
     A set of approved candidates by one voter.
+
+    Besides the set `approved`, approval sets are also available as bitmask (see
+    `ApprovalSet.bitmask` and `misc.bitmask()`), which allows to compute intersections and
+    symmetric differences with committees via bit operations.
+
+    Approval sets are immutable: `approved` is a frozenset and `weight` cannot be changed.
+    Two approval sets are equal if they have the same approved candidates and the same weight,
+    hence approval sets can be used as dict keys (e.g. for merging identical ballots). Note that
+    voters with the same approval set are thus indistinguishable as dict keys, use voter indices
+    instead.
     """
+    __slots__ = ("_approved", "_weight", "_bitmask")
+
     def __init__(self, approved, weight=1):
-        self.approved = set(approved)
-        self.weight = weight
+        self._approved = frozenset(approved)
+        self._weight = weight
+        self._bitmask = None
 
         # does not check for num_cand, because not known here
         self.check_valid(approved_raw=approved)
 
+    @property
+    def approved(self):
+        """The set of approved candidates (frozenset)."""
+        return self._approved
+
+    @property
+    def weight(self):
+        """The weight of this voter."""
+        return self._weight
+
     def __str__(self):
         return str(list(self.approved))
 
+    def __repr__(self):
+        return "ApprovalSet(" + str(sorted(self.approved)) + ", weight=" + str(self.weight) + ")"
+
+    def __eq__(self, other):
+        if not isinstance(other, ApprovalSet):
+            return NotImplemented
+        return self.approved == other.approved and self.weight == other.weight
+
+    def __hash__(self):
+        return hash((self.approved, self.weight))
+
     def __len__(self):
         return len(self.approved)
 
     def __iter__(self):
         return iter(self.approved)
 
+    @property
+    def bitmask(self):
+        """
+        The approved candidates as int bitmask, the c-th bit is set iff candidate c is approved.
+        """
+        if self._bitmask is None:
+            self._bitmask = bitmask(self.approved)
+        return self._bitmask
+
+    def memory_usage(self):
+        """Approximate memory footprint of this object in bytes."""
+        return sys.getsizeof(self) + sys.getsizeof(self.approved)
+
     def check_valid(self, num_cand=float('inf'), approved_raw=None):
         """
         Check if approved candidates are given as non-negative integers. If `num_cand` is known,
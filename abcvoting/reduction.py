@@ -0,0 +1,135 @@
+"""
+Reducing the set of candidates before computing winning committees
+"""
+
+from itertools import combinations, product
+import numpy as np
+from abcvoting.preferences import Profile
+from abcvoting.misc import sort_committees
+
+
+# remove_dominated="auto" only checks for dominated candidates if the number of remaining
+# candidates times the number of voters is at least this value
+DOMINANCE_MIN_SIZE = 10000
+
+
+class CandidateReduction:
+    """
+    Result of `reduce_candidates()`.
+
+    Attributes
+    ----------
+    cands : list of int
+        The remaining candidates (in increasing order).
+    profile : Profile
+        The profile restricted to `cands`; candidate i of this profile is `cands[i]`.
+    classes : list of list of int
+        Clones, i.e., candidates with identical sets of approvers (in increasing order),
+        excluding dominated candidates. Each candidate is contained in exactly one class.
+    """
+
+    def __init__(self, original_profile, cands, classes):
+        self.cands = cands
+        self.classes = classes
+        self._class_of = {}
+        for cand_class in classes:
+            for cand in cand_class:
+                self._class_of[cand] = cand_class
+        self.profile = _restrict_profile(original_profile, cands)
+
+    def original(self, committees):
+        """Translates committees of `profile` to committees of the original profile."""
+        return [[self.cands[cand] for cand in committee] for committee in committees]
+
+    def expand(self, committees, resolute=False):
+        """
+        Returns all committees of the original profile that are equivalent to the given
+        committees (consisting of candidates in `cands`), i.e., where clones are
+        replaced by other clones. If resolute is True, only the first committee is returned.
+        """
+        committees = sort_committees(committees)
+        if resolute:
+            return committees[:1]
+        expanded = set()
+        for committee in committees:
+            chosen = {}
+            for cand in committee:
+                chosen.setdefault(tuple(self._class_of[cand]), []).append(cand)
+            options = [combinations(cand_class, len(members))
+                       for cand_class, members in chosen.items()]
+            for choice in product(*options):
+                expanded.add(tuple(sorted(cand for members in choice for cand in members)))
+        return sort_committees(expanded)
+
+
+def reduce_candidates(profile, committeesize, remove_dominated=False):
+    """
+    Reduces the set of candidates that have to be considered for winning committees.
+
+    Clones (candidates with identical sets of approvers, e.g., candidates without approvers)
+    are interchangeable for all rules that only depend on which voters approve which committee
+    members; therefore, at most `committeesize` candidates of each class of clones are kept.
+
+    If remove_dominated is True, candidates are removed whose set of approvers is a proper
+    subset of the set of approvers of at least `committeesize` other candidates. This is
+    correct for Thiele methods with positive marginal scores (e.g., PAV, SLAV, geometric
+    rules) and voters with positive weights: replacing a committee member by a candidate
+    that dominates it strictly increases the score, hence a dominated candidate is only part
+    of a winning committee together with all candidates that dominate it.
+    The pairwise comparison takes time O(m^2 * n / 64) for m candidates and n voters. If
+    remove_dominated is "auto", it is only done if it can pay off, i.e., if more than
+    committeesize + 1 candidates remain after removing clones and m * n is at least
+    DOMINANCE_MIN_SIZE.
+
+    Returns
+    -------
+    reduction : CandidateReduction
+    """
+    clones = {}
+    for cand in range(profile.num_cand):
+        clones.setdefault(profile.approvers(cand), []).append(cand)
+
+    if remove_dominated == "auto":
+        num_remaining = sum(min(len(cand_class), committeesize)
+                            for cand_class in clones.values())
+        remove_dominated = (num_remaining > committeesize + 1
+                            and num_remaining * len(profile) >= DOMINANCE_MIN_SIZE)
+    if remove_dominated and (profile.weight_vector() > 0).all():
+        masks = {approvers: _bitmask(approvers, len(profile)) for approvers in clones}
+        dominated = []
+        for approvers, mask in masks.items():
+            num_dominating = 0
+            for other, other_mask in masks.items():
+                if other_mask != mask and other_mask & mask == mask:
+                    num_dominating += len(clones[other])
+                    if num_dominating >= committeesize:
+                        dominated.append(approvers)
+                        break
+        for approvers in dominated:
+            del clones[approvers]
+
+    classes = sorted(clones.values())
+    cands = sorted(cand for cand_class in classes for cand in cand_class[:committeesize])
+    return CandidateReduction(profile, cands, classes)
+
+
+def _bitmask(voters, num_voters):
+    """Returns the set of voters as int (bit i is set if voter i is contained)."""
+    contained = np.zeros(num_voters, dtype=bool)
+    contained[list(voters)] = True
+    return int.from_bytes(np.packbits(contained, bitorder="little").tobytes(), "little")
+
+
+def _restrict_profile(profile, cands):
+    """Returns the profile restricted to candidates `cands` (renamed to 0, 1, ...)."""
+    new_index = np.full(profile.num_cand, -1, dtype=np.int64)
+    new_index[cands] = np.arange(len(cands))
+    indices, indptr = profile.csr()
+    indices = new_index[indices]
+    kept = indices >= 0
+    # number of remaining approved candidates before each position
+    new_indptr = np.concatenate(([0], np.cumsum(kept)))[indptr]
+    return Profile.from_csr(len(cands), indices[kept], new_indptr,
+                            weights=profile.weight_vector(),
+                            cand_names=[profile.cand_names[cand] for cand in cands],
+                            storage=profile.storage)
@@ -3,47 +3,270 @@ Calculating all kinds of scores
 """
 
 
-try:
-    from gmpy2 import mpq as Fraction
-except ImportError:
-    from fractions import Fraction
+import fractions
 import functools
+import heapq
+import math
 from abcvoting.bipartite_matching import matching
-import networkx as nx
-from abcvoting.misc import hamming
+import numpy as np
+from abcvoting.misc import bitmask, popcount
+from abcvoting import numeric
+from abcvoting.numeric import Fraction
 
 
-# returns score function given its name
+ARITHMETICS = ("float", "exact", "auto")
+# relative tolerance (w.r.t. the total weight) for treating float scores as possibly tied
+FLOAT_TOLERANCE = 1e-9
+# number of score functions (per name and committee size) cached by get_scorefct
+SCOREFCT_CACHE_SIZE = 128
+
+
+class ScoreFunction:
+    """
+    Score function of a Thiele method with precomputed tables.
+
+    `scorefct(i)` is the marginal score of the i-th approved candidate in the committee.
+    Marginal and cumulative scores for i = 0, ..., committeesize are precomputed, both exact
+    (`marginal`, `cumulative`) and as floats (`marginal_float`, `cumulative_float`); larger
+    values of i are computed on demand. Instances are obtained via `get_scorefct()`.
+    """
+
+    def __init__(self, scorefct_str, fct, committeesize):
+        self.scorefct_str = scorefct_str
+        self.committeesize = committeesize
+        self._fct = fct
+        self.marginal = tuple(fct(i) for i in range(committeesize + 1))
+        cumulative = [0]
+        for i in range(1, committeesize + 1):
+            cumulative.append(cumulative[-1] + self.marginal[i])
+        self.cumulative = tuple(cumulative)
+        self.marginal_float = tuple(float(score) for score in self.marginal)
+        self.cumulative_float = tuple(float(score) for score in self.cumulative)
+
+    def __call__(self, i):
+        if i <= self.committeesize:
+            return self.marginal[i]
+        return self._fct(i)
+
+    def cumulative_score(self, i):
+        """Sum of marginal scores of the first i approved candidates in the committee."""
+        if i <= self.committeesize:
+            return self.cumulative[i]
+        return self.cumulative[-1] + sum(self._fct(j)
+                                         for j in range(self.committeesize + 1, i + 1))
+
+    def __repr__(self):
+        return ("ScoreFunction(" + repr(self.scorefct_str) + ", committeesize="
+                + str(self.committeesize) + ")")
+
+
+# returns score function given its name (cached per name and committee size)
+@functools.lru_cache(maxsize=SCOREFCT_CACHE_SIZE)
 def get_scorefct(scorefct_str, committeesize):
     if scorefct_str == 'pav':
-        return __pav_score_fct
+        fct = __pav_score_fct
     elif scorefct_str == 'slav':
-        return __slav_score_fct
+        fct = __slav_score_fct
     elif scorefct_str == 'cc':
-        return __cc_score_fct
+        fct = __cc_score_fct
     elif scorefct_str == 'av':
-        return __av_score_fct
+        fct = __av_score_fct
     elif scorefct_str[:4] == 'geom':
         base = Fraction(scorefct_str[4:])
-        return functools.partial(__geom_score_fct, base=base)
+        fct = functools.partial(__geom_score_fct, base=base)
     else:
         raise Exception("Score function", scorefct_str, "does not exist.")
+    return ScoreFunction(scorefct_str, fct, committeesize)
 
 
-def thiele_score(scorefct_str, profile, committee):
+def thiele_score(scorefct_str, profile, committee, arithmetic="exact"):
     """ computes the Thiele score of a committee subject to
     a given score function (scorefct_str)
+
+    arithmetic is either "exact" (fractions) or "float"
     """
     scorefct = get_scorefct(scorefct_str, len(committee))
+    if arithmetic == "float":
+        satisfaction = _satisfaction(profile, committee)
+        cumulative = np.array(scorefct.cumulative_float)
+        return float(np.dot(_float_weights(profile), cumulative[satisfaction]))
+    elif arithmetic != "exact":
+        raise ValueError("arithmetic must be either 'exact' or 'float'")
+    cumulative = scorefct.cumulative
+    committee_mask = bitmask(committee)
     score = 0
     for vote in profile:
-        cand_in_com = 0
-        for _ in set(committee) & vote.approved:
-            cand_in_com += 1
-            score += vote.weight * scorefct(cand_in_com)
+        score += vote.weight * cumulative[popcount(vote.bitmask & committee_mask)]
     return score
 
 
+def float_tolerance(profile):
+    """ float scores that differ by at most this value are treated as possibly tied
+    (and have to be compared exactly) """
+    return FLOAT_TOLERANCE * max(1.0, float(np.sum(_float_weights(profile))))
+
+
+def _float_weights(profile):
+    return np.array(profile.weight_vector().tolist(), dtype=float)
+
+
+def _satisfaction(profile, committee):
+    """ number of approved candidates in the committee, for each voter (as array) """
+    indices, indptr = profile.csr()
+    in_committee = np.zeros(profile.num_cand, dtype=np.int64)
+    in_committee[list(committee)] = 1
+    cumsum = np.concatenate(([0], np.cumsum(in_committee[indices])))
+    return cumsum[indptr[1:]] - cumsum[indptr[:-1]]
+
+
+def _float_table(scorefct, size):
+    """ float marginal scores scorefct(0), ..., scorefct(size) as array
+
+    scorefct is a ScoreFunction (using its precomputed table) or any other callable """
+    if isinstance(scorefct, ScoreFunction) and size <= scorefct.committeesize:
+        return np.array(scorefct.marginal_float[:size + 1])
+    return np.array([float(scorefct(i)) for i in range(size + 1)])
+
+
+class _ScaledIntBackend(numeric.NumericBackend):
+    """
+    Exact arithmetic with ints: a number x is represented by the int x * scale.
+
+    This avoids normalizing fractions (computing gcds) in every operation, but requires that
+    all denominators occurring in the computation divide `scale`. Otherwise, an
+    ArithmeticError is raised. Used internally by the trackers below; in contrast to the
+    backends in numeric.py, `div()` and `mul()` expect scaled ints as arguments.
+    """
+
+    name = "scaled-int"
+
+    def __init__(self, scale=1):
+        if int(scale) != scale or scale < 1:
+            raise ValueError("scale must be a positive integer")
+        self.scale = int(scale)
+
+    def number(self, value):
+        scaled = fractions.Fraction(value) * self.scale
+        if scaled.denominator != 1:
+            raise ArithmeticError(str(value) + " cannot be represented with scale "
+                                  + str(self.scale))
+        return int(scaled)
+
+    def div(self, x, y):
+        quotient, remainder = divmod(x * self.scale, y)
+        if remainder != 0:
+            raise ArithmeticError("quotient cannot be represented with scale "
+                                  + str(self.scale))
+        return quotient
+
+    def floor(self, value):
+        """Returns the largest number of this backend that is at most value."""
+        return math.floor(fractions.Fraction(value) * self.scale)
+
+    def mul(self, x, y):
+        """Returns x * y (the product of the int representations has to be rescaled)."""
+        product, remainder = divmod(x * y, self.scale)
+        if remainder != 0:
+            raise ArithmeticError("product cannot be represented with scale "
+                                  + str(self.scale))
+        return product
+
+    def to_fraction(self, x):
+        return Fraction(x, self.scale)
+
+    def to_float(self, x):
+        return x / self.scale
+
+    def __repr__(self):
+        return "_ScaledIntBackend(scale=" + str(self.scale) + ")"
+
+
+def _scaled_int_tables(scorefct, profile, size):
+    """ marginal scores scorefct(0), ..., scorefct(size) and weights as ints, together with the
+    corresponding _ScaledIntBackend (the product of a weight and a marginal score is
+    represented exactly); None if the profile has float weights or scorefct returns
+    non-integer floats """
+    weights = profile.weight_vector().tolist()
+    weight_scale = numeric.common_denominator(weights)
+    if weight_scale is None:
+        return None
+    table = [scorefct(i) for i in range(size + 1)]
+    table_scale = numeric.common_denominator(table)
+    if table_scale is None:
+        return None
+    backend = _ScaledIntBackend(weight_scale * table_scale)
+    return (backend,
+            [int(weight * weight_scale) for weight in weights],
+            [int(score * table_scale) for score in table])
+
+
+def thiele_scores_batch(scorefct_str, profile, committees, chunksize=None, arithmetic="exact"):
+    """ computes the Thiele scores of many committees at once subject to
+    a given score function (scorefct_str)
+
+    For a block of committees, the number of approved committee members is counted for all
+    voters (with identical approval sets merged) and committees simultaneously. Then, the total
+    weight of voters per count is multiplied with the cumulative score of this count.
+    Results are identical to `thiele_score` for int and fraction weights (float weights may
+    differ due to rounding).
+
+    chunksize is the number of committees processed at once; by default it is chosen such that
+    intermediate arrays have a few million entries.
+
+    arithmetic is either "exact" (fractions) or "float"
+    """
+    if arithmetic not in ("exact", "float"):
+        raise ValueError("arithmetic must be either 'exact' or 'float'")
+    committees = [list(committee) for committee in committees]
+    if not committees:
+        return []
+    max_size = max(len(committee) for committee in committees)
+    scorefct = get_scorefct(scorefct_str, max_size)
+    cumulative_scores = scorefct.cumulative
+
+    profile = profile.compressed()
+    indices, indptr = profile.csr()
+    weights = profile.weight_vector()
+    if arithmetic == "float":
+        weights = _float_weights(profile)
+    elif weights.dtype.kind not in "iu":
+        weights = np.array(weights.tolist(), dtype=object)
+    if chunksize is None:
+        chunksize = max(1, 2 ** 22 // max(len(indices), profile.num_cand, 1))
+
+    scores = []
+    for first in range(0, len(committees), chunksize):
+        chunk = committees[first:first + chunksize]
+        counts = _approved_counts(indices, indptr, _committee_matrix(chunk, profile.num_cand))
+        # total weight of voters per committee and count
+        weight_per_count = np.zeros((len(chunk), max_size + 1), dtype=weights.dtype)
+        rows = np.repeat(np.arange(len(chunk)), len(profile))
+        np.add.at(weight_per_count, (rows, counts.ravel()), np.tile(weights, len(chunk)))
+        if arithmetic == "float":
+            scores.extend((weight_per_count @ np.array(scorefct.cumulative_float)).tolist())
+            continue
+        for weight_row in weight_per_count.tolist():
+            scores.append(sum(score * weight for score, weight
+                              in zip(cumulative_scores[1:], weight_row[1:])))
+    return scores
+
+
+def _committee_matrix(committees, num_cand):
+    """0-1 matrix with one row per committee"""
+    in_committee = np.zeros((len(committees), num_cand), dtype=np.int64)
+    for i, committee in enumerate(committees):
+        in_committee[i, committee] = 1
+    return in_committee
+
+
+def _approved_counts(indices, indptr, in_committee):
+    """number of approved committee members, for each committee (row of in_committee)
+    and voter (given in CSR format)"""
+    cumsum = np.zeros((len(in_committee), len(indices) + 1), dtype=np.int64)
+    np.cumsum(in_committee[:, indices], axis=1, out=cumsum[:, 1:])
+    return cumsum[:, indptr[1:]] - cumsum[:, indptr[:-1]]
+
+
 def __geom_score_fct(i, base):
     if i == 0:
         return 0
@@ -82,46 +305,532 @@ def __cc_score_fct(i):
 
 
 def cumulative_score_fct(scorefct, cand_in_com):
+    if isinstance(scorefct, ScoreFunction):
+        return scorefct.cumulative_score(cand_in_com)
     return sum(scorefct(i + 1) for i in range(cand_in_com))
 
 
+class MarginalGainTracker:
+    """
+    Marginal gains of adding candidates to a committee that is changed incrementally.
+
+    Keeps the number of approved committee members for each voter (`satisfaction`), the
+    marginal gain of each candidate and the Thiele score of the committee. `add(c)` and
+    `remove(c)` only touch the voters approving c and the candidates on their ballots.
+
+    arithmetic is "exact" (fractions), "float" or "auto" (as in `marginal_thiele_scores_add`;
+    for "auto", `marginal_gains()` switches to exact values if the best candidates are almost
+    tied, whereas `score` is a float). For "exact" and int or fraction weights, all values are
+    kept as scaled ints internally (see `_ScaledIntBackend`) and converted to fractions
+    when returned.
+
+    `gains` (marginal gains, including candidates in the committee) and `raw_score` hold the
+    values in this internal representation; they can be compared with each other and
+    converted with `to_number()`.
+    """
+
+    def __init__(self, scorefct, profile, committee=(), arithmetic="exact"):
+        if arithmetic not in ARITHMETICS:
+            raise ValueError("arithmetic must be one of " + str(ARITHMETICS))
+        self.scorefct = scorefct
+        self.profile = profile
+        self.arithmetic = arithmetic
+        indices, indptr = profile.csr()
+        indices = indices.tolist()
+        self._ballots = [indices[start:end]
+                         for start, end in zip(indptr[:-1].tolist(), indptr[1:].tolist())]
+        self._backend = None
+        # marginal scores are needed up to the largest possible satisfaction plus one
+        max_satisfaction = max([len(ballot) for ballot in self._ballots], default=0)
+        scaled = None
+        if arithmetic == "exact":
+            scaled = _scaled_int_tables(scorefct, profile, max_satisfaction + 1)
+        if scaled is not None:
+            self._backend, self._weights, self._table = scaled
+        elif arithmetic == "exact":
+            self._weights = profile.weight_vector().tolist()
+            self._table = [scorefct(i) for i in range(max_satisfaction + 2)]
+        else:
+            self._weights = _float_weights(profile).tolist()
+            self._table = [float(scorefct(i)) for i in range(max_satisfaction + 2)]
+            self._tolerance = float_tolerance(profile)
+        # change of marginal gains of a voter whose satisfaction increases from sat to sat + 1
+        self._diff = [self._table[sat + 2] - self._table[sat + 1]
+                      for sat in range(max_satisfaction)]
+        self._cumulative = [0]
+        for i in range(1, max_satisfaction + 1):
+            self._cumulative.append(self._cumulative[-1] + self._table[i])
+        self.committee = []
+        self.satisfaction = [0] * len(profile)
+        self.raw_score = 0
+        self.gains = profile.sum_over_approvers([weight * self._table[1]
+                                                  for weight in self._weights])
+        for cand in committee:
+            self.add(cand)
+
+    def to_number(self, value):
+        """Converts a value in the internal representation into a fraction or float."""
+        if self._backend is None:
+            return value
+        return self._backend.to_fraction(value)
+
+    def from_number(self, value):
+        """Converts a number into the internal representation (rounded down if necessary)."""
+        if self._backend is None:
+            return value
+        return self._backend.floor(value)
+
+    @property
+    def score(self):
+        """Thiele score of the committee."""
+        return self.to_number(self.raw_score)
+
+    def add(self, cand):
+        """Add candidate `cand` to the committee."""
+        self.raw_score += self.gains[cand]
+        gains, satisfaction = self.gains, self.satisfaction
+        for v in self.profile.approvers(cand):
+            sat = satisfaction[v]
+            satisfaction[v] = sat + 1
+            delta = self._weights[v] * self._diff[sat]
+            if delta:
+                for c in self._ballots[v]:
+                    gains[c] += delta
+        self.committee.append(cand)
+
+    def remove(self, cand):
+        """Remove candidate `cand` from the committee."""
+        self.committee.remove(cand)
+        gains, satisfaction = self.gains, self.satisfaction
+        for v in self.profile.approvers(cand):
+            sat = satisfaction[v] - 1
+            satisfaction[v] = sat
+            delta = self._weights[v] * self._diff[sat]
+            if delta:
+                for c in self._ballots[v]:
+                    gains[c] -= delta
+        self.raw_score -= gains[cand]
+
+    def set_committee(self, committee):
+        """Change the committee to `committee` (by removing and adding candidates)."""
+        committee = list(committee)
+        prefix = 0
+        while (prefix < min(len(committee), len(self.committee))
+               and committee[prefix] == self.committee[prefix]):
+            prefix += 1
+        for cand in reversed(self.committee[prefix:]):
+            self.remove(cand)
+        for cand in committee[prefix:]:
+            self.add(cand)
+
+    def marginal_gains(self):
+        """
+        Returns a list of length num_cand with the marginal score increase gained by adding
+        each candidate (-1 for candidates in the committee), see `marginal_thiele_scores_add`.
+        """
+        if self._backend is None:
+            marg = list(self.gains)
+        else:
+            marg = [self.to_number(gain) for gain in self.gains]
+        for c in self.committee:
+            marg[c] = -1
+        if self.arithmetic == "auto" and len(self.committee) < self.profile.num_cand:
+            best = max(marg)
+            if sum(1 for score in marg if score >= best - self._tolerance) > 1:
+                return marginal_thiele_scores_add(self.scorefct, self.profile, self.committee)
+        return marg
+
+    def best_gains_sum(self, num, first_cand=0):
+        """
+        Returns the sum of the `num` largest marginal gains of candidates
+        first_cand, first_cand + 1, ... that are not in the committee
+        (as `marginal_gains()`, but without switching to exact values for "auto").
+        """
+        committee = set(self.committee)
+        gains = sorted(gain for cand, gain in enumerate(self.gains[first_cand:], first_cand)
+                       if cand not in committee)
+        return self.to_number(sum(gains[max(0, len(gains) - num):]))
+
+    def satisfaction_bound(self, available, num):
+        """
+        Returns an upper bound on the score increase (in the internal representation) that
+        can be achieved by adding `num` candidates, if voter v approves `available[v]` of the
+        candidates that can be added: each voter gains at most the marginal scores of
+        min(num, available[v]) additional approved committee members.
+        """
+        cumulative = self._cumulative
+        bound = 0
+        for weight, sat, avail in zip(self._weights, self.satisfaction, available):
+            if avail:
+                bound += weight * (cumulative[sat + (avail if avail < num else num)]
+                                   - cumulative[sat])
+        return bound
+
+    def copy(self):
+        """Returns an independent copy of this tracker."""
+        other = MarginalGainTracker.__new__(MarginalGainTracker)
+        other.__dict__.update(self.__dict__)
+        other.committee = list(self.committee)
+        other.satisfaction = list(self.satisfaction)
+        other.gains = list(self.gains)
+        return other
+
+
+class RemovalCostTracker:
+    """
+    Removal costs (marginal score losses) of candidates for reverse sequential Thiele methods.
+
+    Starts with the committee containing all candidates. `remove(c)` only updates the voters
+    approving c and the candidates on their ballots; removal costs are kept in a heap (with
+    lazy deletion of outdated entries), hence `cheapest()` does not need to scan all
+    candidates.
+
+    arithmetic is "exact" (fractions), "float" or "auto" (floats, but candidates whose removal
+    costs are almost tied are compared exactly). As for `MarginalGainTracker`, "exact" uses
+    scaled ints internally if weights are ints or fractions.
+    """
+
+    def __init__(self, scorefct, profile, arithmetic="exact"):
+        if arithmetic not in ARITHMETICS:
+            raise ValueError("arithmetic must be one of " + str(ARITHMETICS))
+        self.scorefct = scorefct
+        self.profile = profile
+        self.arithmetic = arithmetic
+        indices, indptr = profile.csr()
+        indices = indices.tolist()
+        self._ballots = [indices[start:end]
+                         for start, end in zip(indptr[:-1].tolist(), indptr[1:].tolist())]
+        self._exact_weights = profile.weight_vector().tolist()
+        self._backend = None
+        max_satisfaction = max([len(ballot) for ballot in self._ballots], default=0)
+        scaled = None
+        if arithmetic == "exact":
+            scaled = _scaled_int_tables(scorefct, profile, max_satisfaction)
+        if scaled is not None:
+            self._backend, self._weights, self._table = scaled
+            self._tolerance = 0
+        elif arithmetic == "exact":
+            self._weights = self._exact_weights
+            self._table = [scorefct(i) for i in range(max_satisfaction + 1)]
+            self._tolerance = 0
+        else:
+            self._weights = _float_weights(profile).tolist()
+            self._table = _float_table(scorefct, max_satisfaction).tolist()
+            self._tolerance = float_tolerance(profile) if arithmetic == "auto" else 0
+        self.committee = [True] * profile.num_cand
+        self.committeesize = profile.num_cand
+        self.satisfaction = [len(ballot) for ballot in self._ballots]
+        self._score = sum(weight * sum(self._marginal(i) for i in range(1, sat + 1))
+                         for weight, sat in zip(self._weights, self.satisfaction))
+        self._costs = profile.sum_over_approvers(
+            [weight * self._marginal(sat)
+             for weight, sat in zip(self._weights, self.satisfaction)])
+        # heap entries: (cost, -cand, stamp); entries with an outdated stamp are ignored
+        self._stamps = [0] * profile.num_cand
+        self._heap = [(cost, -cand, 0) for cand, cost in enumerate(self._costs)]
+        heapq.heapify(self._heap)
+
+    def _marginal(self, i):
+        if i < len(self._table):
+            return self._table[i]
+        if self.arithmetic == "exact":
+            return self.scorefct(i)
+        return float(self.scorefct(i))
+
+    def _exact_cost(self, cand):
+        return sum(self._exact_weights[v] * self.scorefct(self.satisfaction[v])
+                   for v in self.profile.approvers(cand))
+
+    def _convert(self, value):
+        if self._backend is None:
+            return value
+        return self._backend.to_fraction(value)
+
+    @property
+    def score(self):
+        """Thiele score of the committee."""
+        return self._convert(self._score)
+
+    def cost(self, cand):
+        """Marginal score loss of removing candidate `cand` from the committee."""
+        return self._convert(self._costs[cand])
+
+    def cheapest(self):
+        """
+        Returns the smallest removal cost and all candidates in the committee with this
+        removal cost (in increasing order).
+        """
+        candidates = []
+        while self._heap:
+            cost, neg_cand, stamp = self._heap[0]
+            if not self.committee[-neg_cand] or stamp != self._stamps[-neg_cand]:
+                heapq.heappop(self._heap)  # outdated entry
+                continue
+            if candidates and cost > candidates[0][0] + self._tolerance:
+                break
+            candidates.append(heapq.heappop(self._heap))
+        for entry in candidates:
+            heapq.heappush(self._heap, entry)
+        if self.arithmetic == "auto" and len(candidates) > 1:
+            exact_costs = {-neg_cand: self._exact_cost(-neg_cand)
+                           for _, neg_cand, _ in candidates}
+            min_cost = min(exact_costs.values())
+            return min_cost, sorted(cand for cand, cost in exact_costs.items()
+                                    if cost == min_cost)
+        min_cost = candidates[0][0]
+        return self._convert(min_cost), sorted(-neg_cand for cost, neg_cand, _ in candidates
+                                if cost == min_cost)
+
+    def remove(self, cand):
+        """Remove candidate `cand` from the committee."""
+        self._score -= self._costs[cand]
+        self.committee[cand] = False
+        self.committeesize -= 1
+        changed = set()
+        for v in self.profile.approvers(cand):
+            sat = self.satisfaction[v]
+            delta = self._weights[v] * (self._marginal(sat - 1) - self._marginal(sat))
+            self.satisfaction[v] = sat - 1
+            for c in self._ballots[v]:
+                if self.committee[c]:
+                    self._costs[c] += delta
+                    changed.add(c)
+        for c in changed:
+            self._stamps[c] += 1
+            heapq.heappush(self._heap, (self._costs[c], -c, self._stamps[c]))
+
+    def copy(self):
+        """Returns an independent copy of this tracker."""
+        other = RemovalCostTracker.__new__(RemovalCostTracker)
+        other.__dict__.update(self.__dict__)
+        for attr in ("committee", "satisfaction", "_costs", "_stamps", "_heap"):
+            setattr(other, attr, list(getattr(self, attr)))
+        return other
+
+
 # returns a list of length num_cand
 # the i-th entry contains the marginal score increase
 #  gained by adding candidate i
-def marginal_thiele_scores_add(scorefct, profile, committee):
-    marg = [0] * profile.num_cand
-    for pref in profile:
-        for c in pref:
-            if pref.approved & set(committee):
-                marg[c] += pref.weight * scorefct(len(pref.approved &
-                                                      set(committee)) + 1)
-            else:
-                marg[c] += pref.weight * scorefct(1)
+#
+# arithmetic: "exact" (fractions), "float" or "auto";
+# "auto" computes floats and switches to exact values if the best candidates are (almost) tied
+def marginal_thiele_scores_add(scorefct, profile, committee, arithmetic="exact"):
+    if arithmetic not in ARITHMETICS:
+        raise ValueError("arithmetic must be one of " + str(ARITHMETICS))
+    satisfaction = _satisfaction(profile, committee)
+    if arithmetic == "exact":
+        # the marginal gain of a voter is the same for all candidates approved by this voter
+        marg = profile.sum_over_approvers(
+            [weight * scorefct(sat + 1)
+             for weight, sat in zip(profile.weight_vector().tolist(), satisfaction.tolist())])
+    else:
+        table = _float_table(scorefct, len(committee) + 1)
+        marg = profile.sum_over_approvers(_float_weights(profile) * table[satisfaction + 1])
     for c in committee:
         marg[c] = -1
+    if arithmetic == "auto" and len(committee) < profile.num_cand:
+        best = max(marg)
+        if sum(1 for score in marg if score >= best - float_tolerance(profile)) > 1:
+            return marginal_thiele_scores_add(scorefct, profile, committee)
     return marg
 
 
-def marginal_thiele_scores_remove(scorefct, profile, committee):
-    marg_util_cand = [0] * profile.num_cand
-    #  marginal utility gained by adding candidate to the committee
-    for pref in profile:
-        for c in pref:
-            satisfaction = len(pref.approved.intersection(committee))
-            marg_util_cand[c] += pref.weight * scorefct(satisfaction)
+# arithmetic: see marginal_thiele_scores_add; "auto" checks for ties between the candidates
+# with smallest marginal loss
+def marginal_thiele_scores_remove(scorefct, profile, committee, arithmetic="exact"):
+    if arithmetic not in ARITHMETICS:
+        raise ValueError("arithmetic must be one of " + str(ARITHMETICS))
+    if arithmetic == "exact":
+        marg_util_cand = [0] * profile.num_cand
+        committee_mask = bitmask(committee)
+        #  marginal utility gained by adding candidate to the committee
+        for pref in profile:
+            satisfaction = popcount(pref.bitmask & committee_mask)
+            loss = pref.weight * scorefct(satisfaction)
+            for c in pref:
+                marg_util_cand[c] += loss
+    else:
+        satisfaction = _satisfaction(profile, committee)
+        table = _float_table(scorefct, len(committee))
+        marg_util_cand = profile.sum_over_approvers(
+            _float_weights(profile) * table[satisfaction])
+    # do not choose candidates that already have been removed
+    large = max(marg_util_cand) + 1
+    committee = set(committee)
     for c in range(profile.num_cand):
         if c not in committee:
-            # do not choose candidates that already have been removed
-            marg_util_cand[c] = max(marg_util_cand) + 1
+            marg_util_cand[c] = large
+    if arithmetic == "auto" and len(committee) > 0:
+        smallest = min(marg_util_cand)
+        tolerance = float_tolerance(profile)
+        if sum(1 for score in marg_util_cand if score <= smallest + tolerance) > 1:
+            return marginal_thiele_scores_remove(scorefct, profile, committee)
     return marg_util_cand
 
 
 def monroescore(profile, committee):
-    if len(profile) % len(committee) == 0:
-        # faster
-        return monroescore_matching(profile, committee)
-    else:
-        return monroescore_flowbased(profile, committee)
+    """Returns Monroe score of a given committee.
+    Voters with identical approval sets are merged and the score is computed
+    by `MonroeScoreEngine`."""
+    return MonroeScoreEngine(profile.compressed()).score(committee)
+
+
+class MonroeScoreEngine:
+    """
+    Computes Monroe scores as capacitated assignment of voters to committee members.
+
+    The Monroe score of a committee of size k is the maximum number of voters that can be
+    assigned to an approved committee member, where each committee member is assigned
+    floor(n/k) or ceil(n/k) voters. This is solved as maximum flow (Dinic's algorithm) on
+    integer arrays: source -> voter (capacity = weight) -> approved committee member ->
+    sink (capacity floor(n/k)) and, for the n mod k larger districts, committee member ->
+    extra node (capacity 1) -> sink (capacity n mod k).
+
+    Voter weights must be integers and are interpreted as number of voters with this
+    approval set (e.g., for profiles returned by `Profile.compressed()`).
+
+    The engine stores the assignment of the last committee: scoring a committee of the same
+    size starts from this assignment (restricted to the new committee), which is
+    much faster if both committees differ only in a few members.
+    """
+
+    def __init__(self, profile):
+        weights = profile.weight_vector().tolist()
+        if any(int(weight) != weight or weight < 0 for weight in weights):
+            raise ValueError("Monroe scores require non-negative integer weights")
+        self.profile = profile
+        self.weights = [int(weight) for weight in weights]
+        self.num_voters = sum(self.weights)
+        self._committee = None
+        # number of voters assigned to a committee member: {(voter, cand): number}
+        self._assignment = {}
+
+    def score(self, committee):
+        committee = sorted(set(committee))
+        committeesize = len(committee)
+        lower_bound = self.num_voters // committeesize
+        overflow = self.num_voters - committeesize * lower_bound
+        num_voters = len(self.weights)
+
+        # nodes: 0 = source, 1..num_voters = voters, then committee members, extra node, sink
+        cand_node = {cand: num_voters + 1 + i for i, cand in enumerate(committee)}
+        extra = num_voters + committeesize + 1
+        sink = extra + 1
+        graph = _FlowGraph(sink + 1)
+        source_edges = [graph.add_edge(0, v + 1, weight) for v, weight in enumerate(self.weights)]
+        assignment_edges = {}
+        for cand in committee:
+            for v in self.profile.approvers(cand):
+                assignment_edges[(v, cand)] = graph.add_edge(
+                    v + 1, cand_node[cand], self.weights[v])
+        sink_edges = {cand: graph.add_edge(cand_node[cand], sink, lower_bound)
+                      for cand in committee}
+        extra_edges = {cand: graph.add_edge(cand_node[cand], extra, 1) for cand in committee}
+        overflow_edge = graph.add_edge(extra, sink, overflow)
+
+        if self._committee is not None and len(self._committee) == committeesize:
+            # warm start: keep the previous assignment for the remaining committee members
+            load = dict.fromkeys(committee, 0)
+            for (v, cand), num in self._assignment.items():
+                if cand in load:
+                    graph.push(assignment_edges[(v, cand)], num)
+                    graph.push(source_edges[v], num)
+                    load[cand] += num
+            for cand, num in load.items():
+                graph.push(sink_edges[cand], min(num, lower_bound))
+                if num > lower_bound:
+                    graph.push(extra_edges[cand], 1)
+                    graph.push(overflow_edge, 1)
+
+        graph.max_flow(0, sink)
+        self._committee = committee
+        self._assignment = {}
+        for key, edge in assignment_edges.items():
+            num = graph.flow(edge)
+            if num > 0:
+                self._assignment[key] = num
+        return sum(graph.flow(edge) for edge in source_edges)
+
+    def assignment(self):
+        """
+        The assignment of satisfied voters computed by the last call of `score()`, as dict
+        {(voter, cand): number of voters}.
+        """
+        return dict(self._assignment)
+
+
+class _FlowGraph:
+    """Residual graph for maximum flow computations (edge e and e ^ 1 are reverse edges)."""
+
+    def __init__(self, num_nodes):
+        self.adj = [[] for _ in range(num_nodes)]
+        self.to = []
+        self.cap = []
+        self.capacity = []
+
+    def add_edge(self, u, v, capacity):
+        edge = len(self.to)
+        self.to += [v, u]
+        self.cap += [capacity, 0]
+        self.capacity += [capacity, 0]
+        self.adj[u].append(edge)
+        self.adj[v].append(edge + 1)
+        return edge
+
+    def push(self, edge, amount):
+        self.cap[edge] -= amount
+        self.cap[edge ^ 1] += amount
+
+    def flow(self, edge):
+        return self.capacity[edge] - self.cap[edge]
+
+    def max_flow(self, source, sink):
+        """Augments the current flow to a maximum flow (Dinic's algorithm)."""
+        adj, to, cap = self.adj, self.to, self.cap
+        total = 0
+        while True:
+            # BFS: compute levels in the residual graph
+            level = [-1] * len(adj)
+            level[source] = 0
+            queue = [source]
+            for u in queue:
+                for edge in adj[u]:
+                    if cap[edge] > 0 and level[to[edge]] < 0:
+                        level[to[edge]] = level[u] + 1
+                        queue.append(to[edge])
+            if level[sink] < 0:
+                return total
+            # DFS: find a blocking flow
+            pointer = [0] * len(adj)
+            path = []
+            u = source
+            while True:
+                if u == sink:
+                    amount = min(cap[edge] for edge in path)
+                    for edge in path:
+                        cap[edge] -= amount
+                        cap[edge ^ 1] += amount
+                    total += amount
+                    path = []
+                    u = source
+                    continue
+                edges = adj[u]
+                i = pointer[u]
+                while i < len(edges) and not (cap[edges[i]] > 0
+                                              and level[to[edges[i]]] == level[u] + 1):
+                    i += 1
+                pointer[u] = i
+                if i < len(edges):
+                    path.append(edges[i])
+                    u = to[edges[i]]
+                elif u == source:
+                    break
+                else:
+                    # dead end
+                    level[u] = -1
+                    edge = path.pop()
+                    u = to[edge ^ 1]
+                    pointer[u] += 1
 
 
 def monroescore_matching(profile, committee):
@@ -133,10 +842,7 @@ def monroescore_matching(profile, committee):
     graph = {}
     sizeofdistricts = len(profile) // len(committee)
     for cand in committee:
-        interestedvoters = []
-        for i in range(len(profile)):
-            if cand in profile[i]:
-                interestedvoters.append(i)
+        interestedvoters = list(profile.approvers(cand))
         for j in range(sizeofdistricts):
             graph[str(cand) + "/" + str(j)] = interestedvoters
     m, _, _ = matching.bipartiteMatch(graph)
@@ -147,6 +853,8 @@ def monroescore_flowbased(profile, committee):
     """Returns Monroe score of a given committee.
     Uses a flow-based algorithm that works even if
     committeesize does not divide the number of voters"""
+    import networkx as nx
+
     graph = nx.DiGraph()
     committeesize = len(committee)
     # the lower bound of the size of districts
@@ -163,7 +871,7 @@ def monroescore_flowbased(profile, committee):
         voter_name = 'v' + str(i)
         graph.add_node(voter_name, demand=-1)
         for cand in committee:
-            if cand in vote:
+            if vote.bitmask >> cand & 1:
                 graph.add_edge(voter_name, cand, weight=0, capacity=1)
             else:
                 graph.add_edge(voter_name, cand, weight=1, capacity=1)
@@ -173,10 +881,76 @@ def monroescore_flowbased(profile, committee):
     return len(profile) - nx.capacity_scaling(graph)[0]
 
 
-def mavscore(profile, committee):
+def mavscore(profile, committee, cutoff=None):
+    """Returns the MAV score of a committee, i.e., the largest Hamming distance
+    between the committee and an approval set (weights are ignored).
+
+    If cutoff is given, the computation stops as soon as a distance larger than cutoff
+    is found; this distance (not necessarily the MAV score) is returned."""
     score = 0
+    committee_mask = bitmask(committee)
     for pref in profile:
-        hamdistance = hamming(pref, committee)
+        hamdistance = popcount(pref.bitmask ^ committee_mask)
         if hamdistance > score:
             score = hamdistance
+            if cutoff is not None and score > cutoff:
+                break
     return score
+
+
+def mavscores_batch(profile, committees, cutoff=None, chunksize=None):
+    """Returns the MAV scores of many committees at once.
+
+    Hamming distances are computed for all voters (with identical approval sets merged)
+    and a block of committees simultaneously, as |A| + |W| - 2 |A ∩ W|.
+
+    If cutoff is given, voters are processed in blocks of increasing size and committees
+    are discarded as soon as a distance larger than cutoff is found; for these committees a
+    value larger than cutoff (not necessarily the MAV score) is returned. Scores that are at
+    most cutoff are exact.
+
+    chunksize is the number of committees processed at once; by default it is chosen such that
+    intermediate arrays have a few million entries."""
+    committees = [list(committee) for committee in committees]
+    if not committees:
+        return []
+    profile = profile.compressed()
+    indices, indptr = profile.csr()
+    ballot_sizes = np.diff(indptr)
+    num_voters = len(ballot_sizes)
+    if chunksize is None:
+        chunksize = max(1, 2 ** 22 // max(len(indices), profile.num_cand, 1))
+
+    scores = []
+    for first in range(0, len(committees), chunksize):
+        chunk = committees[first:first + chunksize]
+        in_committee = _committee_matrix(chunk, profile.num_cand)
+        committee_sizes = np.array([len(committee) for committee in chunk])
+        chunk_scores = np.zeros(len(chunk), dtype=np.int64)
+        alive = np.arange(len(chunk))
+        start = 0
+        blocksize = num_voters if cutoff is None else 16
+        while start < num_voters and len(alive) > 0:
+            end = min(num_voters, start + blocksize)
+            counts = _approved_counts(indices[indptr[start]:indptr[end]],
+                                      indptr[start:end + 1] - indptr[start],
+                                      in_committee[alive])
+            distances = (ballot_sizes[start:end][np.newaxis, :]
+                         + committee_sizes[alive][:, np.newaxis] - 2 * counts)
+            chunk_scores[alive] = np.maximum(chunk_scores[alive], distances.max(axis=1))
+            if cutoff is not None:
+                alive = alive[chunk_scores[alive] <= cutoff]
+            start = end
+            blocksize *= 2
+        scores.extend(chunk_scores.tolist())
+    return scores
+
+
+def hamming_distances_batch(profile, committees):
+    """Returns the Hamming distances between all approval sets and committees
+    as array of shape (number of committees, number of voters)."""
+    committees = [list(committee) for committee in committees]
+    indices, indptr = profile.csr()
+    counts = _approved_counts(indices, indptr, _committee_matrix(committees, profile.num_cand))
+    committee_sizes = np.array([len(committee) for committee in committees], dtype=np.int64)
+    return np.diff(indptr)[np.newaxis, :] + committee_sizes[:, np.newaxis] - 2 * counts
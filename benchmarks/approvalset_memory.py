@@ -0,0 +1,58 @@
+"""Memory benchmark: per-voter memory of ApprovalSet objects
+
+Compares the current (slotted, frozenset-backed) ApprovalSet with a plain class holding
+a mutable set in its instance dict (the previous implementation) and with the CSR storage
+mode of Profile.
+
+Usage: python approvalset_memory.py [num_voters]
+"""
+
+from __future__ import print_function
+import sys
+import random
+import tracemalloc
+sys.path.insert(0, '..')
+from abcvoting.preferences import Profile, ApprovalSet
+
+
+class DictApprovalSet:
+    """Previous layout of ApprovalSet: instance dict with a mutable set and a weight."""
+    def __init__(self, approved, weight=1):
+        self.approved = set(approved)
+        self.weight = weight
+
+
+def measure(func):
+    tracemalloc.start()
+    result = func()
+    nbytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return nbytes
+
+
+def main(num_voters=10 ** 6, num_cand=50, setsize=4):
+    random.seed(42)
+    apprsets = [random.sample(range(num_cand), setsize) for _ in range(num_voters)]
+
+    results = [
+        ("dict + set", measure(lambda: [DictApprovalSet(appr) for appr in apprsets])),
+        ("ApprovalSet", measure(lambda: [ApprovalSet(appr) for appr in apprsets])),
+        ("Profile (sets)", measure(lambda: Profile.from_approval_sets(
+            num_cand, apprsets).approval_sets)),
+        ("Profile (csr)", measure(lambda: Profile.from_approval_sets(
+            num_cand, apprsets, storage="csr"))),
+    ]
+
+    print(f"{num_voters} voters, {num_cand} candidates, {setsize} approved candidates each")
+    baseline = results[0][1]
+    for name, nbytes in results:
+        print(f"{name:>16}: {nbytes / num_voters:7.1f} bytes per voter"
+              f" ({100 * nbytes / baseline:5.1f}%)")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main(num_voters=int(sys.argv[1]))
+    else:
+        main()
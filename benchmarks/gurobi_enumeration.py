@@ -0,0 +1,52 @@
+"""Benchmark: enumerating all optimal committees with Gurobi (see abcvoting/abcrules_gurobi.py)
+
+Highly tied profiles (every candidate is approved by the same number of voters and no two
+candidates share a voter) have many optimal committees. Compares the strategies of
+GUROBI_ENUMERATION: "rebuild" (a new model for each optimal committee), "incremental" (one
+model, no-good cuts are added incrementally) and "pool" (one model, all optimal committees
+are taken from Gurobi's solution pool).
+
+Usage: python gurobi_enumeration.py [num_cand]
+"""
+
+from __future__ import print_function
+import sys
+import time
+sys.path.insert(0, '..')
+from abcvoting import abcrules
+from abcvoting import abcrules_gurobi
+from abcvoting.preferences import Profile
+
+
+def tied_profile(num_cand, voters_per_cand=2):
+    profile = Profile(num_cand)
+    profile.add_voters([[cand] for cand in range(num_cand) for _ in range(voters_per_cand)])
+    return profile
+
+
+def main(num_cand=10, committeesize=3):
+    if not abcrules_gurobi.available:
+        print("This benchmark requires gurobipy")
+        return
+    profile = tied_profile(num_cand)
+    print(f"{num_cand} candidates, committee size {committeesize}")
+    enumeration = abcrules_gurobi.GUROBI_ENUMERATION
+    for rule_id in ["pav", "cc", "mav", "monroe"]:
+        results = {}
+        for strategy in ["rebuild", "incremental", "pool"]:
+            abcrules_gurobi.GUROBI_ENUMERATION = strategy
+            start = time.perf_counter()
+            results[strategy] = abcrules.compute(rule_id, profile, committeesize,
+                                                 algorithm="gurobi", resolute=False)
+            seconds = time.perf_counter() - start
+            print(f"{rule_id:>8} {strategy:>12}: {len(results[strategy]):5} committees, "
+                  f"{seconds:7.3f} s")
+        abcrules_gurobi.GUROBI_ENUMERATION = enumeration
+        assert results["rebuild"] == results["incremental"] == results["pool"]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main(num_cand=int(sys.argv[1]))
+    else:
+        main()
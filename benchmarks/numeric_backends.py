@@ -0,0 +1,83 @@
+"""Benchmark: numeric backends (see abcvoting/numeric.py)
+
+Part 1 accumulates weighted PAV marginal scores (as done by the trackers in scores.py) with
+every available backend. Part 2 runs rules with float and exact arithmetic: Thiele methods
+via the parameter `arithmetic` (exact computations use scaled ints for int weights), the
+other rules via algorithm="standard" (float) and "exact-fractions" (with fractions.Fraction
+and, if available, gmpy2).
+
+Usage: python numeric_backends.py [num_voters]
+"""
+
+from __future__ import print_function
+import sys
+import time
+import random
+sys.path.insert(0, '..')
+from abcvoting import numeric
+from abcvoting import scores
+from abcvoting import abcrules
+from abcvoting.preferences import Profile
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def accumulate(backend, satisfactions, committeesize):
+    table = [backend.number(0)] + [backend.div(backend.number(1), backend.number(i))
+                                   for i in range(1, committeesize + 1)]
+    total = backend.number(0)
+    for sat in satisfactions:
+        total += table[sat]
+    return total
+
+
+def exact_backends():
+    names = ["fraction"]
+    if numeric.gmpy2_available:
+        names.append("gmpy2")
+    return names
+
+
+def main(num_voters=2000, num_cand=30, committeesize=8):
+    random.seed(42)
+    print(f"Part 1: summing {10 ** 6} PAV marginal scores (committee size {committeesize})")
+    satisfactions = [random.randint(0, committeesize) for _ in range(10 ** 6)]
+    lcm = numeric.common_denominator(numeric.Fraction(1, i) for i in range(1, committeesize + 1))
+    backends = [numeric.get_backend(name) for name in ["float"] + exact_backends()]
+    backends.append(scores._ScaledIntBackend(scale=lcm))
+    for backend in backends:
+        seconds = timed(lambda: accumulate(backend, satisfactions, committeesize))
+        print(f"{backend.name:>12}: {seconds:7.3f} s")
+
+    print(f"\nPart 2: {num_voters} voters, {num_cand} candidates, committee size {committeesize}")
+    profile = Profile(num_cand)
+    profile.add_voters([random.sample(range(num_cand), random.randint(1, 6))
+                        for _ in range(num_voters)])
+    for rule_id in ["seqpav", "revseqpav", "pav"]:
+        for arithmetic in ["float", "exact", "auto"]:
+            seconds = timed(lambda: abcrules.compute(
+                rule_id, profile, committeesize, resolute=True, arithmetic=arithmetic))
+            print(f"{rule_id:>12} {arithmetic:>16}: {seconds:7.3f} s")
+    gmpy2_available = numeric.gmpy2_available
+    for rule_id in ["seqphrag", "rule-x", "phrag-enestr", "consensus"]:
+        seconds = timed(lambda: abcrules.compute(
+            rule_id, profile, committeesize, algorithm="standard", resolute=True))
+        print(f"{rule_id:>12} {'float':>16}: {seconds:7.3f} s")
+        for name in exact_backends():
+            # "exact-fractions" uses gmpy2 if available
+            numeric.gmpy2_available = (name == "gmpy2")
+            seconds = timed(lambda: abcrules.compute(
+                rule_id, profile, committeesize, algorithm="exact-fractions", resolute=True))
+            numeric.gmpy2_available = gmpy2_available
+            print(f"{rule_id:>12} {name:>16}: {seconds:7.3f} s")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main(num_voters=int(sys.argv[1]))
+    else:
+        main()
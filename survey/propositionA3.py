@@ -117,16 +117,14 @@ for inst in monotonicity_instances:
 
     if addvoter:
         print("additional voter: " + misc.str_candset(extravote, cand_names))
-        apprsets.append(extravote)
+        profile.add_voter(extravote)
     else:
-        apprsets[0] = list(set(extravote) | set(apprsets[0]))
+        newvote = list(set(extravote) | origvote)
+        profile.replace_voter(0, newvote)
         print("change of voter 0: "
               + misc.str_candset(list(origvote), cand_names)
               + " --> "
-              + misc.str_candset(apprsets[0], cand_names))
-
-    profile = Profile(num_cand, cand_names=cand_names)
-    profile.add_voters(apprsets)
+              + misc.str_candset(newvote, cand_names))
 
     committees = abcrules.compute(
         rule_id, profile, committeesize, resolute=resolute)
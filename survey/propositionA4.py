@@ -71,9 +71,7 @@ for manip in manipulations:
     if not all(c in truepref for c in modvote):
         print(" (not a subset!)")
 
-    apprsets[0] = modvote
-    profile = Profile(num_cand, cand_names=cand_names)
-    profile.add_voters(apprsets)
+    profile.replace_voter(0, modvote)
 
     committees = abcrules.compute(
         rule_id, profile, committeesize, resolute=resolute)
@@ -3,11 +3,14 @@ Unit tests for abcrules.py and abcrules_gurobi.py and abcrules_cvxpy.py
 """
 
 import pytest
+import random
+from itertools import combinations
 
 from abcvoting.abcrules_cvxpy import cvxpy_thiele_methods
 from abcvoting.abcrules_gurobi import __gurobi_thiele_methods
 from abcvoting.preferences import Profile, ApprovalSet
-from abcvoting import abcrules, scores
+from abcvoting import abcrules, abcrules_gurobi, scores
+from abcvoting.budget import CancellationToken, IncompleteResult
 
 
 class CollectRules:
@@ -18,6 +21,7 @@ class CollectRules:
     def __init__(self):
         marks = {
             "gurobi": pytest.mark.gurobi,
+            "highs": pytest.mark.scipy,
             "scip": [pytest.mark.cvxpy, pytest.mark.scip],
             "glpk_mi": [pytest.mark.cvxpy, pytest.mark.glpk_mi],
             "cbc": [pytest.mark.cvxpy, pytest.mark.cbc],
@@ -248,6 +252,21 @@ class CollectInstances:
 testinsts = CollectInstances()
 testrules = CollectRules()
 
+# no two candidates share an approver, all 20 committees of size 3 are winning
+# (more than abcrules_cvxpy.CVXPY_NUM_CUTS, hence the CVXPY problem has to be enlarged)
+tied_profile = Profile(6)
+tied_profile.add_voters([[cand] for cand in range(6) for _ in range(2)])
+tied_committees = [list(committee) for committee in combinations(range(6), 3)]
+
+
+def preflist_with_ties(num_cand=10):
+    """approval sets with many (almost) tied committees of size 4, for num_cand 10 or 12"""
+    preflist = [[0, 1, 2], [0, 1], [0, 1], [1, 2], [3, 4], [3, 4], [5, 6, 7],
+                [5, 6], [7, 8, 9], [8, 9], [2, 3, 9], [0, 5]]
+    if num_cand == 12:
+        preflist += [[10, 11], [4, 11]]
+    return preflist
+
 
 def idfn(val):
     if isinstance(val, abcrules.ABCRule):
@@ -393,7 +412,8 @@ def test_abcrules_handling_empty_ballots(rule_id, algorithm, resolute, verbose):
 
 
 @pytest.mark.parametrize(
-    "algorithm", abcrules.rules["monroe"].algorithms
+    "algorithm", [pytest.param(alg, marks=pytest.mark.scipy) if alg == "highs" else alg
+                  for alg in abcrules.rules["monroe"].algorithms]
 )
 def test_monroe_indivisible(algorithm):
     profile = Profile(4)
@@ -405,9 +425,9 @@ def test_monroe_indivisible(algorithm):
             == [[0, 1, 2], [0, 1, 3], [0, 2, 3]])
 
 
-@pytest.mark.gurobi
 @pytest.mark.parametrize(
-    "algorithm", abcrules.rules["optphrag"].algorithms
+    "algorithm", [pytest.param("gurobi", marks=pytest.mark.gurobi),
+                  pytest.param("highs", marks=pytest.mark.scipy)]
 )
 def test_optphrag_does_not_use_lexicographic_optimization(algorithm):
     # this test shows that lexicographic optimization is not (yet)
@@ -447,6 +467,67 @@ def test_abcrules_correct(rule_id, algorithm, resolute, verbose, profile, exp_re
         assert sorted(committees) == sorted(exp_results[rule_id])
 
 
+@pytest.mark.parametrize(
+    "rule_id, algorithm, enumeration",
+    [pytest.param(rule_id, "gurobi", enumeration, marks=pytest.mark.gurobi)
+     for rule_id in ["pav", "cc", "mav", "monroe", "optphrag"]
+     for enumeration in ["rebuild", "incremental", "pool"]]
+    + [pytest.param(rule_id, "highs", None, marks=pytest.mark.scipy)
+       for rule_id in ["pav", "cc", "geom2", "mav", "monroe", "optphrag"]]
+    + [pytest.param(scorefct_str, algorithm, None,
+                    marks=[pytest.mark.cvxpy, getattr(pytest.mark, algorithm)])
+       for scorefct_str in ["pav", "slav", "cc", "geom2", "geom3"]
+       for algorithm in ["glpk_mi", "cbc", "scip"]],
+    ids=idfn
+)
+def test_enumeration_of_tied_committees(rule_id, algorithm, enumeration, monkeypatch):
+    if enumeration is not None:
+        monkeypatch.setattr(abcrules_gurobi, "GUROBI_ENUMERATION", enumeration)
+    if rule_id in abcrules.rules:
+        committees = abcrules.compute(rule_id, tied_profile, 3, algorithm=algorithm,
+                                      resolute=False)
+    else:
+        # score function without a corresponding rule
+        committees = abcrules.compute_thiele_method(rule_id, tied_profile, 3,
+                                                    algorithm=algorithm, resolute=False)
+    assert committees == tied_committees
+
+
+@pytest.mark.scipy
+@pytest.mark.parametrize(
+    "rule_id", ["pav", "slav", "cc", "geom2", "mav", "monroe"]
+)
+def test_highs_random_profiles(rule_id):
+    random.seed(0)
+    for _ in range(5):
+        profile = Profile(7)
+        profile.add_voters([random.sample(range(7), random.randint(1, 4)) for _ in range(9)])
+        if len(set().union(*(pref.approved for pref in profile))) < 3:
+            continue
+        exact_algorithm = "brute-force" if rule_id in ["mav", "monroe"] else "branch-and-bound"
+        # resolute: the lexicographically smallest winning committee is returned
+        for resolute in [False, True]:
+            assert (abcrules.compute(rule_id, profile, 3, algorithm="highs", resolute=resolute)
+                    == abcrules.compute(rule_id, profile, 3, algorithm=exact_algorithm,
+                                        resolute=resolute))
+
+
+@pytest.mark.scipy
+def test_highs_budget():
+    committees = abcrules.compute("pav", tied_profile, 3, algorithm="highs", resolute=False,
+                                  max_nodes=0)
+    assert isinstance(committees, IncompleteResult)
+    assert committees.reason == "max_nodes"
+    assert len(committees) >= 1
+
+    token = CancellationToken()
+    token.cancel()
+    committees = abcrules.compute("mav", tied_profile, 3, algorithm="highs", resolute=False,
+                                  cancellation_token=token)
+    assert committees.reason == "cancelled"
+    assert len(committees) == 1
+
+
 def test_seqphragmen_irresolute():
     profile = Profile(3)
     profile.add_voters([[0, 1], [0, 1], [0], [1, 2], [2]])
@@ -613,3 +694,211 @@ def test_cvxpy_wrong_score_fct():
                              scorefct_str='non_existing',
                              resolute=False,
                              algorithm='glpk_mi')
+
+
+@pytest.mark.parametrize(
+    "rule_id, algorithm, resolute", testrules.rule_algorithm_resolute, ids=idfn
+)
+@pytest.mark.parametrize(
+    "profile, exp_results, committeesize", testinsts.instances
+)
+def test_abcrules_correct_csr_storage(rule_id, algorithm, resolute, profile, exp_results,
+                                      committeesize):
+    csr_profile = Profile.from_csr(profile.num_cand, *profile.csr(),
+                                   weights=profile.weight_vector(), storage="csr")
+    committees = abcrules.compute(
+        rule_id, csr_profile, committeesize, algorithm=algorithm, resolute=resolute)
+    if resolute:
+        assert len(committees) == 1
+        assert committees[0] in exp_results[rule_id]
+    else:
+        assert sorted(committees) == sorted(exp_results[rule_id])
+
+
+@pytest.mark.parametrize(
+    "rule_id, algorithm", [("pav", "branch-and-bound"), ("slav", "branch-and-bound"),
+                           ("cc", "branch-and-bound"), ("geom2", "branch-and-bound"),
+                           ("seqpav", "standard"), ("seqslav", "standard"),
+                           ("seqcc", "standard"), ("revseqpav", "standard")]
+)
+@pytest.mark.parametrize(
+    "arithmetic", ["exact", "float", "auto"]
+)
+@pytest.mark.parametrize(
+    "resolute", [True, False]
+)
+@pytest.mark.parametrize(
+    "profile, exp_results, committeesize", testinsts.instances
+)
+def test_thiele_methods_arithmetic(rule_id, algorithm, arithmetic, resolute, profile,
+                                   exp_results, committeesize):
+    committees = abcrules.compute(
+        rule_id, profile, committeesize, algorithm=algorithm, resolute=resolute,
+        arithmetic=arithmetic)
+    if arithmetic == "float":
+        # rounding errors may break ties, hence not all winning committees might be found
+        assert committees
+        for committee in committees:
+            assert committee in exp_results[rule_id]
+    elif resolute:
+        assert len(committees) == 1
+        assert committees[0] in exp_results[rule_id]
+    else:
+        assert sorted(committees) == sorted(exp_results[rule_id])
+
+
+@pytest.mark.parametrize(
+    "scorefct_str", ["pav", "slav", "cc", "geom2"]
+)
+@pytest.mark.parametrize(
+    "arithmetic", ["exact", "auto"]
+)
+def test_thiele_branchandbound_random(scorefct_str, arithmetic):
+    random.seed(24)
+    for _ in range(20):
+        num_cand = random.randint(4, 9)
+        profile = Profile(num_cand)
+        for _ in range(random.randint(3, 12)):
+            profile.add_voter(ApprovalSet(random.sample(range(num_cand), random.randint(1, 4)),
+                                          weight=random.choice([1, 1, 2, 3])))
+        committeesize = random.randint(1, 4)
+        if len(set().union(*(pref.approved for pref in profile))) < committeesize:
+            continue
+        committees = [list(committee) for committee
+                      in combinations(range(num_cand), committeesize)]
+        committee_scores = scores.thiele_scores_batch(scorefct_str, profile, committees)
+        expected = [committee for committee, score in zip(committees, committee_scores)
+                    if score == max(committee_scores)]
+        assert abcrules.compute_thiele_method(
+            scorefct_str, profile, committeesize, resolute=False,
+            arithmetic=arithmetic) == expected
+        assert abcrules.compute_thiele_method(
+            scorefct_str, profile, committeesize, resolute=True,
+            arithmetic=arithmetic)[0] in expected
+
+
+@pytest.mark.parametrize(
+    "rule_id", ["pav", "cc", "slav"]
+)
+@pytest.mark.parametrize(
+    "arithmetic", ["exact", "auto"]
+)
+def test_thiele_branchandbound_workers(rule_id, arithmetic):
+    profile = Profile(10)
+    profile.add_voters(preflist_with_ties())
+    committeesize = 4
+    sequential = abcrules.compute(rule_id, profile, committeesize, resolute=False,
+                                  arithmetic=arithmetic)
+    parallel = abcrules.compute(rule_id, profile, committeesize, resolute=False,
+                                arithmetic=arithmetic, workers=2)
+    assert parallel == sequential
+    committees = abcrules.compute(rule_id, profile, committeesize, resolute=True,
+                                  arithmetic=arithmetic, workers=2)
+    assert len(committees) == 1
+    assert committees[0] in sequential
+
+    with pytest.raises(ValueError):
+        abcrules.compute(rule_id, profile, committeesize, workers=0)
+
+
+@pytest.mark.parametrize(
+    "rule_id", ["pav", "cc", "mav", "lexmav", "monroe"]
+)
+def test_budget_incomplete_result(rule_id):
+    profile = Profile(12)
+    profile.add_voters(preflist_with_ties(12))
+    committeesize = 4
+    committees = abcrules.compute(rule_id, profile, committeesize, resolute=False)
+    assert getattr(committees, "complete", True)
+    assert not isinstance(committees, IncompleteResult)
+    unlimited = abcrules.compute(rule_id, profile, committeesize, resolute=False,
+                                 time_limit=1000, max_nodes=10 ** 9,
+                                 cancellation_token=CancellationToken())
+    assert unlimited == committees
+    assert not isinstance(unlimited, IncompleteResult)
+
+    incomplete = abcrules.compute(rule_id, profile, committeesize, resolute=False,
+                                  max_nodes=2)
+    assert isinstance(incomplete, IncompleteResult)
+    assert not incomplete.complete
+    assert incomplete.reason == "max_nodes"
+    # the best committees found so far are returned
+    assert len(incomplete) > 0
+    assert all(len(committee) == committeesize for committee in incomplete)
+
+    token = CancellationToken()
+    token.cancel()
+    incomplete = abcrules.compute(rule_id, profile, committeesize, resolute=True,
+                                  cancellation_token=token)
+    assert isinstance(incomplete, IncompleteResult)
+    assert incomplete.reason == "cancelled"
+    assert len(incomplete) == 1
+
+    incomplete = abcrules.compute(rule_id, profile, committeesize, time_limit=0)
+    assert incomplete.reason == "time_limit"
+
+
+@pytest.mark.parametrize("algorithm", ["glpk_mi", "cbc", "scip", "cvxpy_gurobi"])
+def test_budget_not_supported_by_cvxpy(algorithm):
+    profile = Profile(4)
+    profile.add_voters([[0, 1], [1, 2], [2, 3]])
+    with pytest.raises(NotImplementedError):
+        abcrules.compute_pav(profile, 2, algorithm=algorithm, max_nodes=10)
+    with pytest.raises(NotImplementedError):
+        abcrules.compute_pav(profile, 2, algorithm=algorithm,
+                             cancellation_token=CancellationToken())
+
+
+@pytest.mark.parametrize("rule_id", ["mav", "lexmav"])
+def test_budget_max_nodes_all_committees(rule_id):
+    # there are C(5, 2) = 10 committees (and no clones), the last one is the only winner
+    profile = Profile(5)
+    profile.add_voters([[3, 4], [3, 4], [0, 3, 4], [1, 3, 4], [2, 3, 4], [3]])
+    committeesize = 2
+    committees = abcrules.compute(rule_id, profile, committeesize, resolute=False)
+    assert committees == [[3, 4]]
+    complete = abcrules.compute(rule_id, profile, committeesize, resolute=False,
+                                max_nodes=10)
+    assert not isinstance(complete, IncompleteResult)
+    assert complete == committees
+    incomplete = abcrules.compute(rule_id, profile, committeesize, resolute=False,
+                                  max_nodes=9)
+    assert isinstance(incomplete, IncompleteResult)
+    assert incomplete.reason == "max_nodes"
+    assert [3, 4] not in incomplete
+
+
+def test_budget_thiele_branchandbound_workers():
+    profile = Profile(10)
+    profile.add_voters(preflist_with_ties())
+    committees = abcrules.compute_pav(profile, 4, workers=2, max_nodes=1)
+    assert isinstance(committees, IncompleteResult)
+    assert committees.reason == "max_nodes"
+    # the committee of seq-PAV is always found
+    assert abcrules.compute_seqpav(profile, 4, resolute=True)[0] in committees
+
+
+@pytest.mark.parametrize("arithmetic", ["exact", "float", "auto"])
+@pytest.mark.parametrize("workers", [1, 2])
+def test_thiele_branchandbound_resolute_tiebreaking(arithmetic, workers):
+    # [0, 1, 3] and [0, 1, 4] are tied, the lexicographically smallest committee is returned
+    approval_sets = [[3, 4], [], [1, 4], [0, 1, 3], [0, 2, 3, 4], [0], [0, 4], [0, 1, 4],
+                     [0, 1, 4], [3, 4], [], [1, 4]]
+    weights = [2, 1, 1, 2, 3, 1, 1, 2, 1, 1, 1, 3]
+    profile = Profile(5)
+    profile.add_voters([ApprovalSet(approval_set, weight=weight)
+                        for approval_set, weight in zip(approval_sets, weights)])
+    committees = abcrules.compute("cc", profile, 3, resolute=True, arithmetic=arithmetic,
+                                  workers=workers)
+    assert committees == [[0, 1, 3]]
+    irresolute = abcrules.compute("cc", profile, 3, resolute=False, arithmetic=arithmetic,
+                                  workers=workers)
+    assert committees[0] == irresolute[0]
+
+
+def test_thiele_methods_invalid_arithmetic():
+    profile = Profile(3)
+    profile.add_voters([[0], [1, 2]])
+    with pytest.raises(ValueError):
+        abcrules.compute("pav", profile, 2, algorithm="branch-and-bound",
+                         arithmetic="decimal")
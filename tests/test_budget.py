@@ -0,0 +1,60 @@
+"""
+Unit tests for budget.py
+"""
+
+import pytest
+from abcvoting.budget import Budget, BudgetExhausted, CancellationToken, IncompleteResult
+
+
+def test_budget_max_nodes():
+    budget = Budget(max_nodes=3)
+    assert not budget.exhausted(2)
+    assert budget.remaining_nodes() == 1
+    assert not budget.exhausted()
+    with pytest.raises(BudgetExhausted):
+        budget.check()
+    assert budget.reason == "max_nodes"
+    assert budget.remaining_time() is None
+
+
+def test_budget_charge():
+    budget = Budget(max_nodes=3)
+    budget.charge(5)
+    assert budget.remaining_nodes() == 0
+    assert budget.reason is None
+    assert budget.exhausted(0)
+
+
+def test_budget_time_limit_and_cancellation():
+    assert Budget().unlimited
+    assert not Budget().exhausted(10 ** 9)
+    budget = Budget(time_limit=0)
+    assert budget.exhausted(0)
+    assert budget.reason == "time_limit"
+    assert budget.remaining_time() == 0
+
+    token = CancellationToken()
+    budget = Budget(cancellation_token=token)
+    assert not budget.exhausted()
+    token.cancel()
+    assert token.cancelled
+    assert budget.exhausted(0)
+    assert budget.reason == "cancelled"
+
+    with pytest.raises(ValueError):
+        Budget(time_limit=-1)
+    with pytest.raises(ValueError):
+        Budget(max_nodes=1.5)
+
+
+def test_budget_result():
+    committees = [[0, 1]]
+    budget = Budget(max_nodes=0)
+    assert budget.result(committees) is committees
+    budget.stop("cancelled")
+    budget.stop("time_limit")
+    result = budget.result(committees)
+    assert isinstance(result, IncompleteResult)
+    assert result == committees
+    assert not result.complete
+    assert result.reason == "cancelled"
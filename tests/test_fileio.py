@@ -105,3 +105,44 @@ def test_read_and_write_preflib_file():
         for i, pref in enumerate(profile):
             assert pref.weight == profile2[i].weight
             assert pref.approved == set(profile2[i])
+
+
+@pytest.mark.parametrize(
+    "storage", ["sets", "csr"]
+)
+@pytest.mark.parametrize(
+    "weights", [None, [1, 2, 3, 1, 1, 2, 5, 1], [0.5, 1, 1, 2.5, 1, 1, 1, 1]]
+)
+def test_read_and_write_binary_file(tmp_path, storage, weights):
+    profile = Profile.from_approval_sets(
+        6, [[3], [4, 1, 5], [0, 2], [], [0, 1, 2, 3, 4, 5], [5], [1], [1]], weights=weights,
+        cand_names="abcdef")
+    filename = str(tmp_path / "profile.abc")
+    fileio.write_profile_to_binary_file(profile, filename)
+    profile2 = fileio.read_binary_profile_file(filename, storage=storage)
+    assert profile2.storage == storage
+    assert profile2.num_cand == 6
+    assert profile2.cand_names == list("abcdef")
+    assert len(profile) == len(profile2)
+    for i, pref in enumerate(profile):
+        assert pref == profile2[i]
+    indices, indptr = profile2.csr()
+    assert not indices.flags.writeable
+
+    profile2.add_voter([0, 1])
+    assert len(profile2) == len(profile) + 1
+    assert profile2[-1].approved == {0, 1}
+
+
+def test_read_and_write_empty_binary_file(tmp_path):
+    filename = str(tmp_path / "profile.abc")
+    fileio.write_profile_to_binary_file(Profile(3), filename)
+    profile = fileio.read_binary_profile_file(filename)
+    assert len(profile) == 0
+    assert profile.num_cand == 3
+
+
+def test_binary_file_corrupt(tmp_path):
+    currdir = os.path.dirname(os.path.abspath(__file__))
+    with pytest.raises(ValueError):
+        fileio.read_binary_profile_file(currdir + "/data/test1.toi")
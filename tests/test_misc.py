@@ -12,3 +12,11 @@ from abcvoting import misc
 )
 def test_hamming(a, b, dist):
     assert misc.hamming(a, b) == dist
+
+
+@pytest.mark.parametrize(
+    "candset, mask", [([], 0), ([0], 1), ([1, 3], 10), ((5, 0, 2), 37), (set(range(70)), 2**70 - 1)]
+)
+def test_bitmask(candset, mask):
+    assert misc.bitmask(candset) == mask
+    assert misc.popcount(mask) == len(candset)
@@ -0,0 +1,39 @@
+"""
+Unit tests for numeric.py
+"""
+
+import fractions
+import pytest
+from abcvoting import numeric
+from abcvoting.numeric import Fraction
+
+
+def available_backends():
+    names = ["float", "fraction", "exact"]
+    if numeric.gmpy2_available:
+        names.append("gmpy2")
+    return names
+
+
+@pytest.mark.parametrize("name", available_backends())
+def test_backend_arithmetic(name):
+    backend = numeric.get_backend(name)
+    x = backend.number(Fraction(3, 4))
+    y = backend.number(2)
+    assert backend.to_fraction(x + y) == Fraction(11, 4)
+    assert backend.to_fraction(backend.div(x, y)) == Fraction(3, 8)
+    assert backend.to_float(x - y) == -1.25
+    assert x < y
+    assert backend.exact == (name != "float")
+
+
+def test_common_denominator():
+    assert numeric.common_denominator([1, Fraction(1, 2), Fraction(1, 3), 4]) == 6
+    assert numeric.common_denominator([fractions.Fraction(1, 4), 2.0]) == 4
+    assert numeric.common_denominator([]) == 1
+    assert numeric.common_denominator([1, 0.5]) is None
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        numeric.get_backend("decimal")
@@ -3,6 +3,7 @@ Unit tests for preferences.py
 """
 
 import pytest
+from fractions import Fraction
 from abcvoting.preferences import Profile
 from abcvoting.preferences import ApprovalSet
 
@@ -108,3 +109,238 @@ def test_party_list(num_cand, additional_apprset):
     assert profile.party_list()
     profile.add_voter(additional_apprset)
     assert not profile.party_list()
+
+
+@pytest.mark.parametrize(
+    "num_cand", [6, 7]
+)
+def test_approval_matrix(num_cand):
+    profile = Profile(num_cand)
+    profile.add_voter(ApprovalSet([1, 3, 5], 3))
+    profile.add_voters([[0, 4, 5], []])
+    matrix = profile.approval_matrix()
+    assert matrix.shape == (3, num_cand)
+    assert [list(row.nonzero()[0]) for row in matrix] == [[1, 3, 5], [0, 4, 5], []]
+    assert list(profile.weight_vector()) == [3, 1, 1]
+    assert profile.approval_matrix() is matrix
+
+    # the cached matrix has to be rebuilt after modifying the profile
+    profile.add_voter(ApprovalSet([2], 2.5))
+    assert profile.approval_matrix().shape == (4, num_cand)
+    assert list(profile.approval_matrix()[3].nonzero()[0]) == [2]
+    assert list(profile.weight_vector()) == [3, 1, 1, 2.5]
+
+
+def test_compressed():
+    profile = Profile(5)
+    profile.add_voters([[0, 1], [2], [1, 0], [3, 4]])
+    profile.add_voter(ApprovalSet([2], 3))
+    compressed = profile.compressed()
+    assert len(compressed) == 3
+    assert [pref.approved for pref in compressed] == [{0, 1}, {2}, {3, 4}]
+    assert [pref.weight for pref in compressed] == [2, 4, 1]
+    assert compressed.original_voters == [[0, 2], [1, 4], [3]]
+    assert compressed.totalweight() == profile.totalweight()
+    assert profile.compressed() is compressed
+
+    profile.add_voter([3, 4])
+    assert profile.compressed().original_voters == [[0, 2], [1, 4], [3, 5]]
+
+
+def test_bulk_constructors():
+    approval_sets = [[1, 3, 5], [], [5, 0, 4], [2]]
+    weights = [3, 1, 2, 1]
+    profile = Profile(6)
+    for apprset, weight in zip(approval_sets, weights):
+        profile.add_voter(ApprovalSet(apprset, weight))
+
+    profiles = [
+        Profile.from_approval_sets(6, approval_sets, weights=weights),
+        Profile.from_approval_matrix(profile.approval_matrix(), weights=weights),
+        Profile.from_approval_matrix(profile.approval_matrix().astype(int), weights=weights),
+        Profile.from_csr(6, [1, 3, 5, 5, 0, 4, 2], [0, 3, 3, 6, 7], weights=weights),
+    ]
+    for bulk_profile in profiles:
+        assert len(bulk_profile) == 4
+        assert bulk_profile.totalweight() == 7
+        assert bulk_profile.csr()[0].tolist() == [1, 3, 5, 0, 4, 5, 2]
+        assert (bulk_profile.approval_matrix() == profile.approval_matrix()).all()
+        assert [pref.approved for pref in bulk_profile] == [pref.approved for pref in profile]
+        assert [pref.weight for pref in bulk_profile] == weights
+
+        # approval sets are created before modifying the profile
+        bulk_profile.add_voter([0])
+        assert len(bulk_profile) == 5
+        assert bulk_profile.csr()[1].tolist() == [0, 3, 3, 6, 7, 8]
+
+    assert Profile.from_approval_sets(6, approval_sets).has_unit_weights()
+
+
+@pytest.mark.parametrize("storage", ["sets", "csr"])
+def test_from_approval_sets_with_weighted_approval_sets(storage):
+    approval_sets = [ApprovalSet([0, 2], 3), [1], ApprovalSet([1, 3], Fraction(1, 2))]
+    profile = Profile.from_approval_sets(4, approval_sets, storage=storage)
+    expected = Profile(4)
+    expected.add_voters([ApprovalSet([0, 2], 3), [1], ApprovalSet([1, 3], Fraction(1, 2))])
+    assert [pref.weight for pref in profile] == [pref.weight for pref in expected]
+    assert [pref.approved for pref in profile] == [pref.approved for pref in expected]
+    assert profile.totalweight() == Fraction(9, 2)
+
+    # unit weights of ApprovalSets do not conflict with explicit weights
+    profile = Profile.from_approval_sets(4, [ApprovalSet([0]), [1]], weights=[2, 5])
+    assert [pref.weight for pref in profile] == [2, 5]
+    with pytest.raises(ValueError):
+        Profile.from_approval_sets(4, approval_sets, weights=[1, 1, 1])
+
+
+def test_invalid_bulk_constructors():
+    with pytest.raises(ValueError):
+        Profile.from_approval_sets(6, [[0, 1], [6]])
+    with pytest.raises(ValueError):
+        Profile.from_approval_sets(6, [[0, 1], [-1]])
+    with pytest.raises(ValueError):
+        Profile.from_approval_sets(6, [[0, 1], [2, 3, 2]])
+    with pytest.raises(TypeError):
+        Profile.from_approval_sets(6, [[0, 1], [0.42]])
+    with pytest.raises(TypeError):
+        Profile.from_approval_sets(6, [[0, 1], ["1"]])
+    with pytest.raises(ValueError):
+        Profile.from_approval_sets(6, [[0, 1], [2]], weights=[1, 2, 3])
+    with pytest.raises(ValueError):
+        Profile.from_approval_matrix([[0, 1], [2, 0]])
+    with pytest.raises(ValueError):
+        Profile.from_csr(6, [0, 1, 2], [0, 2, 1, 3])
+    with pytest.raises(ValueError):
+        Profile.from_csr(6, [0, 1, 2], [0, 2])
+
+
+def test_csr_storage():
+    approval_sets = [[1, 3, 5], [], [5, 0, 4], [2]]
+    weights = [3, 1, 2, 1]
+    profile = Profile.from_approval_sets(6, approval_sets, weights=weights)
+    csr_profile = Profile.from_approval_sets(6, approval_sets, weights=weights, storage="csr")
+    assert len(csr_profile) == 4
+    assert [pref.approved for pref in csr_profile] == [pref.approved for pref in profile]
+    assert [pref.weight for pref in csr_profile] == weights
+    assert csr_profile[2].approved == {0, 4, 5}
+    assert csr_profile[-1].approved == {2}
+    assert csr_profile.totalweight() == 7
+    assert csr_profile.sum_over_approvers(weights) == profile.sum_over_approvers(weights)
+
+    csr_profile.add_voter(ApprovalSet([0, 1], 2))
+    csr_profile.add_voters([[4]])
+    assert len(csr_profile) == 6
+    assert csr_profile.csr()[1].tolist() == [0, 3, 3, 6, 7, 9, 10]
+    assert csr_profile.weight_vector().tolist() == weights + [2, 1]
+    assert csr_profile[4].approved == {0, 1}
+
+    compressed = csr_profile.compressed()
+    assert compressed.storage == "csr"
+    assert len(compressed) == 6
+
+
+def test_csr_storage_memory():
+    approval_sets = [[c, (c + 1) % 20] for c in range(20)] * 50
+    profile = Profile(20)
+    profile.add_voters(approval_sets)
+    csr_profile = Profile.from_approval_sets(20, approval_sets, storage="csr")
+    assert csr_profile.memory_usage() < profile.memory_usage()
+
+
+def test_invalid_storage():
+    with pytest.raises(ValueError):
+        Profile(3, storage="dense")
+
+
+@pytest.mark.parametrize("storage", ["sets", "csr"])
+def test_indexing_and_slicing(storage):
+    profile = Profile.from_approval_sets(5, [[0, 1], [2], [1, 4], []], weights=[1, 2, 3, 1],
+                                         storage=storage)
+    assert profile[-1].approved == set()
+    assert profile[-4].approved == {0, 1}
+    assert [(voter.approved, voter.weight) for voter in profile[1:3]] == [({2}, 2),
+                                                                         ({1, 4}, 3)]
+    assert [voter.approved for voter in profile[::-2]] == [set(), {2}]
+    assert profile[5:] == []
+    with pytest.raises(IndexError):
+        profile[4]
+    with pytest.raises(IndexError):
+        profile[-5]
+
+
+@pytest.mark.parametrize("storage", ["sets", "csr"])
+def test_approvers(storage):
+    profile = Profile.from_approval_sets(5, [[0, 1], [2], [1, 4], []], weights=[1, 2, 3, 1],
+                                         storage=storage)
+    assert [profile.approvers(c) for c in range(5)] == [(0,), (0, 2), (1,), (), (2,)]
+    assert [profile.approvers_weight(c) for c in range(5)] == [1, 4, 2, 0, 3]
+
+    # the inverted index is updated when voters are added
+    profile.add_voter(ApprovalSet([1, 3], 2))
+    assert profile.approvers(1) == (0, 2, 4)
+    assert profile.approvers(3) == (4,)
+    assert profile.approvers_weight(1) == 6
+
+
+def test_approvalset_immutable_and_hashable():
+    appr_set = ApprovalSet([2, 0, 1], 3)
+    assert appr_set.approved == frozenset({0, 1, 2})
+    assert appr_set == ApprovalSet([0, 1, 2], 3)
+    assert appr_set != ApprovalSet([0, 1, 2], 2)
+    assert appr_set != ApprovalSet([0, 1], 3)
+    assert len({appr_set, ApprovalSet([1, 2, 0], 3), ApprovalSet([1])}) == 2
+    with pytest.raises(AttributeError):
+        appr_set.weight = 2
+    with pytest.raises(AttributeError):
+        appr_set.approved.add(3)
+    with pytest.raises(AttributeError):
+        appr_set.other = 1
+
+
+def test_party_partition():
+    profile = Profile(8)
+    profile.add_voters([[1, 5, 3], [0, 4, 6], [], [3, 1, 5], [2]])
+    assert profile.party_partition() == [(1, 3, 5), (0, 4, 6), (2,)]
+    assert profile.party_list()
+    profile.add_voter([2, 7])
+    assert profile.party_partition() is None
+    assert not profile.party_list()
+
+    profile = Profile.from_approval_sets(4, [[0, 1], [2, 3]] * 100000, storage="csr")
+    assert profile.party_partition() == [(0, 1), (2, 3)]
+
+
+@pytest.mark.parametrize("storage", ["sets", "csr"])
+def test_inplace_edits(storage):
+    profile = Profile.from_approval_sets(4, [[0, 1], [2], [1, 3], []], weights=[1, 2, 3, 1],
+                                         storage=storage)
+    version = profile.version
+    assert profile.approvers(1) == (0, 2)
+
+    profile.remove_voter(0)
+    assert profile.version > version
+    assert [pref.approved for pref in profile] == [{2}, {1, 3}, set()]
+    assert profile.weight_vector().tolist() == [2, 3, 1]
+    assert profile.approvers(1) == (1,)
+
+    profile.replace_voter(-1, ApprovalSet([0, 3], 5))
+    assert [pref.approved for pref in profile] == [{2}, {1, 3}, {0, 3}]
+    assert profile.weight_vector().tolist() == [2, 3, 5]
+    assert profile.approvers(3) == (1, 2)
+    assert profile.totalweight() == 10
+
+    profile.add_voter([2])
+    profile.replace_voter(1, [])
+    assert [pref.approved for pref in profile] == [{2}, set(), {0, 3}, {2}]
+
+    assert profile.add_candidate("new") == 4
+    assert profile.num_cand == 5
+    assert profile.cand_names[-1] == "new"
+    assert profile.approval_matrix().shape == (4, 5)
+    profile.add_voter([4])
+    assert profile.approvers(4) == (4,)
+
+    with pytest.raises(IndexError):
+        profile.remove_voter(5)
+    with pytest.raises(ValueError):
+        profile.replace_voter(0, [5])
@@ -0,0 +1,72 @@
+"""
+Unit tests for reduction.py
+"""
+
+import pytest
+from itertools import combinations
+from abcvoting.preferences import Profile
+from abcvoting.reduction import reduce_candidates
+from abcvoting import abcrules, reduction, scores
+
+
+def test_reduce_clones():
+    profile = Profile(8)
+    # candidates 0, 1, 2 are clones, candidates 6 and 7 have no approvers
+    profile.add_voters([[0, 1, 2, 3], [0, 1, 2], [3, 4], [4, 5], [5]])
+    reduction = reduce_candidates(profile, 2)
+    assert reduction.classes == [[0, 1, 2], [3], [4], [5], [6, 7]]
+    assert reduction.cands == [0, 1, 3, 4, 5, 6, 7]
+    assert reduction.profile.num_cand == 7
+    assert [list(pref) for pref in reduction.profile] == [[0, 1, 2], [0, 1], [2, 3], [3, 4], [4]]
+    assert reduction.original([[0, 2], [1, 6]]) == [[0, 3], [1, 7]]
+    assert reduction.expand([[0, 3], [6, 7]]) == [[0, 3], [1, 3], [2, 3], [6, 7]]
+    assert reduction.expand([[0, 1]]) == [[0, 1], [0, 2], [1, 2]]
+    assert reduction.expand([[1, 3], [0, 3]], resolute=True) == [[0, 3]]
+
+
+def test_reduce_dominated():
+    profile = Profile(6)
+    profile.add_voters([[0, 1, 2], [0, 1, 3], [0, 2, 3], [1, 2, 3, 4]])
+    # approvers of 4 ({3}) are a proper subset of the approvers of 1, 2 and 3,
+    # 5 (no approvers) is dominated by all other candidates
+    reduction = reduce_candidates(profile, 3, remove_dominated=True)
+    assert reduction.cands == [0, 1, 2, 3]
+    assert reduction.classes == [[0], [1], [2], [3]]
+    assert reduce_candidates(profile, 4, remove_dominated=True).cands == [0, 1, 2, 3, 4]
+    assert reduce_candidates(profile, 3).cands == [0, 1, 2, 3, 4, 5]
+
+
+def test_reduce_dominated_auto(monkeypatch):
+    profile = Profile(6)
+    profile.add_voters([[0, 1, 2], [0, 1, 3], [0, 2, 3], [1, 2, 3, 4]])
+    # the profile is too small for the dominance check to pay off
+    assert reduce_candidates(profile, 3, remove_dominated="auto").cands == [0, 1, 2, 3, 4, 5]
+    monkeypatch.setattr(reduction, "DOMINANCE_MIN_SIZE", 0)
+    assert reduce_candidates(profile, 3, remove_dominated="auto").cands == [0, 1, 2, 3]
+    # with at most committeesize + 1 candidates the check is skipped
+    assert reduce_candidates(profile, 5, remove_dominated="auto").cands == [0, 1, 2, 3, 4, 5]
+
+
+@pytest.mark.parametrize(
+    "rule_id", ["pav", "slav", "cc", "geom2", "mav", "monroe"]
+)
+def test_reduction_irresolute(rule_id, monkeypatch):
+    # also check dominated candidates for this small profile
+    monkeypatch.setattr(reduction, "DOMINANCE_MIN_SIZE", 0)
+    profile = Profile(9)
+    profile.add_voters([[0, 1, 2], [0, 1, 2], [3], [3, 4], [4, 5], [0, 1, 2, 5], [6]])
+    committeesize = 3
+    committees = abcrules.compute(rule_id, profile, committeesize, resolute=False)
+
+    # compare with the winning committees of all committees
+    all_committees = [list(committee) for committee in combinations(range(9), committeesize)]
+    if rule_id == "mav":
+        committee_scores = [-scores.mavscore(profile, committee) for committee in all_committees]
+    elif rule_id == "monroe":
+        committee_scores = [scores.monroescore(profile, committee)
+                            for committee in all_committees]
+    else:
+        committee_scores = [scores.thiele_score(rule_id, profile, committee)
+                            for committee in all_committees]
+    assert committees == [committee for committee, score in zip(all_committees, committee_scores)
+                          if score == max(committee_scores)]
@@ -4,14 +4,11 @@ Unit tests for scoring_functions.py
 
 import pytest
 
-from abcvoting.preferences import Profile
+from abcvoting.preferences import Profile, ApprovalSet
 from abcvoting.scores import monroescore_flowbased
 from abcvoting.scores import monroescore_matching
 from abcvoting import scores
-try:
-    from gmpy2 import mpq as Fraction
-except ImportError:
-    from fractions import Fraction
+from abcvoting.numeric import Fraction
 
 
 @pytest.mark.parametrize(
@@ -49,6 +46,49 @@ def test_monroescore_matching(committee, score, num_cand):
     assert monroescore_matching(profile, committee) == score
 
 
+@pytest.mark.parametrize(
+    "committee,score",
+    [([1, 3, 2], 5), ([2, 1, 5], 4), ([2, 5, 4], 3),
+     ([1, 2, 5, 4], 5), ([0, 2, 4, 5], 4),
+     ([0, 1, 3, 4, 5], 5), ([0, 1, 2, 4, 5], 6),
+     ([0, 1, 2, 3, 4, 5], 6)]
+)
+def test_monroe_score_engine(committee, score):
+    profile = Profile(7)
+    preflist = [[0, 1], [1], [1, 3], [4], [2], [1, 5, 3]]
+    profile.add_voters(preflist)
+
+    assert scores.MonroeScoreEngine(profile).score(committee) == score
+    assert scores.monroescore(profile, committee) == score
+
+
+def test_monroe_score_engine_weights_and_warm_start():
+    from itertools import combinations
+
+    profile = Profile(6)
+    preflist = [[0, 1], [1], [1, 3], [4], [2], [1, 5, 3], [0, 1], [1], [4], [0, 5], [2, 3]]
+    profile.add_voters(preflist)
+    compressed = profile.compressed()
+    assert not compressed.has_unit_weights()
+
+    engine = scores.MonroeScoreEngine(compressed)
+    for committeesize in [1, 2, 3, 4]:
+        for committee in combinations(range(6), committeesize):
+            # engine is reused, i.e., starts from the assignment of the previous committee
+            score = engine.score(committee)
+            assert score == monroescore_flowbased(profile, committee)
+            assignment = engine.assignment()
+            assert sum(assignment.values()) == score
+            for (voter, cand) in assignment:
+                assert cand in committee
+                assert cand in compressed[voter]
+
+    profile = Profile(3)
+    profile.add_voter(ApprovalSet([0], weight=0.5))
+    with pytest.raises(ValueError):
+        scores.MonroeScoreEngine(profile)
+
+
 @pytest.mark.parametrize(
     "scorefct_str,score", [("pav", Fraction(119, 12)), ("av", 14), ("slav", Fraction(932, 105)),
                            ("cc", 7), ("geom2", Fraction(77, 8))]
@@ -64,3 +104,223 @@ def test_thiele_scores(scorefct_str, score, num_cand):
     assert scores.thiele_score(scorefct_str, profile, committee) == 0
     committee = [1, 2, 3, 4]
     assert scores.thiele_score(scorefct_str, profile, committee) == score
+
+
+@pytest.mark.parametrize(
+    "scorefct_str", ["pav", "av", "slav", "cc", "geom2"]
+)
+@pytest.mark.parametrize(
+    "committee", [[], [1], [1, 2, 3, 4], [0, 5, 6]]
+)
+def test_marginal_thiele_scores(scorefct_str, committee):
+    # compare with a straightforward computation of marginal scores
+    profile = Profile(7)
+    preflist = [[0, 1], [1], [1, 3], [4], [1, 2, 3, 4, 5], [1, 5, 3], [0, 1, 2, 4, 5]]
+    profile.add_voters(preflist)
+    scorefct = scores.get_scorefct(scorefct_str, 4)
+    score = scores.thiele_score(scorefct_str, profile, committee)
+
+    marg_add = scores.marginal_thiele_scores_add(scorefct, profile, committee)
+    for cand in range(profile.num_cand):
+        if cand in committee:
+            assert marg_add[cand] == -1
+        else:
+            assert marg_add[cand] == (
+                scores.thiele_score(scorefct_str, profile, committee + [cand]) - score)
+
+    marg_remove = scores.marginal_thiele_scores_remove(scorefct, profile, committee)
+    for cand in committee:
+        reduced_committee = [c for c in committee if c != cand]
+        assert marg_remove[cand] == (
+            score - scores.thiele_score(scorefct_str, profile, reduced_committee))
+
+
+def _fraction_pav_score_fct(i):
+    return Fraction(1, i) if i > 0 else 0
+
+
+def _float_pav_score_fct(i):
+    return 1 / i if i > 0 else 0
+
+
+@pytest.mark.parametrize(
+    "arithmetic", ["exact", "float", "auto"]
+)
+@pytest.mark.parametrize(
+    "pav_score_fct", [_fraction_pav_score_fct, _float_pav_score_fct]
+)
+def test_marginal_thiele_scores_plain_callable(arithmetic, pav_score_fct):
+    # score functions that are plain callables (not obtained via get_scorefct),
+    # returning fractions or (non-integer) floats
+    profile = Profile(7)
+    preflist = [[0, 1], [1], [1, 3], [4], [1, 2, 3, 4, 5], [1, 5, 3], [0, 1, 2, 4, 5]]
+    profile.add_voters(preflist)
+    scorefct = scores.get_scorefct("pav", 7)
+    committee = [1, 2, 3, 4]
+
+    for marginal_thiele_scores in [scores.marginal_thiele_scores_add,
+                                   scores.marginal_thiele_scores_remove]:
+        expected = marginal_thiele_scores(scorefct, profile, committee)
+        marg = marginal_thiele_scores(pav_score_fct, profile, committee, arithmetic=arithmetic)
+        assert [float(score) for score in marg] == pytest.approx(
+            [float(score) for score in expected])
+
+    tracker = scores.MarginalGainTracker(pav_score_fct, profile, committee,
+                                         arithmetic=arithmetic)
+    assert float(tracker.score) == pytest.approx(
+        float(scores.thiele_score("pav", profile, committee)))
+    tracker = scores.RemovalCostTracker(pav_score_fct, profile, arithmetic=arithmetic)
+    tracker.remove(6)
+    assert float(tracker.score) == pytest.approx(
+        float(scores.thiele_score("pav", profile, range(6))))
+    cost, cheapest = tracker.cheapest()
+    assert float(cost) == pytest.approx(float(min(
+        scores.marginal_thiele_scores_remove(scorefct, profile, range(6)))))
+
+
+@pytest.mark.parametrize(
+    "scorefct_str", ["pav", "av", "slav", "cc", "geom2"]
+)
+@pytest.mark.parametrize(
+    "chunksize", [None, 1, 4]
+)
+def test_thiele_scores_batch(scorefct_str, chunksize):
+    profile = Profile(7)
+    preflist = [[0, 1], [1], [1, 3], [4], [1, 2, 3, 4, 5], [1, 5, 3], [0, 1, 2, 4, 5], [1]]
+    profile.add_voters(preflist)
+    profile.add_voter(ApprovalSet([2, 4], Fraction(5, 2)))
+    committees = [[], [6], [1, 2, 3, 4], [0, 5, 6], [1, 3], [0, 1, 2, 3, 4, 5, 6]]
+    batch_scores = scores.thiele_scores_batch(scorefct_str, profile, committees,
+                                              chunksize=chunksize)
+    assert batch_scores == [scores.thiele_score(scorefct_str, profile, committee)
+                            for committee in committees]
+    assert scores.thiele_scores_batch(scorefct_str, profile, []) == []
+
+
+@pytest.mark.parametrize(
+    "cutoff", [None, 0, 2, 3, 4]
+)
+@pytest.mark.parametrize(
+    "chunksize", [None, 1, 4]
+)
+def test_mavscores_batch(cutoff, chunksize):
+    from abcvoting.misc import hamming
+
+    profile = Profile(7)
+    preflist = [[0, 1], [1], [1, 3], [4], [1, 2, 3, 4, 5], [1, 5, 3], [0, 1, 2, 4, 5], [1], [], [1]]
+    profile.add_voters(preflist)
+    committees = [[], [6], [1, 2, 3, 4], [0, 5, 6], [1, 3], [0, 1, 2, 3, 4, 5, 6]]
+    expected = [max(hamming(pref, committee) for pref in profile) for committee in committees]
+    assert expected == [scores.mavscore(profile, committee) for committee in committees]
+
+    batch_scores = scores.mavscores_batch(profile, committees, cutoff=cutoff, chunksize=chunksize)
+    for score, exp_score in zip(batch_scores, expected):
+        if cutoff is None or exp_score <= cutoff:
+            assert score == exp_score
+        else:
+            assert score > cutoff
+    assert scores.mavscores_batch(profile, []) == []
+
+    distances = scores.hamming_distances_batch(profile, committees)
+    assert distances.tolist() == [[hamming(pref, committee) for pref in profile]
+                                  for committee in committees]
+
+
+@pytest.mark.parametrize(
+    "scorefct_str", ["pav", "av", "slav", "cc", "geom2", "geom3.5"]
+)
+def test_scorefunction_tables(scorefct_str):
+    scorefct = scores.get_scorefct(scorefct_str, 4)
+    assert scores.get_scorefct(scorefct_str, 4) is scorefct
+    assert scorefct(0) == 0
+    for i in range(1, 8):
+        assert scorefct.cumulative_score(i) == scorefct.cumulative_score(i - 1) + scorefct(i)
+        assert scores.cumulative_score_fct(scorefct, i) == scorefct.cumulative_score(i)
+    for i in range(5):
+        assert scorefct.marginal_float[i] == pytest.approx(float(scorefct(i)))
+        assert scorefct.cumulative_float[i] == pytest.approx(float(scorefct.cumulative[i]))
+    # values beyond the committee size are computed on demand
+    assert scores.get_scorefct(scorefct_str, 7)(6) == scorefct(6)
+
+
+@pytest.mark.parametrize(
+    "scorefct_str", ["pav", "av", "slav", "cc", "geom2"]
+)
+@pytest.mark.parametrize(
+    "arithmetic", ["exact", "float", "auto"]
+)
+def test_marginal_gain_tracker(scorefct_str, arithmetic):
+    profile = Profile(7)
+    preflist = [[0, 1], [1], [1, 3], [4], [1, 2, 3, 4, 5], [1, 5, 3], [0, 1, 2, 4, 5]]
+    profile.add_voters(preflist)
+    profile.add_voter(ApprovalSet([2, 4], Fraction(5, 2)))
+    scorefct = scores.get_scorefct(scorefct_str, 4)
+    tracker = scores.MarginalGainTracker(scorefct, profile, arithmetic=arithmetic)
+
+    for committee in [[], [1], [1, 4], [1, 4, 2], [1, 4], [1, 3, 5, 6], [0, 5], []]:
+        tracker.set_committee(committee)
+        assert tracker.committee == committee
+        assert tracker.satisfaction == [len(set(committee) & pref.approved) for pref in profile]
+        exp_score = scores.thiele_score(scorefct_str, profile, committee)
+        exp_marg = scores.marginal_thiele_scores_add(scorefct, profile, committee)
+        exp_best = sum(sorted(marg for cand, marg in enumerate(exp_marg)
+                              if cand not in committee)[-2:])
+        assert tracker.best_gains_sum(2) == pytest.approx(float(exp_best))
+        if arithmetic == "exact":
+            assert tracker.score == exp_score
+            assert tracker.marginal_gains() == exp_marg
+        else:
+            assert tracker.score == pytest.approx(float(exp_score))
+            assert tracker.marginal_gains() == pytest.approx([float(x) for x in exp_marg])
+
+    tracker.set_committee([2])
+    other = tracker.copy()
+    other.add(3)
+    assert tracker.committee == [2]
+    assert tracker.marginal_gains() == pytest.approx(
+        [float(x) for x in scores.marginal_thiele_scores_add(scorefct, profile, [2])])
+
+
+@pytest.mark.parametrize(
+    "scorefct_str", ["pav", "av", "slav", "cc", "geom2"]
+)
+@pytest.mark.parametrize(
+    "arithmetic", ["exact", "float", "auto"]
+)
+def test_removal_cost_tracker(scorefct_str, arithmetic):
+    profile = Profile(7)
+    preflist = [[0, 1], [1], [1, 3], [4], [1, 2, 3, 4, 5], [1, 5, 3], [0, 1, 2, 4, 5]]
+    profile.add_voters(preflist)
+    profile.add_voter(ApprovalSet([2, 4], Fraction(5, 2)))
+    scorefct = scores.get_scorefct(scorefct_str, 7)
+    tracker = scores.RemovalCostTracker(scorefct, profile, arithmetic=arithmetic)
+    committee = list(range(profile.num_cand))
+
+    for cand in [6, 2, 0, 4, 1]:
+        exp_costs = scores.marginal_thiele_scores_remove(scorefct, profile, committee)
+        exp_min = min(exp_costs)
+        cost, cheapest = tracker.cheapest()
+        assert cost == pytest.approx(float(exp_min))
+        if arithmetic != "float":
+            assert cheapest == [c for c in committee if exp_costs[c] == exp_min]
+        for c in committee:
+            assert tracker.cost(c) == pytest.approx(float(exp_costs[c]))
+        other = tracker.copy()
+        committee.remove(cand)
+        tracker.remove(cand)
+        assert tracker.score == pytest.approx(
+            float(scores.thiele_score(scorefct_str, profile, committee)))
+        assert other.committeesize == tracker.committeesize + 1
+
+
+def test_scaled_int_backend():
+    backend = scores._ScaledIntBackend(scale=12)
+    x = backend.number(Fraction(1, 3))
+    assert x == 4
+    assert backend.mul(x, backend.number(Fraction(1, 2))) == backend.number(Fraction(1, 6))
+    with pytest.raises(ArithmeticError):
+        backend.number(Fraction(1, 5))
+    with pytest.raises(ArithmeticError):
+        backend.div(x, backend.number(5))
+    with pytest.raises(ValueError):
+        scores._ScaledIntBackend(scale=0)